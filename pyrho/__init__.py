@@ -0,0 +1,28 @@
+"""
+PyRho, A Code Density Analyzer
+
+Importing this package allows benchmarks to be analyzed from Python (see
+api.py), without the command line of main.py (which bin/pyrho runs as
+python -m pyrho.main):
+
+    import pyrho
+    result = pyrho.analyze_benchmark('benchmarks/crc32', 'rvgcc', 'armcc')
+    print(result.rv_size, result.arm_size)
+
+The functions of api.py are only imported on first use, rather than with the
+package: the scripts import the RVCX settings of constants.py by value, so
+the worker processes of the server (see serve.py) must apply their settings
+to pyrho.constants before any other script is imported.
+
+"""
+
+# Functions of api.py (see __getattr__())
+__all__ = ['analyze_benchmark', 'BenchmarkResult']
+
+
+def __getattr__(name):
+    """ Imports the functions of api.py on first use (see above). """
+    if name in __all__:
+        from . import api
+        return getattr(api, name)
+    raise AttributeError('module ' + repr(__name__) + ' has no attribute ' + repr(name))
@@ -5,20 +5,665 @@ Author: Jennifer Hellar
 
 """
 # Built-in libraries to handle command line inputs/outputs/execution results
+import concurrent.futures
+import hashlib
+import marshal
 import os
 import re
+import time
 
 # Supplementary python scripts
-import summary_xlsx
-import save_restore_xlsx
-import excel
-import arm
-import riscv
-import config
-from constants import *
+from . import summary_xlsx
+from . import save_restore_xlsx
+from . import excel
+from . import arm
+from . import riscv
+from . import config
+from .constants import *
+
+# import the pool of worker processes and the class ParseRules from parser.py
+from .parser import process_pool
+from .parser import ParseRules
+from .parser import PARSER_VERSION
+
+# Durations of the files scanned by this run (see print_timings())
+#   Key: (benchmark, build)
+#   Val: (disassembly file, seconds)
+timings = {}
+
+
+def scan_file(build, assemblyfile, optfile, jobs=1):
+    """
+    Scans a RISC-V or Arm disassembly file for data only (see
+    riscv.scan_riscv_file_data() and arm.scan_arm_file_data()).
+
+    Returns the scan results.
+    """
+    if (build.find('rv') != -1):
+        return riscv.scan_riscv_file_data(build, assemblyfile, optfile, jobs)
+    return arm.scan_arm_file_data(build, assemblyfile, optfile, jobs)
+
+
+def timed_scan_file(build, assemblyfile, optfile, jobs=1):
+    """
+    Scans a disassembly file for data only (see scan_file()).
+
+    Returns a tuple of the duration (in seconds) and the scan results.
+    """
+    start = time.perf_counter()
+    res = scan_file(build, assemblyfile, optfile, jobs)
+    return (time.perf_counter() - start, res)
+
+
+def timed_read_arm_file(build, assemblyfile, optfile, jobs=1):
+    """
+    Extracts the selected functions of an Arm disassembly file for its workbook
+    (see arm.read_arm_file()).
+
+    Returns a tuple of the duration (in seconds) and the functions extracted.
+    """
+    start = time.perf_counter()
+    res = arm.read_arm_file(build, assemblyfile, optfile, jobs)
+    return (time.perf_counter() - start, res)
+
+
+def prefetch_task(task, bodies=True):
+    """
+    Reads the disassembly file of a task (see get_tasks()) ahead of its scan
+    (see ParseRules.prefetch()): only if it must be read in full, without
+    bodies (e.g. to create its index), otherwise also the bodies of the
+    functions selected in its config file.
+    """
+    (build, assemblyfile, optfile) = task[2]
+    try:
+        func_opts = None
+        if bodies and os.path.exists(optfile):
+            func_opts = config.read_config(optfile)
+        ParseRules(build).prefetch(assemblyfile, func_opts)
+    except (OSError, ValueError):
+        # Left to the scan to report
+        pass
+
+
+class Prefetcher:
+    """
+    Reads the disassembly files of tasks (see get_tasks()) on background
+    threads ahead of their scan (see prefetch_task()), so that reading the next
+    files (e.g. from a network file system) overlaps with parsing the current
+    one. At most PREFETCH_DEPTH tasks are read ahead of the last one used.
+
+    Used as a context manager, with use() called before each benchmark or task
+    is scanned (in the order of the tasks), and only for scans with one job:
+    worker processes must not be forked while its threads run (see
+    parser.process_pool()).
+    """
+
+    def __init__(self, tasks, bodies=True):
+        self.tasks = list(tasks) if prefetch_en else []
+        self.bodies = bodies
+        self.futures = {}   # Key: task index, Val: future of its read
+        self.next = 0       # index of the next task to read
+        self.used = 0       # number of tasks used
+        self.executor = None
+        if (len(self.tasks) > 0):
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=PREFETCH_DEPTH)
+        self.fill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.executor is not None:
+            for future in self.futures.values():
+                future.cancel()
+            self.executor.shutdown(wait=True)
+
+    def fill(self):
+        """ Reads ahead the tasks up to PREFETCH_DEPTH after those used. """
+        while (self.next < len(self.tasks)) \
+                and (self.next < self.used + PREFETCH_DEPTH):
+            self.futures[self.next] = self.executor.submit(
+                prefetch_task, self.tasks[self.next], self.bodies)
+            self.next += 1
+
+    def use(self, benchmark, build=None):
+        """
+        Waits for the files of a benchmark (or only of one build) to be read,
+        then reads ahead the tasks after them.
+        """
+        for (i, task) in enumerate(self.tasks):
+            if (task[0] == benchmark) and (build is None or task[1] == build):
+                future = self.futures.pop(i, None)
+                if future is not None:
+                    future.result()
+                self.used = max(self.used, i + 1)
+        self.fill()
+
+
+def list_tasks(benchmarkdir, benchmarks, builds=None):
+    """
+    Lists the disassembly files of the benchmarks to scan (only of the builds
+    listed, if any), without creating their config files (see
+    update_configs()).
+
+    Returns a list of tasks, each a tuple of:
+        - benchmark
+        - build
+        - (build, disassembly file, config file), arguments of scan_file()
+    """
+    configdir = os.path.join(os.getcwd(), 'results', 'config')
+    # List the benchmark directories at once, rather than waiting on each
+    #   in turn (e.g. on a network file system)
+    paths = [os.path.join(benchmarkdir, benchmark) for benchmark in benchmarks]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=PREFETCH_DEPTH) as executor:
+        listings = list(executor.map(os.listdir, paths))
+    tasks = []
+    for (benchmark, benchmarkpath, files) in zip(benchmarks, paths, listings):
+        files = [i for i in files if i.find('disassembly') != -1]
+
+        # Get the RISC-V and Arm disassembly files available
+        rvfiles = [i for i in files if i[:i.index('_')].find('rv') != -1]
+        armfiles = [i for i in files if i[:i.index('_')].find('arm') != -1]
+
+        # Each RISC-V build, then each Arm build
+        for fname in rvfiles + armfiles:
+            build = fname[:fname.index('_')]
+            if (builds is not None) and (build not in builds):
+                continue
+            assemblyfile = os.path.join(benchmarkpath, fname)
+            optfile = os.path.join(configdir, benchmark + '_' + build + '_function_selection.txt')
+            tasks.append((benchmark, build, (build, assemblyfile, optfile)))
+    return tasks
+
+
+def update_configs(tasks, jobs=1):
+    """
+    Creates the config file of each task (see list_tasks()) if it does not
+    exist or is out of date (see config.update_subconfigs(), with the worker
+    processes of jobs).
+    """
+    configdir = os.path.join(os.getcwd(), 'results', 'config')
+    subconfigs = []
+    for (benchmark, build, (build, assemblyfile, optfile)) in tasks:
+        # Locate the configuration file for this benchmark
+        masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
+        subconfigs.append((build, assemblyfile, optfile, masteropt))
+    # (reading ahead the files which must be indexed, see Prefetcher)
+    if (jobs > 1):
+        config.update_subconfigs(subconfigs, jobs)
+    else:
+        with Prefetcher(tasks, bodies=False) as prefetcher:
+            for (task, subconfig) in zip(tasks, subconfigs):
+                prefetcher.use(*task[:2])
+                config.update_subconfig(*subconfig)
+
+
+def get_tasks(benchmarkdir, benchmarks, jobs=1, builds=None):
+    """
+    Lists the disassembly files of the benchmarks to scan (see list_tasks()),
+    creating the config file of each build if it does not exist or is out of
+    date (see update_configs()).
+
+    Returns a list of tasks (see list_tasks()).
+    """
+    tasks = list_tasks(benchmarkdir, benchmarks, builds)
+    update_configs(tasks, jobs)
+    return tasks
+
+
+def read_timings():
+    """
+    Reads the durations of the files scanned by previous runs (see
+    save_timings()).
+
+    Returns a dictionary:
+        * Key: (benchmark, build)
+        * Val: (hash of the disassembly file, seconds)
+    """
+    timingsfile = os.path.join(os.getcwd(), 'results', '.timings')
+    if not os.path.exists(timingsfile):
+        return {}
+    with open(timingsfile, 'rb') as f:
+        try:
+            saved = marshal.loads(f.read())
+        except (EOFError, ValueError, TypeError):
+            # Unreadable (e.g. written by another Python version)
+            return {}
+    return {task: val for (task, val) in saved.items()
+            if isinstance(val, tuple) and (len(val) == 2)}
+
+
+def save_timings():
+    """
+    Adds the durations of the files scanned by this run to the saved ones,
+    tied to the hash of each file.
+
+    A saved duration is only replaced once its file has changed: the first
+    scan of a file parses it in full, whereas later scans of the same file
+    are mostly cache hits (see ParseRules.get_cache_file()), which would make
+    poor weights (see get_weights()).
+    """
+    saved = read_timings()
+    for (task, (assemblyfile, seconds)) in timings.items():
+        filehash = ParseRules(task[1]).get_hash(assemblyfile)
+        if (task not in saved) or (saved[task][0] != filehash):
+            saved[task] = (filehash, seconds)
+    timingsfile = os.path.join(os.getcwd(), 'results', '.timings')
+    with open(timingsfile + '.tmp', 'wb') as f:
+        f.write(marshal.dumps(saved))
+    os.replace(timingsfile + '.tmp', timingsfile)
+
+
+def print_timings():
+    """
+    Prints a table of the files scanned by this run, longest first, with their
+    size, number of instructions (from the function index, see
+    ParseRules.count_instructions(), or '-' without one), duration and
+    throughput.
+    """
+    if (len(timings) == 0):
+        return
+    print('\n{:<30s}{:>12s}{:>14s}{:>10s}{:>12s}'.format('Task', 'Size (KB)',
+                                                        'Instructions',
+                                                        'Seconds', 'Instr/sec'))
+    order = sorted(timings.keys(), key=lambda task: -timings[task][1])
+    for task in order:
+        (assemblyfile, seconds) = timings[task]
+        count = ParseRules(task[1]).count_instructions(assemblyfile)
+        if (count is None):
+            (count, rate) = ('-', '-')
+        else:
+            rate = '{:.0f}'.format(count / max(seconds, 1e-6))
+        print('{:<30s}{:>12.1f}{:>14s}{:>10.2f}{:>12s}'.format(
+            task[0] + ' ' + task[1], os.path.getsize(assemblyfile) / 1024,
+            str(count), seconds, rate))
+
+
+def get_units(tasks, armbuilds, rvbuilds):
+    """
+    Groups the tasks (see get_tasks()) into units of work: the baseline builds
+    of each benchmark (in armbuilds and rvbuilds), which single_benchmark()
+    scans together, and each other build on its own.
+
+    Returns a list of units, each a list of tasks.
+    """
+    units = []
+    baselines = {}
+    for task in tasks:
+        if (task[1] in rvbuilds) or (task[1] in armbuilds):
+            if (task[0] not in baselines):
+                baselines[task[0]] = []
+                units.append(baselines[task[0]])
+            baselines[task[0]].append(task)
+        else:
+            units.append([task])
+    return units
+
+
+def get_weights(units, timed=True):
+    """
+    Estimates the cost of each unit of work (see get_units()), by the durations
+    recorded on previous runs (see save_timings()) if timed and there is one
+    for every task, of the file as it is now, otherwise by the size of the
+    disassembly files.
+
+    Returns a list of weights (in the order of the units).
+    """
+    saved = read_timings() if timed else {}
+    if timed and all([(task[:2] in saved) and (saved[task[:2]][0]
+                      == ParseRules(task[1]).get_hash(task[2][1]))
+                      for unit in units for task in unit]):
+        return [sum([saved[task[:2]][1] for task in unit]) for unit in units]
+    return [sum([os.path.getsize(task[2][1]) for task in unit])
+            for unit in units]
+
+
+def shard_tasks(tasks, armbuilds, rvbuilds, shard):
+    """
+    Splits the tasks (see get_tasks()) across shards, assigning the units of
+    work (see get_units()) largest first to the shard with the least work.
+
+    The units are weighed by the size of their files (see get_weights()),
+    which every shard sees the same, rather than by the durations saved by
+    previous runs, which each shard updates on completing (and which differ
+    between machines).
+
+    Arguments:
+        shard           (i, N, run): shard i (of 1 to N) of a run
+
+    Returns the tasks of shard i.
+    """
+    (i, shards, run) = shard
+    units = get_units(tasks, armbuilds, rvbuilds)
+    weights = get_weights(units, timed=False)
+    loads = [0] * shards
+    assigned = set()
+    for u in sorted(range(len(units)), key=lambda u: -weights[u]):
+        least = loads.index(min(loads))
+        loads[least] += weights[u]
+        if (least == i - 1):
+            assigned.update([task[:2] for task in units[u]])
+    return [task for task in tasks if (task[:2] in assigned)]
+
+
+def get_shard_file(shard):
+    """
+    Returns the filename of the scan results saved by a shard, tagged with
+    its run and the RVCX settings (see get_settings()), so that the results of
+    the shards of other runs or with other settings are never read.
+    """
+    (i, shards, run) = shard
+    tag = hashlib.sha1((run + ':' + get_settings()).encode()).hexdigest()[:12]
+    return os.path.join(os.getcwd(), 'results', '.shard_' + tag + '_' + str(i)
+                        + '_of_' + str(shards))
+
+
+def save_shard(shard, tasks, scans):
+    """
+    Saves the scan results of the tasks of a shard for the other shards, with
+    the hashes of the files they were scanned from (see input_signature()).
+    """
+    saved = {}
+    for task in tasks:
+        saved[task[:2]] = (input_signature(task), scans[task[:2]])
+    shardfile = get_shard_file(shard)
+    with open(shardfile + '.tmp', 'wb') as f:
+        f.write(marshal.dumps(saved))
+    os.replace(shardfile + '.tmp', shardfile)
+
+
+def read_shards(shard, tasks):
+    """
+    Reads the scan results saved by the shards of a run (see save_shard()).
+
+    Returns the results of all the tasks (see all_benchmarks()), or None if
+    any task has no results saved for the current contents of its files (e.g.
+    its shard has not completed yet, or only saved results of older files).
+    """
+    (i, shards, run) = shard
+    scans = {}
+    for j in range(1, shards + 1):
+        try:
+            with open(get_shard_file((j, shards, run)), 'rb') as f:
+                saved = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            # Not saved yet (or removed by the shard creating the workbook)
+            return None
+        scans.update(saved)
+    results = {}
+    for task in tasks:
+        saved = scans.get(task[:2])
+        if (saved is None) or (saved[0] != input_signature(task)):
+            return None
+        results[task[:2]] = saved[1]
+    return results
+
+
+def get_claim_file(shard):
+    """
+    Returns the filename of the claim on the summary workbook of a run (see
+    claim_summary()), named as its shard 0.
+    """
+    (i, shards, run) = shard
+    return get_shard_file((0, shards, run)) + '.claim'
+
+
+def claim_summary(shard):
+    """
+    Claims the summary workbook of a run for a shard, by creating the claim
+    file, which only one shard can do until it is released (see
+    release_summary()).
+
+    Returns True if claimed, or False if another shard holds the claim.
+    """
+    claimfile = get_claim_file(shard)
+    try:
+        os.close(os.open(claimfile, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+def release_summary(shard):
+    """ Releases the claim on the summary workbook of a run. """
+    try:
+        os.remove(get_claim_file(shard))
+    except OSError:
+        pass
+
+
+def remove_shards(shard):
+    """
+    Removes the scan results saved by the shards of a run, then releases the
+    claim on its summary workbook (see claim_summary()).
+    """
+    (i, shards, run) = shard
+    for j in range(1, shards + 1):
+        try:
+            os.remove(get_shard_file((j, shards, run)))
+        except OSError:
+            pass
+    release_summary(shard)
+
+
+def get_settings():
+    """
+    Returns the hash of the RVCX settings (see constants.py) which the results
+    of the files scanned depend on.
+    """
+    settings = (PARSER_VERSION, ENABLED, BR_ENABLED, BR_KEEP, PAIRS_ENABLED,
+                REG_LIST, IGNORE_REGS, j_jal_en, save_restore_en,
+                RV32_FORMATS, sorted(RV32_INSTR_FORMATS.items()),
+                sorted(RV32C_INSTR_FORMATS.items()))
+    return hashlib.sha1(repr(settings).encode()).hexdigest()
 
 
-def single_benchmark(armbuild, rvbuild, benchmarkpath, output_file):
+def input_signature(task):
+    """
+    Returns the hashes of the contents of the disassembly and config files of
+    a task, which identify the results saved to the manifest.
+    """
+    (build, assemblyfile, optfile) = task[2]
+    parse_rules = ParseRules(build)
+    return (parse_rules.get_hash(assemblyfile), parse_rules.hash_file(optfile))
+
+
+def load_manifest():
+    """
+    Reads the manifest of the results saved by previous runs (see
+    save_manifest()), or starts a new one if the RVCX settings have changed.
+
+    Returns a dictionary of:
+        - 'settings': hash of the RVCX settings (see get_settings())
+        - 'results'
+            * Key: (benchmark, build)
+            * Val: (input signature, results (see scan_file()))
+        - 'workbooks'
+            * Key: workbook filename
+            * Val: list of ((benchmark, build), input signature) of the
+                files the workbook was created from
+    """
+    settings = get_settings()
+    manifest = {'settings': settings, 'results': {}, 'workbooks': {}}
+    manifestfile = os.path.join(os.getcwd(), 'results', '.manifest')
+    if not manifest_en or not os.path.exists(manifestfile):
+        return manifest
+    with open(manifestfile, 'rb') as f:
+        try:
+            saved = marshal.loads(f.read())
+        except (EOFError, ValueError, TypeError):
+            return manifest
+    if (saved.get('settings') != settings):
+        return manifest
+    return saved
+
+
+def save_manifest(tasks, scans, workbook=None):
+    """
+    Adds the results of the tasks (see get_tasks()) to the manifest, and with
+    a workbook, records that it was created from the files of the tasks.
+    """
+    if not manifest_en or (len(tasks) == 0):
+        return
+    manifest = load_manifest()
+    signatures = []
+    for task in tasks:
+        signature = input_signature(task)
+        manifest['results'][task[:2]] = (signature, scans[task[:2]])
+        signatures.append((task[:2], signature))
+    if workbook is not None:
+        manifest['workbooks'][workbook] = signatures
+    manifestfile = os.path.join(os.getcwd(), 'results', '.manifest')
+    with open(manifestfile + '.tmp', 'wb') as f:
+        f.write(marshal.dumps(manifest))
+    os.replace(manifestfile + '.tmp', manifestfile)
+
+
+def read_manifest(tasks, workbook=None):
+    """
+    Reads the results saved to the manifest for the tasks whose disassembly
+    and config files have not changed (see save_manifest()).
+
+    Returns the results of those tasks (see all_benchmarks()), or with a
+    workbook, of all the tasks only if none have changed since the workbook
+    was created (otherwise an empty dictionary).
+    """
+    if not manifest_en:
+        return {}
+    manifest = load_manifest()
+    results = {}
+    signatures = []
+    for task in tasks:
+        if not os.path.exists(task[2][2]):
+            continue
+        signature = input_signature(task)
+        saved = manifest['results'].get(task[:2])
+        if (saved is not None) and (saved[0] == signature):
+            results[task[:2]] = saved[1]
+        signatures.append((task[:2], signature))
+    if workbook is not None:
+        if not os.path.exists(workbook) \
+                or (manifest['workbooks'].get(workbook) != signatures) \
+                or (len(results) != len(tasks)):
+            return {}
+    return results
+
+
+def scan_tasks(tasks, jobs=1, durations=None):
+    """
+    Scans the disassembly files of the tasks (see get_tasks()) for data only,
+    largest first and one per worker process with more than one job (or
+    otherwise reading the next files ahead, see Prefetcher), recording their
+    durations in durations (if None, in timings).
+
+    Returns the results of the tasks (see all_benchmarks()).
+    """
+    if durations is None:
+        durations = timings
+    weights = get_weights([[task] for task in tasks])
+    tasks = [tasks[i] for i in sorted(range(len(tasks)), key=lambda i: -weights[i])]
+    if (jobs > 1) and (len(tasks) > 1):
+        args = list(zip(*[task[2] for task in tasks]))
+        with process_pool(jobs) as pool:
+            done = list(pool.map(timed_scan_file, *args))
+    else:
+        done = []
+        with Prefetcher(tasks) as prefetcher:
+            for task in tasks:
+                prefetcher.use(*task[:2])
+                done.append(timed_scan_file(*task[2], jobs=jobs))
+    scans = {}
+    for (task, (seconds, res)) in zip(tasks, done):
+        durations[task[:2]] = (task[2][1], seconds)
+        scans[task[:2]] = res
+    return scans
+
+
+def get_output_files(output_file, default, armbuilds, rvbuilds):
+    """
+    Names the workbook of each combination of an Arm and a RISC-V build.
+
+    Arguments:
+        output_file     Output Excel workbook name (if None, default)
+        default         Default workbook name ([name]_analysis.xlsx)
+        armbuilds       Arm builds to analyze
+        rvbuilds        RISC-V builds to analyze
+
+    Returns a dictionary:
+        * Key: (rvbuild, armbuild)
+        * Val: workbook name, with '_[rvbuild]_[armbuild]' added if there is
+            more than one combination (or None for the default workbook)
+    """
+    combinations = [(rvbuild, armbuild) for rvbuild in rvbuilds
+                    for armbuild in armbuilds]
+    if (len(combinations) == 1):
+        return {combinations[0]: output_file}
+    if output_file is None:
+        output_file = default
+    if output_file[-5:] == '.xlsx':
+        output_file = output_file[:-5]
+    output_files = {}
+    for (rvbuild, armbuild) in combinations:
+        output_files[(rvbuild, armbuild)] = output_file + '_' + rvbuild + '_' \
+            + armbuild + '.xlsx'
+    return output_files
+
+
+def multiple_benchmark(armbuilds, rvbuilds, benchmarkpath, output_file,
+                       jobs=1):
+    """
+    Analyzes each combination of the Arm and RISC-V builds and creates an Excel
+    workbook for each (see single_benchmark() and get_output_files()). Each
+    disassembly file is only parsed once (see ParseRules.get_table()).
+
+    Returns the data results of the files scanned (see single_benchmark()).
+    """
+    # Extract benchmark name
+    benchmark = os.path.basename(os.path.normpath(benchmarkpath))
+    output_files = get_output_files(output_file, benchmark + '_analysis.xlsx',
+                                    armbuilds, rvbuilds)
+    scans = {}
+    for ((rvbuild, armbuild), output_file) in output_files.items():
+        scans.update(single_benchmark(armbuild, rvbuild, benchmarkpath,
+                                      output_file, jobs))
+    return scans
+
+
+def benchmark_data(armbuild, rvbuild, benchmarkpath, jobs=1, durations=None):
+    """
+    Analyzes Arm and RISC-V disassembly for data only (no workbook created).
+
+    Arguments:
+        armbuild        Arm build to analyze (armcc, armclang, ...)
+        rvbuild         RISC-V build to analyze (rvgcc, ...)
+        benchmarkpath   Path to benchmark directory
+        jobs            Number of worker processes to scan the files with
+        durations       Dictionary to record the durations of the files
+                            scanned in (if None, timings)
+
+    Returns the data results of the files scanned (see single_benchmark()).
+    """
+    benchmarkpath = os.path.normpath(benchmarkpath)
+    benchmark = os.path.basename(benchmarkpath)
+    tasks = get_tasks(os.path.dirname(benchmarkpath), [benchmark], jobs,
+                      [rvbuild, armbuild])
+
+    # Check the requested builds have disassembly files available
+    builds = [task[1] for task in tasks]
+    for build in [rvbuild, armbuild]:
+        if build not in builds:
+            raise Exception('Disassembly for \'' + build + '\' unavailable. Please compile or choose another build of ' + benchmark)
+
+    # Scan the files not unchanged since a previous run (see read_manifest())
+    scans = read_manifest(tasks)
+    new = [task for task in tasks if (task[:2] not in scans)]
+    scans.update(scan_tasks(new, jobs, durations))
+    save_manifest(new, scans)
+    return scans
+
+
+def single_benchmark(armbuild, rvbuild, benchmarkpath, output_file, jobs=1,
+                     durations=None, verbose=True):
     """
     Analyzes Arm and RISC-V disassembly and creates an Excel workbook with code
     size data.
@@ -29,6 +674,17 @@ def single_benchmark(armbuild, rvbuild, benchmarkpath, output_file):
         benchmarkpath   Path to benchmark directory
         output_file     Output Excel workbook name
                             (if None, creates [benchmark name]_analysis.xlsx)
+        jobs            Number of worker processes to parse each file with
+        durations       Dictionary to record the durations of the files
+                            scanned in (if None, timings)
+        verbose         False to not print where the workbook is
+
+    With manifest_en, the workbook is not created again if none of its files
+    or settings have changed since (see read_manifest()).
+
+    Returns the data results of the files scanned (for all_benchmarks()):
+        * Key: (benchmark, build)
+        * Val: results (see scan_file())
     """
     # Extract benchmark name
     if benchmarkpath[-1] != '/':
@@ -73,16 +729,42 @@ def single_benchmark(armbuild, rvbuild, benchmarkpath, output_file):
     	output_file = benchmark + '_analysis.xlsx'
     if output_file[-5:] != '.xlsx':
         output_file += '.xlsx'
-    # Create the Excel workbook
     output_file = os.path.join(outdir, output_file)
-    excel.create_workbook(output_file)
+
+    # Create the subconfig files for the builds if they do not exist or are
+    #   out of date
+    configdir = os.path.join(os.getcwd(), outdir, 'config')
+    masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
+    rvoptfile = os.path.join(configdir, benchmark + '_' + rvbuild \
+        + '_function_selection.txt')
+    armoptfile = os.path.join(configdir, benchmark + '_' + armbuild \
+        + '_function_selection.txt')
+    config.update_subconfigs([(rvbuild, rvfile, rvoptfile, masteropt),
+                              (armbuild, armfile, armoptfile, masteropt)],
+                             jobs)
+
+    # Keep the workbook if none of its files or settings have changed since
+    #   it was created (see read_manifest())
+    tasks = [(benchmark, rvbuild, (rvbuild, rvfile, rvoptfile)),
+             (benchmark, armbuild, (armbuild, armfile, armoptfile))]
+    stored = read_manifest(tasks, output_file)
+    if (len(stored) > 0):
+        if verbose:
+            print('\nUnchanged! See Excel workbook: ')
+            print('\t' + output_file)
+        return stored
+    if durations is None:
+        durations = timings
+
+    # Create the Excel workbook
+    ctx = excel.WorkbookContext(output_file)
 
     # Create Summary worksheet; write input files to A1, A2; set column sizes
     # Do this first so that it shows up as the first sheet in the workbook
-    sum_wksheet = summary_xlsx.create_summary(False, rvfile, armfile)
+    sum_wksheet = summary_xlsx.create_summary(ctx, False, rvfile, armfile)
 
     # Use an empty worksheet to calculate the pie segments for radar plots
-    tmp_wksheet = excel.wkbook.add_worksheet('tmp')
+    tmp_wksheet = ctx.wkbook.add_worksheet('tmp')
     segments = [0] * len(RV32_FORMATS)
     for instr in RV32_INSTR_FORMATS.keys():
         lbl = RV32_INSTR_FORMATS[instr][0]
@@ -95,178 +777,223 @@ def single_benchmark(armbuild, rvbuild, benchmarkpath, output_file):
 
     # Create the __riscv_save and __riscv_restore worksheets
     if save_restore_en:
-        save_wksheet = save_restore_xlsx.create_sheet('__riscv_save')
-        restore_wksheet = save_restore_xlsx.create_sheet('__riscv_restore')
-
-    # Create the subconfig file for the RISC-V build if it does not exist
-    configdir = os.path.join(os.getcwd(), outdir, 'config')
-    masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
-
-    rvoptfile = os.path.join(configdir, benchmark + '_' + rvbuild \
-        + '_function_selection.txt')
-    optflag = os.path.exists(rvoptfile)
-    if not optflag:
-        config.create_subconfig(rvbuild, rvfile, rvoptfile, masteropt)
-
-    # Parse the RISC-V disassembly according to functions selected in rvoptfile
-    res = riscv.scan_riscv_file(rvbuild, rvfile, rvoptfile)
-    (riscv_results, riscv_reductions, riscv_pairs, riscv_instr, riscv_formats) = res
-
-    # for instr in sorted(riscv_instr.keys()):
-    #     print("{:<30}{:<30}".format(instr, riscv_instr[instr]))
-
-    # Create the subconfig file for the Arm build if it does not exist
-    armoptfile = os.path.join(configdir, benchmark + '_' + armbuild \
-        + '_function_selection.txt')
-    optflag = os.path.exists(armoptfile)
-    if not optflag:
-        config.create_subconfig(armbuild, armfile, armoptfile, masteropt)
-
-    # Parse the Arm disassembly according to functions selected in armoptfile
-    arm_results = arm.scan_arm_file(armbuild, armfile, armoptfile)
+        save_wksheet = save_restore_xlsx.create_sheet(ctx, '__riscv_save')
+        restore_wksheet = save_restore_xlsx.create_sheet(ctx, '__riscv_restore')
+
+    # The Arm functions are recorded in the worksheets of the RISC-V functions,
+    #   which are named from the functions selected in rvoptfile
+    ctx.wksheet_names.update(config.get_wksheet_names(rvbuild, rvoptfile))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        # Parse the Arm disassembly according to functions selected in
+        #   armoptfile, on another thread while the RISC-V file is scanned
+        #   (only with one job: with more, the files are parsed by forked
+        #   worker processes, which must not be forked while another thread
+        #   may hold a lock, e.g. symbols.lock, never released in the workers)
+        if (jobs == 1):
+            arm_scan = executor.submit(timed_read_arm_file, armbuild, armfile,
+                                       armoptfile, jobs)
+
+        # Parse the RISC-V disassembly according to functions selected in
+        #   rvoptfile
+        start = time.perf_counter()
+        res = riscv.scan_riscv_file(ctx, rvbuild, rvfile, rvoptfile, jobs)
+        durations[(benchmark, rvbuild)] = (rvfile, time.perf_counter() - start)
+        (riscv_results, riscv_reductions, riscv_pairs, riscv_instr, riscv_formats) = res
+
+        # for instr in sorted(riscv_instr.keys()):
+        #     print("{:<30}{:<30}".format(instr, riscv_instr[instr]))
+
+        if (jobs == 1):
+            (seconds, arm_funcs) = arm_scan.result()
+        else:
+            (seconds, arm_funcs) = timed_read_arm_file(armbuild, armfile,
+                                                       armoptfile, jobs)
+
+    # Record the Arm functions once the RISC-V worksheets are written
+    start = time.perf_counter()
+    arm_results = arm.record_arm_file(ctx, armbuild, arm_funcs)
+    seconds += time.perf_counter() - start
+    durations[(benchmark, armbuild)] = (armfile, seconds)
 
     # Add the main table to record individual function totals
     row = 18
     col = 1
-    summary_xlsx.add_main_table(row, col, False, rvbuild, armbuild)
+    summary_xlsx.add_main_table(ctx, row, col, False, rvbuild, armbuild)
 
     # Add the totals table to record overall benchmark totals
     row = 3
     col = 1
-    summary_xlsx.add_totals_table(row, col, False, rvbuild, armbuild)
+    summary_xlsx.add_totals_table(ctx, row, col, False, rvbuild, armbuild)
 
     # Write out the results to the Summary worksheet
-    summary_xlsx.record_riscv_data(riscv_results, riscv_reductions, rvbuild)
-    summary_xlsx.record_arm_data(riscv_results, arm_results, rvbuild, armbuild)
+    summary_xlsx.record_riscv_data(ctx, riscv_results, riscv_reductions, rvbuild)
+    summary_xlsx.record_arm_data(ctx, riscv_results, arm_results, rvbuild, armbuild)
 
     # Record RVCX instruction performance
-    summary_xlsx.add_replaced_instr_table(riscv_reductions, rvbuild, armbuild)
+    summary_xlsx.add_replaced_instr_table(ctx, riscv_reductions, rvbuild, armbuild)
 
     # Add a chart to visualize the RVCX instruction performance
-    summary_xlsx.add_replaced_instr_chart(rvbuild)
+    summary_xlsx.add_replaced_instr_chart(ctx, rvbuild)
 
     # Record the rules used to implement new replaced instructions
-    summary_xlsx.add_replacement_rules_table()
+    summary_xlsx.add_replacement_rules_table(ctx)
 
     # Record the frequency of instructions
-    summary_xlsx.add_total_instr_table(riscv_instr, 20, rvbuild)
+    summary_xlsx.add_total_instr_table(ctx, riscv_instr, 20, rvbuild)
 
     # Record the frequency of instruction pairs
-    summary_xlsx.add_pairs_table(riscv_pairs, 20, rvbuild, armbuild)
+    summary_xlsx.add_pairs_table(ctx, riscv_pairs, 20, rvbuild, armbuild)
 
     # Record the frequency of instruction formats to 'tmp' worksheet
-    summary_xlsx.add_instr_formats_tables(riscv_formats, rvbuild)
+    summary_xlsx.add_instr_formats_tables(ctx, riscv_formats, rvbuild)
 
     # Add a chart to visualize the instruction format frequency distribution
-    summary_xlsx.add_instr_formats_radar(rvbuild)
+    summary_xlsx.add_instr_formats_radar(ctx, rvbuild)
 
     # Record function contribution to overshooting Arm code size
-    summary_xlsx.add_overshoot_table(riscv_results, arm_results, 5, rvbuild)
+    summary_xlsx.add_overshoot_table(ctx, riscv_results, arm_results, 5, rvbuild)
 
     # Add a chart to visualize the function overshoot over Arm code size
-    summary_xlsx.add_overshoot_chart(rvbuild)
+    summary_xlsx.add_overshoot_chart(ctx, rvbuild)
+
+    ctx.close()
+    if verbose:
+        print('\nComplete! See Excel workbook: ')
+        print('\t' + output_file)
 
-    excel.close_workbook()
-    print('\nComplete! See Excel workbook: ')
-    print('\t' + output_file)
+    scans = {(benchmark, rvbuild): riscv.get_data_results(res),
+             (benchmark, armbuild): arm.get_data_results(arm_results)}
+    save_manifest(tasks, scans, output_file)
+    return scans
 
 
-def all_benchmarks(armbuild, rvbuild, benchmarkdir, output_file):
+def all_benchmarks(armbuilds, rvbuilds, benchmarkdir, output_file, jobs=1,
+                   scans=None, shard=None):
     """
     Analyzes all Arm and RISC-V disassembly builds and creates an Excel workbook
-    with a sparse summary of the code size data.
+    with a sparse summary of the code size data, for each combination of the
+    baseline builds (see get_output_files()).
 
     Arguments:
-        armbuild        Arm build to set as baseline (armcc, armclang, ...)
-        rvbuild         RISC-V build to set as baseline (rvgcc, ...)
+        armbuilds       Arm builds to set as baseline (armcc, armclang, ...)
+        rvbuilds        RISC-V builds to set as baseline (rvgcc, ...)
         benchmarkpath   Path to benchmark directory
         output_file     Output Excel workbook name
                             (if None, creates all_benchmarks_analysis.xlsx)
+        jobs            Number of worker processes to scan the disassembly
+                            files with (one file per process)
+        scans           Results of files already scanned, which are not
+                            scanned again (see single_benchmark()), if any
+        shard           (i, N, run) to scan only the files of shard i (of 1
+                            to N, see shard_tasks()) of a run; the workbook
+                            is created by the shard which completes last
+
+    With manifest_en, the files unchanged since a previous run are not scanned
+    again (see read_manifest()).
+
+    Returns the data results of the files scanned or reused (see
+    single_benchmark()).
     """
-    # Create the Excel workbook
     outdir = os.path.join(os.getcwd(), 'results')
-    if output_file is None:
-    	output_file = 'all_benchmarks_analysis.xlsx'
-    if output_file[-5:] != '.xlsx':
-        output_file += '.xlsx'
-    output_file = os.path.join(outdir, output_file)
-    excel.create_workbook(output_file)
-
-    configdir = os.path.join(os.getcwd(), outdir, 'config')
-
-    # Create Summary worksheet; set column sizes
-    sum_wksheet = summary_xlsx.create_summary(True)
-
-    # Add the main table to record individual benchmark totals
-    row = 18
-    col = 1
-    summary_xlsx.add_main_table(row, col, True)
-
-    # Add the totals table to record overall suite totals
-    row = 3
-    col = 1
-    summary_xlsx.add_totals_table(row, col, True, rvbuild, armbuild)
 
     # Get a list of the benchmarks (subdirectories in benchmarkdir)
     filedirs = os.listdir(benchmarkdir)
     benchmarks = [f for f in filedirs if os.path.isdir(os.path.join(benchmarkdir, f))]
     benchmarks.sort()
 
+    # Disassembly files to scan for data only
+    #   (no individual benchmark workbook created)
+    if (shard is None):
+        tasks = get_tasks(benchmarkdir, benchmarks, jobs)
+        mine = tasks
+    else:
+        # Only the config files of this shard's tasks, which no other shard
+        #   writes (see config.update_subconfig())
+        tasks = list_tasks(benchmarkdir, benchmarks)
+        mine = shard_tasks(tasks, armbuilds, rvbuilds, shard)
+        update_configs(mine, jobs)
+
+    # Scan the files not already scanned, nor unchanged since the results
+    #   saved by a previous run (see read_manifest())
+    scans = dict(scans or {})
+    stored = read_manifest([task for task in mine if (task[:2] not in scans)])
+    scans.update(stored)
+    new = [task for task in mine if (task[:2] not in scans)]
+    for benchmark in sorted(set([task[0] for task in new])):
+        print('\n' + benchmark)
+    scans.update(scan_tasks(new, jobs))
+    save_manifest(new, scans)
+
+    # Save the results of this shard, and create the workbook only once the
+    #   results of all shards are available
+    if (shard is not None):
+        save_shard(shard, mine, scans)
+        others = read_shards(shard, tasks)
+        if (others is None):
+            print('\nShard ' + str(shard[0]) + '/' + str(shard[1])
+                  + ' complete! Waiting on the other shards for the summary workbook.')
+            return scans
+        # Only the first shard to claim the workbook creates it. The results
+        #   are read again once claimed, since a shard which held the claim
+        #   before removes them (see remove_shards()).
+        if not claim_summary(shard):
+            print('\nShard ' + str(shard[0]) + '/' + str(shard[1])
+                  + ' complete! Another shard is creating the summary workbook (if it was interrupted, remove '
+                  + get_claim_file(shard) + ' and run this shard again).')
+            return scans
+        others = read_shards(shard, tasks)
+        if (others is None):
+            release_summary(shard)
+            print('\nShard ' + str(shard[0]) + '/' + str(shard[1])
+                  + ' complete! The summary workbook was created by another shard.')
+            return scans
+        scans.update(others)
+
+    # Results in the same order as a serial run
+    #   (size, reductions, pairs, instr, formats) for RISC-V builds
     results = {}
     for build in BUILDS:
         results[build] = {}
-
-    # Analyze each benchmark
-    for benchmark in benchmarks:
-        print('\n' + benchmark)
-        benchmarkpath = os.path.join(benchmarkdir, benchmark)
-        files = os.listdir(benchmarkpath)
-        files = [i for i in files if i.find('disassembly') != -1]
-
-        # Get the RISC-V and Arm disassembly files available
-        rvfiles = [i for i in files if i[:i.index('_')].find('rv') != -1]
-        armfiles = [i for i in files if i[:i.index('_')].find('arm') != -1]
-
-        # Get the RISC-V and Arm builds available
-        rvbuilds = [i[:i.index('_')] for i in rvfiles]
-        armbuilds = [i[:i.index('_')] for i in armfiles]
-
-        # Locate the configuration file for this benchmark
-        masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
-
-        # Analyze each RISC-V build
-        for i in range(len(rvbuilds)):
-            build = rvbuilds[i]
-            # print('\t' + build)
-            rvfile = os.path.join(benchmarkpath, rvfiles[i])
-            rvoptfile = os.path.join(configdir, benchmark + '_' + build + '_function_selection.txt')
-            # Check if the config file for this build exists and create if not
-            optflag = os.path.exists(rvoptfile)
-            if not optflag:
-                config.create_subconfig(build, rvfile, rvoptfile, masteropt)
-            # Parse the RISC-V disassembly file for data only
-            #   (no individual benchmark workbook created)
-            res = riscv.scan_riscv_file_data(build, rvfile, rvoptfile)
-            # (size, reductions, pairs, instr, formats) = res
-            results[build][benchmark] = res
-
-        # Analyze each Arm build
-        for i in range(len(armbuilds)):
-            build = armbuilds[i]
-            # print('\t' + build)
-            armfile = os.path.join(benchmarkpath, armfiles[i])
-            armoptfile = os.path.join(configdir, benchmark + '_' + build + '_function_selection.txt')
-            # Check if the config file for this build exists and create if not
-            optflag = os.path.exists(armoptfile)
-            if not optflag:
-                config.create_subconfig(build, armfile, armoptfile, masteropt)
-            # Parse the Arm disassembly file for data only
-            #   (no individual benchmark workbook created)
-            res = arm.scan_arm_file_data(build, armfile, armoptfile)
-            results[build][benchmark] = res
-
-    # Record all benchmark results
-    summary_xlsx.record_all_main(results, benchmarks)
-    excel.close_workbook()
-    print('\nComplete! See Excel workbook: ')
-    print('\t' + output_file)
+    for (benchmark, build, arg) in tasks:
+        results[build][benchmark] = scans[(benchmark, build)]
+
+    try:
+        output_files = get_output_files(output_file, 'all_benchmarks_analysis.xlsx',
+                                        armbuilds, rvbuilds)
+        for ((rvbuild, armbuild), output_file) in output_files.items():
+            # Create the Excel workbook
+            if output_file is None:
+                output_file = 'all_benchmarks_analysis.xlsx'
+            if output_file[-5:] != '.xlsx':
+                output_file += '.xlsx'
+            output_file = os.path.join(outdir, output_file)
+            ctx = excel.WorkbookContext(output_file)
+
+            # Create Summary worksheet; set column sizes
+            sum_wksheet = summary_xlsx.create_summary(ctx, True)
+
+            # Add the main table to record individual benchmark totals
+            row = 18
+            col = 1
+            summary_xlsx.add_main_table(ctx, row, col, True)
+
+            # Add the totals table to record overall suite totals
+            row = 3
+            col = 1
+            summary_xlsx.add_totals_table(ctx, row, col, True, rvbuild, armbuild)
+
+            # Record all benchmark results
+            summary_xlsx.record_all_main(ctx, results, benchmarks)
+            ctx.close()
+            print('\nComplete! See Excel workbook: ')
+            print('\t' + output_file)
+    except BaseException:
+        # Left for the next run of the shards to create
+        if (shard is not None):
+            release_summary(shard)
+        raise
+    # The next run of the shards waits on all of them again
+    if (shard is not None):
+        remove_shards(shard)
+    return scans
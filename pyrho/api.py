@@ -0,0 +1,117 @@
+"""
+Library Interface
+
+Functions to analyze benchmarks from Python (e.g. from a regression harness),
+without the command line of main.py. The RVCX settings are those selected in
+constants.py, and the results, config and cache files are kept in results/ of
+the current directory, as for the command line.
+
+Nothing is printed, and the durations of the files scanned are kept with the
+result of each call (BenchmarkResult.durations) rather than in
+analyze.timings. Only the bounded caches of what was parsed are kept between
+calls (see parser.keep_table(), config.read_functions() and decoder.decoded).
+
+"""
+
+import os
+
+# local scripts
+from . import analyze
+
+
+class BenchmarkResult:
+    """
+    Code size data of a benchmark, for one RISC-V and one Arm build.
+
+    Attributes:
+        - benchmark
+            * Benchmark name
+        - rvbuild, armbuild
+            * Builds analyzed
+        - workbook
+            * Excel workbook created (None if data only)
+        - riscv
+            * (t_size, t_reductions, t_pairs, t_instr, t_formats) of the
+                RISC-V build, see riscv.scan_riscv_file_data()
+        - arm_size
+            * Code size (in bytes) of the Arm build
+        - durations
+            * Key: (benchmark, build) of the files scanned (not those
+                unchanged since a previous run)
+            * Val: (disassembly file, seconds)
+    """
+
+    def __init__(self, benchmark, rvbuild, armbuild, workbook, riscv,
+                 arm_size, durations=None):
+        self.benchmark = benchmark
+        self.rvbuild = rvbuild
+        self.armbuild = armbuild
+        self.workbook = workbook
+        self.riscv = riscv
+        self.arm_size = arm_size
+        self.durations = durations if (durations is not None) else {}
+
+    @property
+    def rv_size(self):
+        """ Code size (in bytes) of the RISC-V build. """
+        return self.riscv[0]
+
+    @property
+    def reductions(self):
+        """ Code size reduction (in bytes) of each RVCX instruction. """
+        return self.riscv[1]
+
+    def __repr__(self):
+        return 'BenchmarkResult(' + self.benchmark + ', ' + self.rvbuild \
+            + ': ' + str(self.rv_size) + ', ' + self.armbuild + ': ' \
+            + str(self.arm_size) + ')'
+
+
+def analyze_benchmark(path, rvbuild='rvgcc', armbuild='armcc', options=None):
+    """
+    Analyzes the RISC-V and Arm disassembly of a benchmark, with the functions
+    selected in its master configuration file (see config.create_configuration()).
+
+    Arguments:
+        path            Path to benchmark directory
+        rvbuild         RISC-V build to analyze (rvgcc, ...)
+        armbuild        Arm build to analyze (armcc, armclang, ...)
+        options         (optional) dictionary of:
+                            - 'workbook': True to create the Excel workbook
+                                (default: False, data only)
+                            - 'outfile': workbook name (implies 'workbook';
+                                default: [benchmark name]_analysis.xlsx)
+                            - 'jobs': number of worker processes
+                                (default: 1)
+
+    Returns a BenchmarkResult.
+    """
+    if options is None:
+        options = {}
+    outfile = options.get('outfile')
+    jobs = options.get('jobs', 1)
+    benchmark = os.path.basename(os.path.normpath(path))
+
+    # The functions to analyze must have been selected
+    configdir = os.path.join(os.getcwd(), 'results', 'config')
+    masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
+    if not os.path.exists(masteropt):
+        raise Exception('Unable to find the function selection file of ' + benchmark + ':\n\t' + masteropt + '\nPlease configure the benchmark and select function(s) to parse.')
+
+    durations = {}
+    if options.get('workbook', False) or (outfile is not None):
+        scans = analyze.single_benchmark(armbuild, rvbuild, path, outfile,
+                                         jobs, durations, verbose=False)
+        if outfile is None:
+            outfile = benchmark + '_analysis.xlsx'
+        if outfile[-5:] != '.xlsx':
+            outfile += '.xlsx'
+        workbook = os.path.join(os.getcwd(), 'results', outfile)
+    else:
+        scans = analyze.benchmark_data(armbuild, rvbuild, path, jobs,
+                                       durations)
+        workbook = None
+
+    return BenchmarkResult(benchmark, rvbuild, armbuild, workbook,
+                           scans[(benchmark, rvbuild)],
+                           scans[(benchmark, armbuild)], durations)
@@ -6,35 +6,38 @@ Author: Jennifer Hellar
 """
 
 
-import importlib
 import os
 
 # local scripts
-import excel
-import function_xlsx
-import config
-from constants import *
+from . import function_xlsx
+from . import config
+from .constants import *
 
 # import the class ParseRules from parser.py
-ParseRules = getattr(importlib.import_module('parser'), 'ParseRules')
+from .parser import ParseRules
 
 
-def scan_arm_file(compiler, assemblyfile, optfile):
+def read_arm_file(compiler, assemblyfile, optfile, jobs=1):
     """
-    Opens and scans the ARM disassembly file to extract data and save to Excel
-    workbook.
+    Opens and scans the ARM disassembly file to extract the instructions of
+    the selected functions, without writing them to the Excel workbook (see
+    record_arm_file()), so that the file can be scanned while the RISC-V file
+    is being recorded.
 
     Arguments:
         - compiler          Arm toolchain used to compile the benchmark
         - assemblyfile      Arm disassembly file
         - optfile           Arm config file; selects the functions to parse
+        - jobs              Number of worker processes to parse the file with
 
     Data:
-        - arm_results
-            * Key: function name
-            * Val: function code size (in bytes)
+        - arm_funcs
+            * List (in file order) of the selected functions
+            * Val: (function name, [list of instructions (addr, instr,
+                opcode, args, comments)], function code size (in bytes)),
+                including the instructions of its subfunctions
 
-    Returns: arm_results
+    Returns: arm_funcs
     """
     # Read the config file to know which functions to analyze
     func_opts = config.read_config(optfile)
@@ -44,79 +47,125 @@ def scan_arm_file(compiler, assemblyfile, optfile):
     if len(funcs_to_parse) == 0:
         raise Exception('Please select at least one function to parse in ' + optfile)
 
-    arm_results = {}
+    arm_funcs = []
     # arm_instr = {}
 
     # Configure the parser
-    parse_rules = ParseRules(compiler)
+    parse_rules = ParseRules(compiler, jobs)
 
     parsing = False
-    last_saved = False
     fcnt = 0    # function index
-    with open(assemblyfile, 'r') as f:
-        for line in f:
-            # Found the start of a new function
-            if parse_rules.is_func_start(line):
-                (fname, wname) = parse_rules.get_func_data(line)
-                nm, parse, subfunc = func_opts[fcnt]
-                fcnt += 1
-                if nm != fname:
-                    raise Exception('Error: function name does not match func_opts record')
-                # Done w/analysis of current function if the new function is not
-                #   a subfunction or not set to parse
-                if parsing and (not subfunc or not parse):
-                    # Record current function totals
-                    function_xlsx.record_arm_totals(wksheet,
-                                                    arm_results[func_name])
-                    last_saved = True
-                # Beginning a new function to analyze and not a subfunction
-                if parse and not subfunc:
-                    # Setup for the new function
-                    func_name = fname
-                    wksheet_name = wname
-                    wksheet = excel.wkbook.get_worksheet_by_name(wksheet_name)
-                    # Reset function variables
-                    arm_results[func_name] = 0
-                    # Start data recording in 'ARM M0+' table below the header
-                    row = excel.get_table_loc(ARM_TABLE)[0] + 3
-                    last_saved = False
-                    parsing = True
-                    continue
-                # Beginning to analyze a subfunction of the current function
-                elif parse and subfunc:
-                    parsing = True
-                    continue
-                # Beginning a function that is not selected to analyze
-                else:
-                    parsing = False
-                    continue
-            # Analyzing the current line (part of a selected function)
-            if parsing:
-                if parse_rules.is_skippable(line):
-                    continue
-                # Extract instr info from text and record in worksheet
-                res = parse_rules.scan_arm_instruction(line)
-                (addr, instr, bytes, opcode, args, comments) = res
-                function_xlsx.record_instruction(wksheet, compiler, row, addr,
-                                                 instr, opcode, args, comments)
-                arm_results[func_name] += bytes
-                # Increment to the next Excel wksheet row
-                row += 1
-                # # Increment the counnter for this instruction
-                # if (opcode in arm_instr.keys()):
-                #     arm_instr[opcode][0] += 1
-                #     arm_instr[opcode][1].append(args)
-                # else:
-                #     arm_instr[opcode] = [1, [args]]
+    lines = parse_rules.read_instructions(assemblyfile, func_opts)
+    for (line_type, line, ret) in lines:
+        # Found the start of a new function
+        if (line_type == FUNC_HEADER):
+            fname = parse_rules.get_func_name(line)
+            nm, parse, subfunc = func_opts[fcnt]
+            fcnt += 1
+            if nm != fname:
+                raise Exception('Error: function name does not match func_opts record')
+            # Beginning a new function to analyze and not a subfunction
+            if parse and not subfunc:
+                # Setup for the new function
+                instructions = []
+                arm_funcs.append([fname, instructions, 0])
+                parsing = True
                 continue
-    # Check that the last selected function's totals were saved to the wksheet
-    if not last_saved:
-        function_xlsx.record_arm_totals(wksheet, arm_results[func_name])
+            # Beginning to analyze a subfunction of the current function
+            elif parse and subfunc:
+                parsing = True
+                continue
+            # Beginning a function that is not selected to analyze
+            else:
+                parsing = False
+                continue
+        # Analyzing the current line (part of a selected function)
+        if parsing:
+            # Instr info extracted from text to record in worksheet
+            (addr, instr, bytes, opcode, args, comments) = ret
+            instructions.append((addr, instr, opcode, args, comments))
+            arm_funcs[-1][2] += bytes
+            # # Increment the counnter for this instruction
+            # if (opcode in arm_instr.keys()):
+            #     arm_instr[opcode][0] += 1
+            #     arm_instr[opcode][1].append(args)
+            # else:
+            #     arm_instr[opcode] = [1, [args]]
+            continue
+
+    return [tuple(func) for func in arm_funcs]
+
+
+def record_arm_file(ctx, compiler, arm_funcs):
+    """
+    Records the functions extracted by read_arm_file() to the Excel workbook,
+    in the worksheets of the RISC-V functions (see
+    excel.WorkbookContext.wksheet_names).
+
+    Arguments:
+        - ctx               Excel workbook (see excel.WorkbookContext)
+        - compiler          Arm toolchain used to compile the benchmark
+        - arm_funcs         Functions extracted (see read_arm_file())
+
+    Data:
+        - arm_results
+            * Key: function name
+            * Val: function code size (in bytes)
+
+    Returns: arm_results
+    """
+    arm_results = {}
+    for (func_name, instructions, f_size) in arm_funcs:
+        wksheet_name = ctx.wksheet_names.get(func_name)
+        wksheet = ctx.wkbook.get_worksheet_by_name(wksheet_name)
+        # Start data recording in 'ARM M0+' table below the header
+        row = ctx.get_table_loc(ARM_TABLE)[0] + 3
+        for (addr, instr, opcode, args, comments) in instructions:
+            function_xlsx.record_instruction(ctx, wksheet, compiler, row,
+                                             addr, instr, opcode, args,
+                                             comments)
+            # Increment to the next Excel wksheet row
+            row += 1
+        # Record current function totals
+        arm_results[func_name] = f_size
+        function_xlsx.record_arm_totals(ctx, wksheet, f_size)
 
     return arm_results
 
 
-def scan_arm_file_data(compiler, assemblyfile, optfile):
+def scan_arm_file(ctx, compiler, assemblyfile, optfile, jobs=1):
+    """
+    Opens and scans the ARM disassembly file to extract data and save to Excel
+    workbook (see read_arm_file() and record_arm_file()).
+
+    Arguments:
+        - ctx               Excel workbook (see excel.WorkbookContext)
+        - compiler          Arm toolchain used to compile the benchmark
+        - assemblyfile      Arm disassembly file
+        - optfile           Arm config file; selects the functions to parse
+        - jobs              Number of worker processes to parse the file with
+
+    Returns: arm_results (see record_arm_file())
+    """
+    arm_funcs = read_arm_file(compiler, assemblyfile, optfile, jobs)
+    return record_arm_file(ctx, compiler, arm_funcs)
+
+
+def get_data_results(arm_results):
+    """
+    Converts the results of scan_arm_file() to the results returned by
+    scan_arm_file_data(), so that a file scanned for its workbook does not
+    need to be scanned again for data only.
+
+    Returns: t_size
+    """
+    t_size = 0
+    for func in arm_results.keys():
+        t_size += arm_results[func]
+    return t_size
+
+
+def scan_arm_file_data(compiler, assemblyfile, optfile, jobs=1):
     """
     Opens and scans the ARM disassembly file to extract data.
 
@@ -124,6 +173,7 @@ def scan_arm_file_data(compiler, assemblyfile, optfile):
         - compiler          Arm toolchain used to compile the benchmark
         - assemblyfile      Arm disassembly file
         - optfile           Arm config file; selects the functions to parse
+        - jobs              Number of worker processes to parse the file with
 
     Data:
         - t_size: cumulative function code size (in bytes)
@@ -139,54 +189,24 @@ def scan_arm_file_data(compiler, assemblyfile, optfile):
         raise Exception('Please select at least one function to parse in ' + optfile)
 
     arm_results = {}
-    # arm_instr = {}
 
     # Configure the parser
-    parse_rules = ParseRules(compiler)
-
-    parsing = False
-    fcnt = 0    # function index
-    with open(assemblyfile, 'r') as f:
-        for line in f:
-            # Found the start of a new function
-            if parse_rules.is_func_start(line):
-                (fname, wname) = parse_rules.get_func_data(line)
-                nm, parse, subfunc = func_opts[fcnt]
-                fcnt += 1
-                if nm != fname:
-                    raise Exception('Error: function name does not match func_opts record')
-                # Done w/analysis of current function if the new function is not
-                #   a subfunction or not set to parse
-                if parse and not subfunc:
-                    # Setup for the new function
-                    func_name = fname
-                    # Reset function variables
-                    arm_results[func_name] = 0
-                    parsing = True
-                    continue
-                # Beginning to analyze a subfunction of the current function
-                elif parse and subfunc:
-                    parsing = True
-                    continue
-                # Beginning a function that is not selected to analyze
-                else:
-                    parsing = False
-                    continue
-            # Analyzing the current line (part of a selected function)
-            if parsing:
-                if parse_rules.is_skippable(line):
-                    continue
-                # Extract instr info from text
-                res = parse_rules.scan_arm_instruction(line)
-                (addr, instr, bytes, opcode, args, comments) = res
-                arm_results[func_name] += bytes
-                # # Increment the counnter for this instruction
-                # if (opcode in arm_instr.keys()):
-                #     arm_instr[opcode][0] += 1
-                #     arm_instr[opcode][1].append(args)
-                # else:
-                #     arm_instr[opcode] = [1, [args]]
-                continue
+    parse_rules = ParseRules(compiler, jobs)
+
+    # Parse the selected functions into a table of instructions
+    (headers, table) = parse_rules.read_table(assemblyfile, func_opts)
+    for fcnt in range(len(headers)):
+        (fname, wname) = parse_rules.get_func_data(headers[fcnt])
+        nm, parse, subfunc = func_opts[fcnt]
+        if nm != fname:
+            raise Exception('Error: function name does not match func_opts record')
+        # Beginning a new function to analyze and not a subfunction
+        if parse and not subfunc:
+            func_name = fname
+            arm_results[func_name] = 0
+        # Add the instruction sizes of the function (or subfunction)
+        if parse:
+            arm_results[func_name] += table.func_size(fcnt)
 
     # Add up the function sizes for the whole benchmark
     t_size = 0
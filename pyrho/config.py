@@ -6,14 +6,50 @@ Author: Jennifer Hellar
 """
 
 
-import importlib
+import json
 import os
 import re
 
-from constants import save_restore_en
+from .constants import save_restore_en
+from .constants import FUNC_HEADER
 
-# import the class ParseRules from parser.py
-ParseRules = getattr(importlib.import_module('parser'), 'ParseRules')
+# import the class ParseRules and the pool of worker processes from parser.py
+from .parser import ParseRules
+from .parser import process_pool
+
+
+# Function headers read from the disassembly files during this run, only of
+#   the latest version of each file
+#   Key: (compiler, disassembly filename)
+#   Val: (size, modification time, list of (function name, worksheet name)),
+#       see read_functions()
+functions = {}
+
+# Header line of the configuration files
+HEADER = '{:<50}{:<30}{:<30}\n'.format('function', 'parse (Y/N)',
+                                      'sub-function (Y/N)')
+
+
+def read_functions(compiler, assemblyfile):
+    """
+    Reads the function headers of a disassembly file, only once per run for
+    the master and sub-configuration files of the same file.
+
+    Returns a list (in file order) of (function name, worksheet name).
+    """
+    stat = os.stat(assemblyfile)
+    key = (compiler, os.path.abspath(assemblyfile))
+    version = (stat.st_size, stat.st_mtime_ns)
+    if (functions.get(key, (None, None))[:2] != version):
+        # Configure the parser
+        parse_rules = ParseRules(compiler)
+        funcs = []
+        for line in parse_rules.read_lines(assemblyfile, {}):
+            # Found the beginning of a function section
+            if (parse_rules.classify_line(line) == FUNC_HEADER):
+                funcs.append(parse_rules.get_func_data(line))
+        functions[key] = version + (funcs,)
+    return functions[key][2]
 
 
 def create_config(compiler, assemblyfile, optfile):
@@ -26,35 +62,27 @@ def create_config(compiler, assemblyfile, optfile):
         assemblyfile    disassembly file to parse for function names
         optfile         full filepath for output config file
     """
-    # Configure the parser
-    parse_rules = ParseRules(compiler)
-
-    # Write out the header
-    with open(optfile, 'w') as optf:
-        optf.write('{:<50}{:<30}{:<30}\n'.format('function', 'parse (Y/N)', 'sub-function (Y/N)'))
-
-    # Open the appropriate text file
-    with open(assemblyfile, 'r') as f:
-        for line in f:
-            # Found the beginning of a function section
-            if parse_rules.is_func_start(line):
-                (func_name, wksheet_name) = parse_rules.get_func_data(line)
-                sr_flag = save_restore_en \
-                        and (wksheet_name.find('__riscv_save') != -1 or \
-                             wksheet_name.find('__riscv_restore') != -1)
-                if sr_flag:
-                    parse = 'Y'
-                else:
-                    # By default, mark all functions as not selected to analyze
-                    parse = 'N'
-                # Sometimes, armclang puts code in subfunctions
-                if (compiler == 'armclang') and func_name.find('__arm_cp.') != -1:
-                    subfunc = 'Y'
-                else:
-                    subfunc = 'N'
-                # Write out the default options for this function
-                with open(optfile, 'a') as optf:
-                    optf.write('{:<50}{:<30}{:<30}\n'.format(func_name, parse, subfunc))
+    # Write out the header, then the default options of each function
+    #   (to a temporary file first, see create_subconfig())
+    tmpfile = optfile + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpfile, 'w') as optf:
+        optf.write(HEADER)
+        for (func_name, wksheet_name) in read_functions(compiler, assemblyfile):
+            sr_flag = save_restore_en \
+                    and (wksheet_name.find('__riscv_save') != -1 or \
+                         wksheet_name.find('__riscv_restore') != -1)
+            if sr_flag:
+                parse = 'Y'
+            else:
+                # By default, mark all functions as not selected to analyze
+                parse = 'N'
+            # Sometimes, armclang puts code in subfunctions
+            if (compiler == 'armclang') and func_name.find('__arm_cp.') != -1:
+                subfunc = 'Y'
+            else:
+                subfunc = 'N'
+            optf.write('{:<50}{:<30}{:<30}\n'.format(func_name, parse, subfunc))
+    os.replace(tmpfile, optfile)
 
     return
 
@@ -70,44 +98,100 @@ def create_subconfig(compiler, assemblyfile, optfile, masteropt):
         optfile         full filepath for output config file
         masteropt       master config file, edited by the user
     """
-    # Configure the parser
-    parse_rules = ParseRules(compiler)
-
-    # Write out the header
-    with open(optfile, 'w') as optf:
-        optf.write('{:<50}{:<30}{:<30}\n'.format('function', 'parse (Y/N)', 'sub-function (Y/N)'))
-
     # Read the master config file and get a list of user-selected functions
     opts = read_config(masteropt)
-    funcs_to_parse = [opts[i][0] for i in opts.keys() if opts[i][1]]
+    funcs_to_parse = set([opts[i][0] for i in opts.keys() if opts[i][1]])
 
     parse = 'N'
 
-    # Open the appropriate text file
-    with open(assemblyfile, 'r') as f:
-        for line in f:
-            # Found the beginning of a function section
-            if parse_rules.is_func_start(line):
-                (func_name, wksheet_name) = parse_rules.get_func_data(line)
-                # Sometimes, armclang puts code in subfunctions
-                if (compiler == 'armclang') and func_name.find('__arm_cp.') != -1:
-                    subfunc = 'Y'
-                else:
-                    subfunc = 'N'
-                # If this function selected, or previous function selected and
-                #   current is a subfunction, then want to analyze it
-                if (func_name in funcs_to_parse) \
-                    or (parse == 'Y' and subfunc == 'Y'):
-                    parse = 'Y'
-                else:
-                    parse = 'N'
-                # Write out the options for this function
-                with open(optfile, 'a') as optf:
-                    optf.write('{:<50}{:<30}{:<30}\n'.format(func_name, parse, subfunc))
+    # Write out the header, then the options of each function, to a temporary
+    #   file first so that no other process (e.g. another shard, see
+    #   analyze.shard_tasks()) reads it half-written
+    tmpfile = optfile + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpfile, 'w') as optf:
+        optf.write(HEADER)
+        for (func_name, wksheet_name) in read_functions(compiler, assemblyfile):
+            # Sometimes, armclang puts code in subfunctions
+            if (compiler == 'armclang') and func_name.find('__arm_cp.') != -1:
+                subfunc = 'Y'
+            else:
+                subfunc = 'N'
+            # If this function selected, or previous function selected and
+            #   current is a subfunction, then want to analyze it
+            if (func_name in funcs_to_parse) \
+                or (parse == 'Y' and subfunc == 'Y'):
+                parse = 'Y'
+            else:
+                parse = 'N'
+            optf.write('{:<50}{:<30}{:<30}\n'.format(func_name, parse, subfunc))
+    os.replace(tmpfile, optfile)
 
     return
 
 
+def get_sources(compiler, assemblyfile, masteropt):
+    """
+    Returns the hashes of the master config file and the disassembly file which
+    a sub-configuration file is created from.
+    """
+    parse_rules = ParseRules(compiler)
+    return {'master': parse_rules.hash_file(masteropt),
+            'disassembly': parse_rules.get_hash(assemblyfile)}
+
+
+def get_sources_file(optfile):
+    """
+    Returns the filename recording the sources of a sub-configuration file (see
+    update_subconfig()).
+    """
+    return os.path.join(os.path.dirname(optfile),
+                        '.' + os.path.basename(optfile) + '.json')
+
+
+def update_subconfig(compiler, assemblyfile, optfile, masteropt):
+    """
+    Creates the sub-configuration file (see create_subconfig()) if it does not
+    exist, or if the master config file or the disassembly file have changed
+    since it was created.
+
+    Returns True if the sub-configuration file was (re)created.
+    """
+    sources = get_sources(compiler, assemblyfile, masteropt)
+    sourcesfile = get_sources_file(optfile)
+    if os.path.exists(optfile) and os.path.exists(sourcesfile):
+        with open(sourcesfile, 'r') as f:
+            try:
+                if (json.load(f) == sources):
+                    return False
+            except ValueError:
+                pass
+    create_subconfig(compiler, assemblyfile, optfile, masteropt)
+    tmpfile = sourcesfile + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpfile, 'w') as f:
+        json.dump(sources, f)
+    os.replace(tmpfile, sourcesfile)
+    return True
+
+
+def update_subconfigs(subconfigs, jobs=1):
+    """
+    Updates sub-configuration files (see update_subconfig()), one per worker
+    process with more than one job.
+
+    Arguments:
+        subconfigs      list of (compiler, assemblyfile, optfile, masteropt)
+        jobs            number of worker processes
+
+    Returns a list of the sub-configuration files which were (re)created.
+    """
+    if (jobs > 1) and (len(subconfigs) > 1):
+        with process_pool(jobs) as pool:
+            done = list(pool.map(update_subconfig, *zip(*subconfigs)))
+    else:
+        done = [update_subconfig(*args) for args in subconfigs]
+    return [args[2] for (args, created) in zip(subconfigs, done) if created]
+
+
 def read_config(optfile):
     """
     Reads a configuration file.
@@ -145,6 +229,29 @@ def read_config(optfile):
     return opts
 
 
+def get_wksheet_names(compiler, optfile):
+    """
+    Reads the functions selected in a RISC-V configuration file.
+
+    Arguments:
+        compiler        RISC-V build of the config file
+        optfile         full filepath for the config file
+
+    Returns:
+        wksheet_names: dictionary of worksheet names
+            * Key: function name (selected to analyze, not a subfunction)
+            * Value: worksheet name (see ParseRules.get_wksheet_name())
+    """
+    parse_rules = ParseRules(compiler)
+    opts = read_config(optfile)
+    wksheet_names = {}
+    for i in opts.keys():
+        func_name, parse, subfunc = opts[i]
+        if parse and not subfunc:
+            wksheet_names[func_name] = parse_rules.get_wksheet_name(func_name)
+    return wksheet_names
+
+
 def create_configuration(benchmarkpath):
     """
     Creates the default master configuration file for the input benchmark (must
@@ -176,20 +283,29 @@ def create_configuration(benchmarkpath):
     create_config('rvgcc', assemblyfile, masteropt)
 
 
-def create_configurations(benchmarkdir):
+def create_configurations(benchmarkdir, jobs=1, benchmarks=None):
     """
     Creates the default master configuration files for all of the benchmarks in
-    subdirectories of the input parent directory.
+    subdirectories of the input parent directory, one per worker process with
+    more than one job.
 
     Arguments:
         benchmarkdir       full dirpath of benchmark parent directory
+        jobs               number of worker processes
+        benchmarks         (optional) subdirectories to create them for
     """
     # Get list of benchmarks as subdirectories of provides parent dir
-    filedirs = os.listdir(benchmarkdir)
-    benchmarks = [f for f in filedirs if os.path.isdir(os.path.join(benchmarkdir, f))]
+    if benchmarks is None:
+        filedirs = os.listdir(benchmarkdir)
+        benchmarks = [f for f in filedirs if os.path.isdir(os.path.join(benchmarkdir, f))]
 
     # Create the master config file for each benchmark
+    paths = [os.path.join(benchmarkdir, benchmark) for benchmark in benchmarks]
     for benchmark in benchmarks:
         print(benchmark)
-        benchmarkpath = os.path.join(benchmarkdir, benchmark)
-        create_configuration(benchmarkpath)
+    if (jobs > 1) and (len(paths) > 1):
+        with process_pool(jobs) as pool:
+            list(pool.map(create_configuration, paths))
+    else:
+        for benchmarkpath in paths:
+            create_configuration(benchmarkpath)
@@ -13,6 +13,50 @@ BENCHMARKS = ['fir_filter', 'waterman',
     'qrduino', 'sglib_combined', 'slre', 'st', 'statemate', 'ud', 'wikisort']
 BUILDS = ['rvgcc', 'armcc', 'armclang', 'armgcc']
 
+""" Disassembly File Reading Options """
+# Search memory-mapped files as bytes, decoding only the selected functions
+mmap_en = True
+# Save an index of the functions in each file to results/.index, so that only
+#   the selected functions have to be read
+index_en = True
+# Save the parsed instructions of each file to results/.cache, so that repeat
+#   runs do not need to parse them again
+cache_en = True
+# Read the disassembly files to scan on background threads, at most
+#   PREFETCH_DEPTH files ahead of the parser, so that reading them (e.g. from a
+#   network file system) overlaps with parsing (see analyze.Prefetcher)
+prefetch_en = True
+PREFETCH_DEPTH = 4
+# Memory (in MB) of the instruction tables kept in memory by a run (or by each
+#   worker of the server, see serve.py), least recently used first evicted
+CACHE_MEMORY = 1024
+# Number of machine codes whose decoded instructions are kept in memory (see
+#   decoder.py), all evicted at once when full
+DECODE_CACHE_SIZE = 1 << 18
+# Save the data results of each benchmark build to results/.manifest (with the
+#   hashes of its disassembly and config files and of the RVCX settings), so
+#   that --all only analyzes the builds whose inputs changed
+manifest_en = True
+
+""" Workbook Writing Options """
+# Write the worksheets of each RISC-V function on a background thread while
+#   the next functions are scanned, with at most PIPELINE_DEPTH functions
+#   waiting to be written
+pipeline_en = True
+PIPELINE_DEPTH = 8
+
+""" Server and Watch Options """
+# Worker processes kept running by the server (see serve.py), one for each
+#   combination of RVCX settings requested, least recently used first stopped
+SERVE_WORKERS = 4
+# Seconds between the polls of the benchmark files by --watch (see watch.py)
+WATCH_INTERVAL = 1.0
+
+# Line types returned by ParseRules.classify_line()
+FUNC_HEADER = 0
+SKIP = 1
+INSTRUCTION = 2
+
 """ Enable Desired Compact Instructions """
 lwpc_en = ('cx.lwpc', True)
 
@@ -10,12 +10,24 @@ Author: Jennifer Hellar
 """
 
 import math
-# Enabled replacement instructions
-from constants import ENABLED
-# Allowed src/dest registers for custom compressed instructions
-from constants import REG_LIST
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-from constants import IGNORE_REGS
+from . import decoder
+from . import symbols
+# Enabled replacement instructions (bitset of ENABLED)
+from .symbols import is_enabled
+# Allowed src/dest registers for custom compressed instructions (bitset of
+#   REG_LIST)
+from .symbols import in_reg_list
+
+from .constants import IGNORE_REGS
+
+# Opcodes of the 32-bit instructions which check_replaceable() checks
+REPLACEABLE = frozenset(['lw', 'sb', 'sh', 'lbu', 'lhu', 'lb', 'lh', 'sw', 'j',
+                         'jal', 'bne', 'beq', 'blt', 'bge', 'addi', 'slli'])
 
 
 def get_regs_and_offset(opcode, args):
@@ -105,21 +117,32 @@ def is_lw_replaceable(args, curr_max, curr_min):
     res = False
     (rd, rs1, offset) = get_regs_and_offset('lw', args)
     # Check registers
-    if (rs1 == 'gp') and (IGNORE_REGS or rd in REG_LIST):
+    if (rs1 == 'gp') and (IGNORE_REGS or in_reg_list(rd)):
         res = True
         # Update offsets
         if (offset.find('0x') != -1):
             offset = int(offset, 16)
         offset = abs(int(offset))
-        if(offset > curr_max):
-            curr_max = offset
-            if (curr_min == float("inf")):
-                curr_min = curr_max
-        elif (offset < curr_min):
-            curr_min = offset
+        (curr_max, curr_min) = update_offsets(offset, curr_max, curr_min)
     return (res, (rd, rs1, offset), curr_max, curr_min)
 
 
+def update_offsets(offset, curr_max, curr_min):
+    """
+    Updates the current max/min LW offset values with the (absolute) offset of
+    a replaceable LW instruction.
+
+    Returns a tuple of the updated (curr_max, curr_min).
+    """
+    if(offset > curr_max):
+        curr_max = offset
+        if (curr_min == float("inf")):
+            curr_min = curr_max
+    elif (offset < curr_min):
+        curr_min = offset
+    return (curr_max, curr_min)
+
+
 def is_sb_replaceable(args):
     """
     Checks if a 32-bit SB instruction can be replaced with a 16-bit SB.
@@ -132,16 +155,16 @@ def is_sb_replaceable(args):
     res = False
     type_code = ''
     (rs2, rs1, offset) = get_regs_and_offset('sb', args)
-    regs_okay = IGNORE_REGS or ((rs1 in REG_LIST) and (rs2 in REG_LIST))
+    regs_okay = IGNORE_REGS or (in_reg_list(rs1) and in_reg_list(rs2))
     if (offset.find('0x') != -1):
         offset = int(offset, 16)
     offset_okay = (abs(int(offset)) < 32) and (int(offset) >= 0)
     # Check registers, offset, and compressed instruction ENABLED
-    if (regs_okay) and (offset_okay) and ('cx.sb' in ENABLED):
+    if (regs_okay) and (offset_okay) and is_enabled('cx.sb'):
         res = True
         type_code = 'cx.sb'
-    elif (IGNORE_REGS or rs1 in REG_LIST) and (rs2 == 'zero') and \
-            (offset_okay) and ('cx.sbzero' in ENABLED):
+    elif (IGNORE_REGS or in_reg_list(rs1)) and (rs2 == 'zero') and \
+            (offset_okay) and is_enabled('cx.sbzero'):
         res = True
         type_code = 'cx.sbzero'
     return (res, (rs2, rs1, offset), type_code)
@@ -159,15 +182,15 @@ def is_sh_replaceable(args):
     res = False
     type_code = ''
     (rs2, rs1, offset) = get_regs_and_offset('sh', args)
-    regs_okay = IGNORE_REGS or ((rs1 in REG_LIST) and (rs2 in REG_LIST))
+    regs_okay = IGNORE_REGS or (in_reg_list(rs1) and in_reg_list(rs2))
     if (offset.find('0x') != -1):
         offset = int(offset, 16)
     offset_okay = (abs(int(offset)) < 64) and (int(offset) >= 0)
-    if (regs_okay) and (offset_okay) and ('cx.sh' in ENABLED):
+    if (regs_okay) and (offset_okay) and is_enabled('cx.sh'):
         res = True
         type_code = 'cx.sh'
-    elif (IGNORE_REGS or rs1 in REG_LIST) and (rs2 == 'zero') and \
-            (offset_okay) and ('cx.shzero' in ENABLED):
+    elif (IGNORE_REGS or in_reg_list(rs1)) and (rs2 == 'zero') and \
+            (offset_okay) and is_enabled('cx.shzero'):
         res = True
         type_code = 'cx.shzero'
     return (res, (rs2, rs1, offset), type_code)
@@ -185,7 +208,7 @@ def is_lbu_replaceable(args):
     res = False
     type_code = ''
     (rd, rs1, offset) = get_regs_and_offset('lbu', args)
-    regs_okay = IGNORE_REGS or ((rs1 in REG_LIST) and (rd in REG_LIST))
+    regs_okay = IGNORE_REGS or (in_reg_list(rs1) and in_reg_list(rd))
     if (offset.find('0x') != -1):
         offset = int(offset, 16)
     offset_okay = (abs(int(offset)) < 32) and (int(offset) >= 0)
@@ -207,7 +230,7 @@ def is_lhu_replaceable(args):
     res = False
     type_code = ''
     (rd, rs1, offset) = get_regs_and_offset('lhu', args)
-    regs_okay = IGNORE_REGS or ((rs1 in REG_LIST) and (rd in REG_LIST))
+    regs_okay = IGNORE_REGS or (in_reg_list(rs1) and in_reg_list(rd))
     if (offset.find('0x') != -1):
         offset = int(offset, 16)
     offset_okay = (abs(int(offset)) < 64) and (int(offset) >= 0)
@@ -229,7 +252,7 @@ def is_lb_replaceable(args):
     res = False
     type_code = ''
     (rd, rs1, offset) = get_regs_and_offset('lb', args)
-    regs_okay = IGNORE_REGS or ((rs1 in REG_LIST) and (rd in REG_LIST))
+    regs_okay = IGNORE_REGS or (in_reg_list(rs1) and in_reg_list(rd))
     if (offset.find('0x') != -1):
         offset = int(offset, 16)
     offset_okay = (abs(int(offset)) < 32) and (int(offset) >= 0)
@@ -251,7 +274,7 @@ def is_lh_replaceable(args):
     res = False
     type_code = ''
     (rd, rs1, offset) = get_regs_and_offset('lh', args)
-    regs_okay = IGNORE_REGS or ((rs1 in REG_LIST) and (rd in REG_LIST))
+    regs_okay = IGNORE_REGS or (in_reg_list(rs1) and in_reg_list(rd))
     if (offset.find('0x') != -1):
         offset = int(offset, 16)
     offset_okay = (abs(int(offset)) < 64) and (int(offset) >= 0)
@@ -278,21 +301,21 @@ def is_addi_replaceable(args, addr):
     else:
         imm = int(offset)
     if (imm < 0):    # subi
-        if (rd == rs1) and (IGNORE_REGS or (rd in REG_LIST)) and \
-                (imm > -256) and ('cx.subi8' in ENABLED):
+        if (rd == rs1) and (IGNORE_REGS or in_reg_list(rd)) and \
+                (imm > -256) and is_enabled('cx.subi8'):
             res = True
             type_code = 'cx.subi8'
-        elif (IGNORE_REGS or (rd in REG_LIST and rs1 in REG_LIST)) and \
-                (imm > -32) and ('cx.subi5' in ENABLED):
+        elif (IGNORE_REGS or (in_reg_list(rd) and in_reg_list(rs1))) and \
+                (imm > -32) and is_enabled('cx.subi5'):
             res = True
             type_code = 'cx.subi5'
     else:   # addi
-        if (rd == rs1) and (IGNORE_REGS or (rd in REG_LIST)) and \
-                (imm < 256) and ('cx.addi8' in ENABLED):
+        if (rd == rs1) and (IGNORE_REGS or in_reg_list(rd)) and \
+                (imm < 256) and is_enabled('cx.addi8'):
             res = True
             type_code = 'cx.addi8'
-        elif (IGNORE_REGS or (rd in REG_LIST and rs1 in REG_LIST)) and \
-                (imm < 32) and ('cx.addi5' in ENABLED):
+        elif (IGNORE_REGS or (in_reg_list(rd) and in_reg_list(rs1))) and \
+                (imm < 32) and is_enabled('cx.addi5'):
             res = True
             type_code = 'cx.addi5'
     return (res, (rd, rs1, offset), type_code)
@@ -315,12 +338,12 @@ def is_c_addi_replaceable(args, addr):
     else:
         imm = int(offset)
     if (imm < 0):    # subi
-        if ('cx.subi8' in ENABLED) and (IGNORE_REGS or rd in REG_LIST):
+        if is_enabled('cx.subi8') and (IGNORE_REGS or in_reg_list(rd)):
             if (imm > -256):
                 res = True
                 type_code = 'cx.subi8'
     else:            # addi
-        if ('cx.addi5' in ENABLED) and (IGNORE_REGS or rd in REG_LIST):
+        if is_enabled('cx.addi5') and (IGNORE_REGS or in_reg_list(rd)):
             if (imm < 256):
                 res = True
                 type_code = 'cx.addi8'
@@ -343,7 +366,7 @@ def is_slli_replaceable(args, addr):
         imm = int(offset, 16)
     else:
         imm = int(offset)
-    if (IGNORE_REGS or (rd in REG_LIST and rs1 in REG_LIST)) and (imm < 32):
+    if (IGNORE_REGS or (in_reg_list(rd) and in_reg_list(rs1))) and (imm < 32):
         res = True
         type_code = 'cx.slli'
     return (res, (rd, rs1, offset), type_code)
@@ -361,12 +384,12 @@ def is_sw_replaceable(args):
     res = False
     type_code = ''
     (rs2, rs1, offset) = get_regs_and_offset('sh', args)
-    regs_okay = (rs1 in REG_LIST)
+    regs_okay = in_reg_list(rs1)
     if (offset.find('0x') != -1):
         offset = int(offset, 16)
     offset_okay = (abs(int(offset)) < 128) and (int(offset) >= 0)
     if (regs_okay) and (rs2 == 'zero') and (offset_okay)\
-            and ('cx.swzero' in ENABLED):
+            and is_enabled('cx.swzero'):
         res = True
         type_code = 'cx.swzero'
     return (res, (rs2, rs1, offset), type_code)
@@ -388,7 +411,7 @@ def is_j_replaceable(args, comments):
     res = False
     type_code = ''
     (rs2, rs1, offset) = get_regs_and_offset('j', args)
-    if 'pop (restore)' in ENABLED:
+    if is_enabled('pop (restore)'):
         if (comments is None):
             if (offset.find('_restore') != -1):
                 res = True
@@ -398,7 +421,7 @@ def is_j_replaceable(args, comments):
             # pass along the exact function being called
             offset = comments.strip('<>')
             type_code = 'pop (restore)'
-    elif 'c.j (restore)' in ENABLED:
+    elif is_enabled('c.j (restore)'):
         if (comments is None):
             if (offset.find('_restore') != -1):
                 res = True
@@ -427,7 +450,7 @@ def is_jal_replaceable(args, comments):
     res = False
     type_code = ''
     (rs2, rs1, offset) = get_regs_and_offset('jal', args)
-    if ('push (save)' in ENABLED):
+    if is_enabled('push (save)'):
         if (comments is None):
             if (offset.find('_save') != -1):
                 res = True
@@ -437,7 +460,7 @@ def is_jal_replaceable(args, comments):
             # pass along the exact function being called
             offset = comments.strip('<>')
             type_code = 'push (save)'
-    elif ('c.jal (save)' in ENABLED):
+    elif is_enabled('c.jal (save)'):
         if (comments is None):
             if (offset.find('_save') != -1):
                 res = True
@@ -453,7 +476,7 @@ def is_bne_replaceable(args, addr):
     res = False
     type_code = ''
     (rs2, rs1, offset) = get_regs_and_offset('bne', args)
-    if ('cx.bne' in ENABLED):
+    if is_enabled('cx.bne'):
         res = True
         type_code = 'cx.bne'
     return (res, (rs2, rs1, offset), type_code)
@@ -463,7 +486,7 @@ def is_blt_replaceable(args, addr):
     res = False
     type_code = ''
     (rs2, rs1, offset) = get_regs_and_offset('blt', args)
-    if ('cx.blt' in ENABLED):
+    if is_enabled('cx.blt'):
         res = True
         type_code = 'cx.blt'
     return (res, (rs2, rs1, offset), type_code)
@@ -473,7 +496,7 @@ def is_bge_replaceable(args, addr):
     res = False
     type_code = ''
     (rs2, rs1, offset) = get_regs_and_offset('bge', args)
-    if ('cx.bge' in ENABLED):
+    if is_enabled('cx.bge'):
         res = True
         type_code = 'cx.bge'
     return (res, (rs2, rs1, offset), type_code)
@@ -493,48 +516,202 @@ def check_replaceable(opcode, args, comments, curr_max, curr_min, addr):
     res = False
     type_code = ''
     (r2, r1, offset) = (0, 0, 0)
-    if (opcode == 'lw') and ('cx.lwpc' in ENABLED):
+    if (opcode == 'lw') and is_enabled('cx.lwpc'):
         res = is_lw_replaceable(args, curr_max, curr_min)
         (res, (r2, r1, offset), curr_max, curr_min) = res
         if (res):
             type_code = 'cx.lwpc'
-    if (opcode == 'sb') and ('cx.sb' in ENABLED or 'cx.sbzero' in ENABLED):
+    if (opcode == 'sb') and (is_enabled('cx.sb') or is_enabled('cx.sbzero')):
         (res, (r2, r1, offset), type_code) = is_sb_replaceable(args)
-    if (opcode == 'sh') and ('cx.sh' in ENABLED or 'cx.shzero' in ENABLED):
+    if (opcode == 'sh') and (is_enabled('cx.sh') or is_enabled('cx.shzero')):
         (res, (r2, r1, offset), type_code) = is_sh_replaceable(args)
-    if (opcode == 'lbu') and ('cx.lbu' in ENABLED):
+    if (opcode == 'lbu') and is_enabled('cx.lbu'):
         (res, (r2, r1, offset), type_code) = is_lbu_replaceable(args)
-    if (opcode == 'lhu') and ('cx.lhu' in ENABLED):
+    if (opcode == 'lhu') and is_enabled('cx.lhu'):
         (res, (r2, r1, offset), type_code) = is_lhu_replaceable(args)
-    if (opcode == 'lb') and ('cx.lb' in ENABLED):
+    if (opcode == 'lb') and is_enabled('cx.lb'):
         (res, (r2, r1, offset), type_code) = is_lb_replaceable(args)
-    if (opcode == 'lh') and ('cx.lh' in ENABLED):
+    if (opcode == 'lh') and is_enabled('cx.lh'):
         (res, (r2, r1, offset), type_code) = is_lh_replaceable(args)
-    if (opcode == 'sw') and ('cx.swzero' in ENABLED):
+    if (opcode == 'sw') and is_enabled('cx.swzero'):
         (res, (r2, r1, offset), type_code) = is_sw_replaceable(args)
     if (opcode == 'j') and \
-            (('c.j (restore)' in ENABLED) or ('pop (restore)' in ENABLED)):
+            (is_enabled('c.j (restore)') or is_enabled('pop (restore)')):
         (res, (r2, r1, offset), type_code) = is_j_replaceable(args, comments)
     if (opcode == 'jal') and \
-            (('c.jal (save)' in ENABLED) or ('push (save)' in ENABLED)):
+            (is_enabled('c.jal (save)') or is_enabled('push (save)')):
         (res, (r2, r1, offset), type_code) = is_jal_replaceable(args, comments)
-    if (opcode == 'bne') and ('cx.bne' in ENABLED):
+    if (opcode == 'bne') and is_enabled('cx.bne'):
         (res, (r2, r1, offset), type_code) = is_bne_replaceable(args, addr)
-    if (opcode == 'beq') and ('cx.beq' in ENABLED):
+    if (opcode == 'beq') and is_enabled('cx.beq'):
         (res, (r2, r1, offset), type_code) = is_beq_replaceable(args, addr)
-    if (opcode == 'blt') and ('cx.blt' in ENABLED):
+    if (opcode == 'blt') and is_enabled('cx.blt'):
         (res, (r2, r1, offset), type_code) = is_blt_replaceable(args, addr)
-    if (opcode == 'bge') and ('cx.bge' in ENABLED):
+    if (opcode == 'bge') and is_enabled('cx.bge'):
         (res, (r2, r1, offset), type_code) = is_bge_replaceable(args, addr)
     if (opcode == 'addi'):
         (res, (r2, r1, offset), type_code) = is_addi_replaceable(args, addr)
     if (opcode == 'c.addi'):
         (res, (r2, r1, offset), type_code) = is_c_addi_replaceable(args, addr)
-    if (opcode == 'slli') and ('cx.slli' in ENABLED):
+    if (opcode == 'slli') and is_enabled('cx.slli'):
         (res, (r2, r1, offset), type_code) = is_slli_replaceable(args, addr)
     return (res, (r2, r1, offset), curr_max, curr_min, type_code)
 
 
+def get_c_addi_rows(table, compiler, rows):
+    """
+    Returns the rows (of those given) of an InstrTable which the scanners
+    treat as 16-bit ADDI instructions (see riscv.get_rvc_subtype()).
+    """
+    if (compiler != 'rvgcc'):
+        return list(rows)
+    # GCC sub-types of 16-bit ADDI which are not C.ADDI
+    subtypes = ('c.addi16sp', 'c.addi4spn')
+    fields = decoder.decode_all([table.code[i] for i in rows])
+    return [i for (i, decoded) in zip(rows, fields)
+            if (decoded is None) or (decoded[0] not in subtypes)]
+
+
+def check_replaceable_row(table, compiler, i):
+    """
+    Checks if an instruction of an InstrTable (see instr_table.py) can be
+    replaced with a user instruction (see check_replaceable()), for scanners
+    without NumPy (see check_replaceable_table()). A 16-bit row is checked as
+    a C.ADDI instruction (see riscv.get_rvc_opcode()).
+
+    Returns a tuple of:
+        - type_code: new instruction version ('' if not replaceable)
+        - offset: (absolute) LW offset of a cx.lwpc replacement
+    """
+    if (table.size[i] > 2) \
+            and (symbols.OPCODES[table.opcode[i]] not in REPLACEABLE):
+        return ('', 0)
+    ret = table.row(i)
+    (addr, instr, bytes, opcode, args) = ret[:5]
+    comments = ret[5] if (len(ret) > 5) else ''
+    if (bytes == 2):
+        if (compiler == 'rviar'):
+            args = [args[0], args[0], args[1]]
+        opcode = 'c.addi'
+    res = check_replaceable(opcode, args, comments, 0, float("inf"), addr)
+    if not res[0]:
+        return ('', 0)
+    return (res[4], res[2])
+
+
+def check_replaceable_table(table, compiler):
+    """
+    Checks which instructions of an InstrTable (see instr_table.py) can be
+    replaced with a user instruction, for all rows at once using boolean
+    masks over the table columns.  This gives the same result as calling
+    check_replaceable() for each instruction.
+
+    Returns a list of the type code of each row ('' if not replaceable), or
+    None if NumPy is not installed: the scanners then check each instruction
+    as they reach it instead (see check_replaceable_row()), without
+    decomposing the operands of the whole table first.
+    """
+    if (numpy is None):
+        return None
+    type_codes = [''] * len(table)
+    if (len(table) == 0):
+        return type_codes
+    # Columns as NumPy arrays (array typecodes are also NumPy type codes)
+    (size, op, rd, rs1, rs2, imm, comments) = [
+        numpy.frombuffer(col, dtype=col.typecode) for col in
+        [table.column(name) for name in
+         ['size', 'opcode', 'rd', 'rs1', 'rs2', 'imm', 'comments']]]
+    # Registers in REG_LIST by id, with a last False entry for no register
+    #   (instr_table.NONE = -1 selects the last entry)
+    reg_list = numpy.array([in_reg_list(r) for r in symbols.REGISTERS]
+                           + [False])
+    if IGNORE_REGS:
+        reg_ok = numpy.ones(len(reg_list), dtype=bool)
+    else:
+        reg_ok = reg_list
+    gp = symbols.register_id('gp')
+    zero = symbols.register_id('zero')
+    wide = (size > 2)
+
+    def is_op(name):
+        """ Mask of the 32-bit instructions with opcode name. """
+        return wide & (op == symbols.opcode_ids[name])
+
+    def in_comments(text):
+        """ Mask of the instructions with text in their comments. """
+        found = numpy.array([s.find(text) != -1 for s in table.strings])
+        return found[comments]
+
+    masks = []
+    # cx.lwpc (offsets are checked per function, see check_offsets())
+    if is_enabled('cx.lwpc'):
+        masks.append(('cx.lwpc', is_op('lw') & (rs1 == gp) & reg_ok[rd]))
+    # Stores of a register or of zero
+    for (name, limit) in [('sb', 32), ('sh', 64)]:
+        if is_enabled('cx.' + name) or is_enabled('cx.' + name + 'zero'):
+            base = is_op(name) & (imm >= 0) & (imm < limit)
+            mask = base & reg_ok[rs1] & reg_ok[rs2] \
+                & is_enabled('cx.' + name)
+            masks.append(('cx.' + name, mask))
+            masks.append(('cx.' + name + 'zero',
+                          base & ~mask & reg_ok[rs1] & (rs2 == zero)
+                          & is_enabled('cx.' + name + 'zero')))
+    # Loads
+    for (name, limit) in [('lbu', 32), ('lhu', 64), ('lb', 32), ('lh', 64)]:
+        if is_enabled('cx.' + name):
+            masks.append(('cx.' + name,
+                          is_op(name) & reg_ok[rs1] & reg_ok[rd]
+                          & (imm >= 0) & (imm < limit)))
+    if is_enabled('cx.swzero'):
+        # Registers are checked even with IGNORE_REGS
+        masks.append(('cx.swzero',
+                      is_op('sw') & reg_list[rs1] & (rs2 == zero)
+                      & (imm >= 0) & (imm < 128)))
+    # Calls of the __riscv_save/__riscv_restore functions
+    for (name, text, codes) in [('j', '_restore',
+                                 ['pop (restore)', 'c.j (restore)']),
+                                ('jal', '_save',
+                                 ['push (save)', 'c.jal (save)'])]:
+        enabled = [code for code in codes if is_enabled(code)]
+        if enabled:
+            masks.append((enabled[0], is_op(name) & in_comments(text)))
+    # Branches
+    for name in ['bne', 'blt', 'bge']:
+        if is_enabled('cx.' + name):
+            masks.append(('cx.' + name, is_op(name)))
+    # 32-bit ADDI
+    addi = is_op('addi')
+    same = (rd == rs1) & reg_ok[rd]
+    both = reg_ok[rd] & reg_ok[rs1]
+    sub = addi & (imm < 0)
+    subi8 = sub & same & (imm > -256) & is_enabled('cx.subi8')
+    addi8 = addi & (imm >= 0) & same & (imm < 256) & is_enabled('cx.addi8')
+    masks += [('cx.subi8', subi8),
+              ('cx.subi5', sub & ~subi8 & both & (imm > -32)
+               & is_enabled('cx.subi5')),
+              ('cx.addi8', addi8),
+              ('cx.addi5', addi & (imm >= 0) & ~addi8 & both & (imm < 32)
+               & is_enabled('cx.addi5'))]
+    if is_enabled('cx.slli'):
+        masks.append(('cx.slli', is_op('slli') & both & (imm < 32)))
+    # 16-bit ADDI (see is_c_addi_replaceable())
+    if symbols.addi_subi_enabled():
+        addi16 = symbols.opcode_ids['addi' if (compiler == 'rvgcc')
+                                    else 'c.addi']
+        rows = numpy.flatnonzero((size == 2) & (op == addi16)).tolist()
+        c_addi = numpy.zeros(len(table), dtype=bool)
+        c_addi[get_c_addi_rows(table, compiler, rows)] = True
+        masks += [('cx.subi8', c_addi & (imm < 0) & reg_ok[rd]
+                   & (imm > -256) & is_enabled('cx.subi8')),
+                  ('cx.addi8', c_addi & (imm >= 0) & reg_ok[rd]
+                   & (imm < 256) & is_enabled('cx.addi5'))]
+
+    for (type_code, mask) in masks:
+        for i in numpy.flatnonzero(mask).tolist():
+            type_codes[i] = type_code
+    return type_codes
+
+
 def check_offsets(func_bytes, reductions, max_offset, min_offset):
     """
     Checks the number of bits required to encode LW offsets for the function.
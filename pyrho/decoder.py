@@ -0,0 +1,273 @@
+"""
+RISC-V Instruction Decoder
+
+Decodes RV32I/M/C instructions from their machine code (the second column of
+the disassembly), rather than from the mnemonic and arguments printed by the
+disassembler.  Pseudoinstructions are decoded as their base instruction (e.g.
+'li a5,1' --> 'addi') and compressed instructions by their exact sub-type
+(e.g. 'addi sp,sp,-32' --> 'c.addi16sp').
+
+Each decoded instruction is a tuple of:
+    (opcode, rd, rs1, rs2, imm)
+where the registers are ABI names (None if not used by the instruction) and
+imm is the immediate/offset (0 if none).  Branch and jump offsets are relative
+to the address of the instruction; LUI/AUIPC immediates are the upper 20 bits
+(as printed by the disassembler).
+
+"""
+
+from .constants import DECODE_CACHE_SIZE
+
+# ABI register names (by register number)
+REG_NAMES = ['zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2',
+             's0', 's1', 'a0', 'a1', 'a2', 'a3', 'a4', 'a5',
+             'a6', 'a7', 's2', 's3', 's4', 's5', 's6', 's7',
+             's8', 's9', 's10', 's11', 't3', 't4', 't5', 't6']
+
+# Base opcodes (bits 6:0) of 32-bit instructions
+OP_LUI = 0x37
+OP_AUIPC = 0x17
+OP_JAL = 0x6f
+OP_JALR = 0x67
+OP_BRANCH = 0x63
+OP_LOAD = 0x03
+OP_STORE = 0x23
+OP_IMM = 0x13
+OP_OP = 0x33
+OP_MISC_MEM = 0x0f
+OP_SYSTEM = 0x73
+
+# Instructions by funct3
+BRANCHES = ['beq', 'bne', None, None, 'blt', 'bge', 'bltu', 'bgeu']
+LOADS = ['lb', 'lh', 'lw', None, 'lbu', 'lhu', None, None]
+STORES = ['sb', 'sh', 'sw', None, None, None, None, None]
+OP_IMMS = ['addi', 'slli', 'slti', 'sltiu', 'xori', 'srli', 'ori', 'andi']
+CSRS = [None, 'csrrw', 'csrrs', 'csrrc', None, 'csrrwi', 'csrrsi', 'csrrci']
+# Instructions by (funct7, funct3)
+OPS = {
+    (0x00, 0): 'add', (0x20, 0): 'sub', (0x00, 1): 'sll', (0x00, 2): 'slt',
+    (0x00, 3): 'sltu', (0x00, 4): 'xor', (0x00, 5): 'srl', (0x20, 5): 'sra',
+    (0x00, 6): 'or', (0x00, 7): 'and',
+    # RV32M
+    (0x01, 0): 'mul', (0x01, 1): 'mulh', (0x01, 2): 'mulhsu',
+    (0x01, 3): 'mulhu', (0x01, 4): 'div', (0x01, 5): 'divu',
+    (0x01, 6): 'rem', (0x01, 7): 'remu',
+}
+# Compressed arithmetic (CA format) by (bit 12, bits 6:5)
+C_ARITH = {(0, 0): 'c.sub', (0, 1): 'c.xor', (0, 2): 'c.or', (0, 3): 'c.and'}
+
+# Decoded instructions (at most DECODE_CACHE_SIZE)
+#   Key: machine code
+#   Val: decoded instruction (None if not valid RV32I/M/C)
+decoded = {}
+
+
+def bits(word, hi, lo):
+    """ Returns bits hi:lo of word. """
+    return (word >> lo) & ((1 << (hi - lo + 1)) - 1)
+
+
+def sign_extend(value, nbits):
+    """ Returns value as a signed nbits-bit integer. """
+    if (value >> (nbits - 1)) & 1:
+        return value - (1 << nbits)
+    return value
+
+
+def reg(num):
+    """ Returns the ABI name of register number num. """
+    return REG_NAMES[num]
+
+
+def creg(num):
+    """ Returns the ABI name of 3-bit compressed register number num. """
+    return REG_NAMES[num + 8]
+
+
+def decode_32(word):
+    """ Decodes a 32-bit RV32I/M instruction. """
+    op = bits(word, 6, 0)
+    rd = reg(bits(word, 11, 7))
+    funct3 = bits(word, 14, 12)
+    rs1 = reg(bits(word, 19, 15))
+    rs2 = reg(bits(word, 24, 20))
+    funct7 = bits(word, 31, 25)
+    imm_i = sign_extend(bits(word, 31, 20), 12)
+    if (op == OP_LUI):
+        return ('lui', rd, None, None, bits(word, 31, 12))
+    if (op == OP_AUIPC):
+        return ('auipc', rd, None, None, bits(word, 31, 12))
+    if (op == OP_JAL):
+        imm = (bits(word, 31, 31) << 20) | (bits(word, 19, 12) << 12) \
+            | (bits(word, 20, 20) << 11) | (bits(word, 30, 21) << 1)
+        return ('jal', rd, None, None, sign_extend(imm, 21))
+    if (op == OP_JALR) and (funct3 == 0):
+        return ('jalr', rd, rs1, None, imm_i)
+    if (op == OP_BRANCH) and BRANCHES[funct3]:
+        imm = (bits(word, 31, 31) << 12) | (bits(word, 7, 7) << 11) \
+            | (bits(word, 30, 25) << 5) | (bits(word, 11, 8) << 1)
+        return (BRANCHES[funct3], None, rs1, rs2, sign_extend(imm, 13))
+    if (op == OP_LOAD) and LOADS[funct3]:
+        return (LOADS[funct3], rd, rs1, None, imm_i)
+    if (op == OP_STORE) and STORES[funct3]:
+        imm = (funct7 << 5) | bits(word, 11, 7)
+        return (STORES[funct3], None, rs1, rs2, sign_extend(imm, 12))
+    if (op == OP_IMM):
+        if (funct3 == 1) and (funct7 == 0x00):
+            return ('slli', rd, rs1, None, bits(word, 24, 20))
+        if (funct3 == 5) and (funct7 == 0x00):
+            return ('srli', rd, rs1, None, bits(word, 24, 20))
+        if (funct3 == 5) and (funct7 == 0x20):
+            return ('srai', rd, rs1, None, bits(word, 24, 20))
+        if (funct3 != 1) and (funct3 != 5):
+            return (OP_IMMS[funct3], rd, rs1, None, imm_i)
+    if (op == OP_OP) and ((funct7, funct3) in OPS):
+        return (OPS[(funct7, funct3)], rd, rs1, rs2, 0)
+    if (op == OP_MISC_MEM) and (funct3 == 0):
+        return ('fence', None, None, None, 0)
+    if (op == OP_MISC_MEM) and (funct3 == 1):
+        return ('fence.i', None, None, None, 0)
+    if (op == OP_SYSTEM) and (funct3 == 0) and (word == 0x00000073):
+        return ('ecall', None, None, None, 0)
+    if (op == OP_SYSTEM) and (funct3 == 0) and (word == 0x00100073):
+        return ('ebreak', None, None, None, 0)
+    if (op == OP_SYSTEM) and CSRS[funct3]:
+        csr = bits(word, 31, 20)
+        if (funct3 > 4):
+            # Immediate versions have no source register
+            return (CSRS[funct3], rd, None, None, csr)
+        return (CSRS[funct3], rd, rs1, None, csr)
+    return None
+
+
+def decode_16(word):
+    """ Decodes a 16-bit RV32C instruction. """
+    quadrant = bits(word, 1, 0)
+    funct3 = bits(word, 15, 13)
+    rd = bits(word, 11, 7)
+    rs2 = bits(word, 6, 2)
+    # CI format immediate, imm[5] | imm[4:0]
+    imm_ci = sign_extend((bits(word, 12, 12) << 5) | bits(word, 6, 2), 6)
+    # CL/CS format word offset, uimm[5:3] | uimm[2] | uimm[6]
+    uimm_cl = (bits(word, 12, 10) << 3) | (bits(word, 6, 6) << 2) \
+        | (bits(word, 5, 5) << 6)
+    if (quadrant == 0):
+        if (funct3 == 0):
+            imm = (bits(word, 12, 11) << 4) | (bits(word, 10, 7) << 6) \
+                | (bits(word, 6, 6) << 2) | (bits(word, 5, 5) << 3)
+            if (imm == 0):
+                # Reserved (includes the all-zero illegal instruction)
+                return None
+            return ('c.addi4spn', creg(bits(word, 4, 2)), 'sp', None, imm)
+        if (funct3 == 2):
+            return ('c.lw', creg(bits(word, 4, 2)), creg(bits(word, 9, 7)),
+                    None, uimm_cl)
+        if (funct3 == 6):
+            return ('c.sw', None, creg(bits(word, 9, 7)),
+                    creg(bits(word, 4, 2)), uimm_cl)
+        return None
+    if (quadrant == 1):
+        if (funct3 == 0):
+            if (rd == 0):
+                return ('c.nop', None, None, None, imm_ci)
+            return ('c.addi', reg(rd), reg(rd), None, imm_ci)
+        if (funct3 == 1) or (funct3 == 5):
+            # imm[11|4|9:8|10|6|7|3:1|5]
+            imm = (bits(word, 12, 12) << 11) | (bits(word, 11, 11) << 4) \
+                | (bits(word, 10, 9) << 8) | (bits(word, 8, 8) << 10) \
+                | (bits(word, 7, 7) << 6) | (bits(word, 6, 6) << 7) \
+                | (bits(word, 5, 3) << 1) | (bits(word, 2, 2) << 5)
+            if (funct3 == 1):
+                return ('c.jal', 'ra', None, None, sign_extend(imm, 12))
+            return ('c.j', None, None, None, sign_extend(imm, 12))
+        if (funct3 == 2):
+            return ('c.li', reg(rd), None, None, imm_ci)
+        if (funct3 == 3) and (rd == 2):
+            # nzimm[9] | nzimm[4|6|8:7|5]
+            imm = (bits(word, 12, 12) << 9) | (bits(word, 6, 6) << 4) \
+                | (bits(word, 5, 5) << 6) | (bits(word, 4, 3) << 7) \
+                | (bits(word, 2, 2) << 5)
+            return ('c.addi16sp', 'sp', 'sp', None, sign_extend(imm, 10))
+        if (funct3 == 3):
+            return ('c.lui', reg(rd), None, None, imm_ci & 0xfffff)
+        if (funct3 == 4):
+            rd = creg(bits(word, 9, 7))
+            funct2 = bits(word, 11, 10)
+            if (funct2 == 0):
+                return ('c.srli', rd, rd, None, imm_ci & 0x3f)
+            if (funct2 == 1):
+                return ('c.srai', rd, rd, None, imm_ci & 0x3f)
+            if (funct2 == 2):
+                return ('c.andi', rd, rd, None, imm_ci)
+            key = (bits(word, 12, 12), bits(word, 6, 5))
+            if key in C_ARITH:
+                return (C_ARITH[key], rd, rd, creg(bits(word, 4, 2)), 0)
+            return None
+        # c.beqz/c.bnez, imm[8|4:3] | imm[7:6|2:1|5]
+        imm = (bits(word, 12, 12) << 8) | (bits(word, 11, 10) << 3) \
+            | (bits(word, 6, 5) << 6) | (bits(word, 4, 3) << 1) \
+            | (bits(word, 2, 2) << 5)
+        opcode = 'c.beqz' if (funct3 == 6) else 'c.bnez'
+        return (opcode, None, creg(bits(word, 9, 7)), 'zero',
+                sign_extend(imm, 9))
+    if (quadrant == 2):
+        if (funct3 == 0):
+            return ('c.slli', reg(rd), reg(rd), None, imm_ci & 0x3f)
+        if (funct3 == 2):
+            # uimm[5] | uimm[4:2|7:6]
+            imm = (bits(word, 12, 12) << 5) | (bits(word, 6, 4) << 2) \
+                | (bits(word, 3, 2) << 6)
+            return ('c.lwsp', reg(rd), 'sp', None, imm)
+        if (funct3 == 4):
+            if (bits(word, 12, 12) == 0):
+                if (rs2 == 0):
+                    return ('c.jr', None, reg(rd), None, 0)
+                return ('c.mv', reg(rd), None, reg(rs2), 0)
+            if (rd == 0) and (rs2 == 0):
+                return ('c.ebreak', None, None, None, 0)
+            if (rs2 == 0):
+                return ('c.jalr', 'ra', reg(rd), None, 0)
+            return ('c.add', reg(rd), reg(rd), reg(rs2), 0)
+        if (funct3 == 6):
+            # uimm[5:2|7:6]
+            imm = (bits(word, 12, 9) << 2) | (bits(word, 8, 7) << 6)
+            return ('c.swsp', None, 'sp', reg(rs2), imm)
+        return None
+    return None
+
+
+def decode(word):
+    """
+    Decodes the machine code of one instruction.
+
+    Instructions with the low two bits set are 32-bit, all others 16-bit.
+
+    Returns the decoded instruction tuple (None if not valid RV32I/M/C).
+    """
+    try:
+        return decoded[word]
+    except KeyError:
+        pass
+    if (word & 0x3 == 0x3) and (word <= 0xffffffff):
+        value = decode_32(word)
+    elif (word & 0x3 != 0x3) and (word <= 0xffff):
+        value = decode_16(word)
+    else:
+        value = None
+    # Start again once full, rather than grow without bound (e.g. in the
+    #   server, which scans many builds)
+    if (len(decoded) >= DECODE_CACHE_SIZE):
+        decoded.clear()
+    decoded[word] = value
+    return value
+
+
+def decode_all(words):
+    """
+    Decodes the machine code of many instructions (e.g. the code column of an
+    InstrTable, see instr_table.py).
+
+    Returns a list of decoded instruction tuples (None where not valid).
+    """
+    values = {word: decode(word) for word in set(words)}
+    return [values[word] for word in words]
@@ -9,11 +9,10 @@ Author: Jennifer Hellar
 
 import xlsxwriter
 
-import excel
-from constants import *
+from .constants import *
 
 
-def create_sheet(func_name, name):
+def create_sheet(ctx, func_name, name):
     """
     Adds a new worksheet to an open Excel workbook and formats it.
 
@@ -24,10 +23,10 @@ def create_sheet(func_name, name):
             - Adds formulas for some automatic data analysis
         - Returns the worksheet
     """
-    wksheet = excel.wkbook.add_worksheet(name)
+    wksheet = ctx.wkbook.add_worksheet(name)
     # Add link to return to Summary
     formula = '=HYPERLINK("#Summary!A1", "Return to Summary")'
-    wksheet.write_formula('A1', formula, excel.header_format)
+    wksheet.write_formula('A1', formula, ctx.header_format)
     # Format column sizes
     col_sizes = {  # ARM table
                  0: 20, 1: 20, 2: 20, 3: 30, 4: 50,
@@ -47,13 +46,13 @@ def create_sheet(func_name, name):
     # 'ARM M0+ Totals'
     row = 2
     col = 0
-    add_arm_totals_table(wksheet, row, col)
+    add_arm_totals_table(ctx, wksheet, row, col)
     # 'ARM M0+'
-    add_arm_table(wksheet)
+    add_arm_table(ctx, wksheet)
     # 'RISC-V (GCC) Totals'
-    add_riscv_totals_table(wksheet, 'rvgcc')
+    add_riscv_totals_table(ctx, wksheet, 'rvgcc')
     # 'RISC-V (GCC)'
-    add_riscv_table(wksheet, 'rvgcc')
+    add_riscv_table(ctx, wksheet, 'rvgcc')
 
     return wksheet
 
@@ -61,23 +60,23 @@ def create_sheet(func_name, name):
 """ Functions to add specific tables/charts to the worksheet """
 
 
-def add_arm_totals_table(wksheet, row, col):
+def add_arm_totals_table(ctx, wksheet, row, col):
     """ Adds the 'ARM M0+ Totals' table to the worksheet. """
     headers = ['', 'Bytes']
     row_labels = ['Total']
     end_row = row + len(row_labels) + 1     # includes header row, etc.
     end_col = col + len(headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       ARM_TOTALS_TABLE, headers, True)
-    excel.add_row_labels(wksheet, ARM_TOTALS_TABLE, row_labels)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     ARM_TOTALS_TABLE, headers, True)
+    ctx.add_row_labels(wksheet, ARM_TOTALS_TABLE, row_labels)
 
 
-def add_arm_table(wksheet):
+def add_arm_table(ctx, wksheet):
     """ Adds the 'ARM M0+' table to the worksheet. """
     # Location: Directly below 'ARM M0+ Totals' table
     #   At same row as RISC-V table, so pushed down by listing of enabled instr
-    row = excel.get_table_loc(ARM_TOTALS_TABLE)[0] + max(len(ENABLED), 7) + 34
-    col = excel.get_table_loc(ARM_TOTALS_TABLE)[1]
+    row = ctx.get_table_loc(ARM_TOTALS_TABLE)[0] + max(len(ENABLED), 7) + 34
+    col = ctx.get_table_loc(ARM_TOTALS_TABLE)[1]
     headers = ['Address',
                'Instruction',
                'Opcode',
@@ -85,14 +84,14 @@ def add_arm_table(wksheet):
                'Comments']
     end_row = 200   # this will be updated when data is filled in
     end_col = col + len(headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       ARM_TABLE, headers, False)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     ARM_TABLE, headers, False)
 
 
-def add_riscv_totals_table(wksheet, compiler):
+def add_riscv_totals_table(ctx, wksheet, compiler):
     """ Adds a RISC-V Totals for the given compiler table to the worksheet. """
-    row = excel.get_table_loc(ARM_TOTALS_TABLE)[0]
-    col = excel.get_table_loc(ARM_TABLE)[3] + 2
+    row = ctx.get_table_loc(ARM_TOTALS_TABLE)[0]
+    col = ctx.get_table_loc(ARM_TABLE)[3] + 2
     table = RVGCC_TOTALS_TABLE
 
     headers = ['', 'Instruction', 'Bytes']
@@ -103,28 +102,28 @@ def add_riscv_totals_table(wksheet, compiler):
     row_labels.append('Final Estimate')
     end_row = row + len(row_labels) + 2
     end_col = col + len(headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       table, headers, True)
-    excel.add_row_labels(wksheet, table, row_labels)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     table, headers, True)
+    ctx.add_row_labels(wksheet, table, row_labels)
 
     # Add compact instruction locations to table map (will fill in later)
     # (Table title location + 2 = Table header row) + # rows to Reductions lbl
-    row = excel.get_table_loc(table)[0] + 2\
+    row = ctx.get_table_loc(table)[0] + 2\
         + row_labels.index('Reduction') + 1
 
     for i in range(len(ENABLED)):
         row += 1
-        excel.update_table_map(table, 'Instruction',
-                               ENABLED[i], row)
-        excel.update_table_map(table, 'Bytes', ENABLED[i], row)
+        ctx.update_table_map(table, 'Instruction',
+                             ENABLED[i], row)
+        ctx.update_table_map(table, 'Bytes', ENABLED[i], row)
 
 
-def add_riscv_table(wksheet, compiler):
+def add_riscv_table(ctx, wksheet, compiler):
     """ Adds a RISC-V table to the worksheet for the given compiler. """
     # Location: Directly below the corresponding Totals table
-    row = excel.get_table_loc(ARM_TABLE)[0]
+    row = ctx.get_table_loc(ARM_TABLE)[0]
     if (compiler == 'rvgcc'):
-        col = excel.get_table_loc(RVGCC_TOTALS_TABLE)[1]
+        col = ctx.get_table_loc(RVGCC_TOTALS_TABLE)[1]
         table = RVGCC_TABLE
     rv_headers = ['Address',
                   'Instruction',
@@ -136,11 +135,11 @@ def add_riscv_table(wksheet, compiler):
                   'Comments']
     end_row = 200
     end_col = col + len(rv_headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       table, rv_headers, False)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     table, rv_headers, False)
 
 
-def add_instr_freq_table(wksheet, compiler, instr_freq):
+def add_instr_freq_table(ctx, wksheet, compiler, instr_freq):
     """ Add the 'Instruction Occurrence' table to the current worksheet. """
     names = []
     vals = []
@@ -168,12 +167,12 @@ def add_instr_freq_table(wksheet, compiler, instr_freq):
     headers = ['', '# Occurrences']
     if (compiler == 'rvgcc'):
         table = RVGCC_INSTR_TABLE
-        row = excel.get_table_loc(RVGCC_TOTALS_TABLE)[2] + 2
-        col = excel.get_table_loc(RVGCC_TOTALS_TABLE)[1]
+        row = ctx.get_table_loc(RVGCC_TOTALS_TABLE)[2] + 2
+        col = ctx.get_table_loc(RVGCC_TOTALS_TABLE)[1]
     end_row = row + len(names) + 2
     end_col = col + len(headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       table, headers, False)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     table, headers, False)
 
     row = row + 3
 
@@ -181,50 +180,50 @@ def add_instr_freq_table(wksheet, compiler, instr_freq):
         instr = names[i]
         # Mark 'cx' instructions with gold text
         if (instr in ENABLED):
-            name_format = excel.gold_header_format
-            val_format = excel.light_bg_format
+            name_format = ctx.gold_header_format
+            val_format = ctx.light_bg_format
         # Mark 32-bit instructions with red text
         elif (instr.find('c.') == -1) and (instr != 'other'):
-            name_format = excel.red_header_format
-            val_format = excel.red_light_format
+            name_format = ctx.red_header_format
+            val_format = ctx.red_light_format
         else:
-            name_format = excel.header_format
-            val_format = excel.light_bg_format
+            name_format = ctx.header_format
+            val_format = ctx.light_bg_format
         # Vertical labels are instruction names
-        col = excel.get_table_col(table, '')
+        col = ctx.get_table_col(table, '')
         wksheet.write_string(row, col, names[i], name_format)
         # Update the table map to include the occurrence cells
-        excel.update_table_map(table, '# Occurrences',
-                               names[i], row)
+        ctx.update_table_map(table, '# Occurrences',
+                             names[i], row)
         # Record the occurrence value
-        col = excel.get_table_col(table, '# Occurrences')
+        col = ctx.get_table_col(table, '# Occurrences')
         wksheet.write_number(row, col, vals[i], val_format)
 
         row += 1
 
 
-def add_instr_freq_chart(wksheet, compiler):
+def add_instr_freq_chart(ctx, wksheet, compiler):
     """ Add chart to visualize most frequent instructions. """
     if (compiler == 'rvgcc'):
         data_table = RVGCC_INSTR_TABLE
         loc_table = RVGCC_TOTALS_TABLE
-    coord = excel.get_table_loc(data_table)
+    coord = ctx.get_table_loc(data_table)
     (first_row, first_col, last_row, last_col) = coord
     first_row = first_row + 3
     # Location of instruction names
-    name_col = excel.get_table_col(data_table, '')
+    name_col = ctx.get_table_col(data_table, '')
     start_name = CELL_NAME[(first_row, name_col)]
     end_name = CELL_NAME[(last_row, name_col)]
     # Location of occurrence values
-    val_col = excel.get_table_col(data_table, '# Occurrences')
+    val_col = ctx.get_table_col(data_table, '# Occurrences')
     start_val = CELL_NAME[(first_row, val_col)]
     end_val = CELL_NAME[(last_row, val_col)]
     # Location of chart
-    coord = excel.get_table_loc(loc_table)
+    coord = ctx.get_table_loc(loc_table)
     row = max(coord[2] + 12, coord[0] + 25)
     col = coord[3] + 2
     chart_loc_cell = CELL_NAME[(row, col)]
-    chart = excel.wkbook.add_chart({'type': 'pie'})
+    chart = ctx.wkbook.add_chart({'type': 'pie'})
     categories = '=' + wksheet.get_name() + '!' + start_name + ':' + end_name
     values = '=' + wksheet.get_name() + '!' + start_val + ':' + end_val
     chart.add_series({
@@ -242,11 +241,11 @@ def add_instr_freq_chart(wksheet, compiler):
                                                  'y_offset': 0})
 
 
-def add_instr_formats_table(wksheet, compiler, formats):
+def add_instr_formats_table(ctx, wksheet, compiler, formats):
     """ Add the 'Instruction Labels' table to the current worksheet. """
     if (compiler == 'rvgcc'):
-        row = excel.get_table_loc(RVGCC_TOTALS_TABLE)[0]
-        col = excel.get_table_loc(RVGCC_TABLE)[3] + 2
+        row = ctx.get_table_loc(RVGCC_TOTALS_TABLE)[0]
+        col = ctx.get_table_loc(RVGCC_TABLE)[3] + 2
         headers = ['Instruction', '# (RISC-V)']
         row_labels = []
         for lbl in formats.keys():
@@ -256,9 +255,9 @@ def add_instr_formats_table(wksheet, compiler, formats):
             table_nm = lbl
             end_row = row + len(row_labels) + 2
             end_col = col + len(headers) - 1
-            excel.create_table(wksheet, row, col, end_row, end_col,
-                               table_nm, headers, False)
-            excel.add_row_labels(wksheet, table_nm, row_labels)
+            ctx.create_table(wksheet, row, col, end_row, end_col,
+                             table_nm, headers, False)
+            ctx.add_row_labels(wksheet, table_nm, row_labels)
             col = col + 3
 
     for lbl in formats.keys():
@@ -266,21 +265,21 @@ def add_instr_formats_table(wksheet, compiler, formats):
         for instr in formats[lbl]:
             val = formats[lbl][instr]
             if (compiler == 'rvgcc'):
-                cell = excel.get_table_cell(table_nm, '# (RISC-V)', instr)
-            wksheet.write_number(cell, val, excel.light_bg_format)
+                cell = ctx.get_table_cell(table_nm, '# (RISC-V)', instr)
+            wksheet.write_number(cell, val, ctx.light_bg_format)
 
 
-def add_instr_formats_radar(wksheet, compiler):
+def add_instr_formats_radar(ctx, wksheet, compiler):
     """ Add radar to visualize most frequent instruction formats. """
     # Location of chart: next to totals table
     if (compiler == 'rvgcc'):
-        coord = excel.get_table_loc(RVGCC_TOTALS_TABLE)
+        coord = ctx.get_table_loc(RVGCC_TOTALS_TABLE)
     ch_row = coord[0] - 1
     ch_col = coord[3] + 2
     chart_loc_cell = CELL_NAME[(ch_row, ch_col)]
 
     # Make the pie chart underneath to mark the instruction format
-    chart1 = excel.wkbook.add_chart({'type': 'pie'})
+    chart1 = ctx.wkbook.add_chart({'type': 'pie'})
     chart1.add_series({
         'categories':   ['tmp', 0, 0, len(RV32_FORMATS) - 1, 0],
         'values':       ['tmp', 0, 1, len(RV32_FORMATS) - 1, 1],
@@ -296,14 +295,14 @@ def add_instr_formats_radar(wksheet, compiler):
     wksheet.insert_chart(chart_loc_cell, chart1)
 
     # Make the radar chart
-    chart = excel.wkbook.add_chart({'type': 'radar'})
+    chart = ctx.wkbook.add_chart({'type': 'radar'})
     for i in range(len(RV32_FORMATS)):
         tbl_nm = RV32_FORMATS[i]
-        (row, col, end_row, end_col) = excel.get_table_loc(tbl_nm)
+        (row, col, end_row, end_col) = ctx.get_table_loc(tbl_nm)
         name = [wksheet.get_name(), row, col]
         categories = [wksheet.get_name(), row + 3, col, end_row, col]
         if (compiler == 'rvgcc'):
-            val_col = excel.get_table_col(tbl_nm, '# (RISC-V)')
+            val_col = ctx.get_table_col(tbl_nm, '# (RISC-V)')
         values = [wksheet.get_name(), row + 3, val_col, end_row, val_col]
         chart.add_series({
                 'name':         name,
@@ -322,7 +321,7 @@ def add_instr_formats_radar(wksheet, compiler):
     wksheet.insert_chart(chart_loc_cell, chart, {'x_offset': 0, 'y_offset': 0})
 
 
-def add_riscv_bits_table(wksheet, compiler):
+def add_riscv_bits_table(ctx, wksheet, compiler):
     """ Add Offset Bits table to the worksheet for the given compiler. """
     if (compiler == 'rvgcc'):
         loc_table = RVGCC_INSTR_TABLE
@@ -331,112 +330,112 @@ def add_riscv_bits_table(wksheet, compiler):
         table = RVGCC_BITS_TABLE
 
     # Location: Directly below the compiler Instructions table
-    row = excel.get_table_loc(loc_table)[2] + 2
-    col = excel.get_table_loc(loc_table)[1]
+    row = ctx.get_table_loc(loc_table)[2] + 2
+    col = ctx.get_table_loc(loc_table)[1]
     headers = ['', 'Results', 'Comments']
     row_labels = ['Max Offset', 'Min Offset', 'Data Size', '',
                   'Total Size', '# of Bits']
     end_row = row + len(row_labels) + 1
     end_col = col + len(headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       table, headers, True)
-    excel.add_row_labels(wksheet, table, row_labels)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     table, headers, True)
+    ctx.add_row_labels(wksheet, table, row_labels)
 
     # Offset data location in RISC-V table
-    data_coord = excel.get_table_loc(data_table)
-    offset_col = excel.get_table_col(data_table, 'Offset size')
+    data_coord = ctx.get_table_loc(data_table)
+    offset_col = ctx.get_table_col(data_table, 'Offset size')
     start = CELL_NAME[(data_coord[0] + 3, offset_col)]
     end = CELL_NAME[(data_coord[2], offset_col)]
 
     # Maximum offset for 32-bit lw instruction
-    max_cell = excel.get_table_cell(table, 'Results', 'Max Offset')
+    max_cell = ctx.get_table_cell(table, 'Results', 'Max Offset')
     formula = '=MIN(' + start + ':' + end + ')'  # Actual offset is negative
-    wksheet.write_formula(max_cell, formula, excel.light_bg_format)
+    wksheet.write_formula(max_cell, formula, ctx.light_bg_format)
 
     # Minimum offset
-    min_cell = excel.get_table_cell(table, 'Results', 'Min Offset')
+    min_cell = ctx.get_table_cell(table, 'Results', 'Min Offset')
     formula = '=MAX(' + start + ':' + end + ')'  # Actual offset is negative
-    wksheet.write_formula(min_cell, formula, excel.light_bg_format)
+    wksheet.write_formula(min_cell, formula, ctx.light_bg_format)
 
     # Total range of offsets
-    diff_cell = excel.get_table_cell(table, 'Results', 'Data Size')
+    diff_cell = ctx.get_table_cell(table, 'Results', 'Data Size')
     formula = '=(' + min_cell + ' - ' + max_cell + ')'
-    wksheet.write_formula(diff_cell, formula, excel.bold_light_format)
-    comment_cell = excel.get_table_cell(table, 'Comments', 'Data Size')
-    wksheet.write_string(comment_cell, '(Max - Min)', excel.light_bg_format)
+    wksheet.write_formula(diff_cell, formula, ctx.bold_light_format)
+    comment_cell = ctx.get_table_cell(table, 'Comments', 'Data Size')
+    wksheet.write_string(comment_cell, '(Max - Min)', ctx.light_bg_format)
 
     # Total size of function and data
-    size_cell = excel.get_table_cell(table, 'Results', 'Total Size')
-    est_cell = excel.get_table_cell(tot_table, 'Bytes',
-                                    'Final Estimate')
+    size_cell = ctx.get_table_cell(table, 'Results', 'Total Size')
+    est_cell = ctx.get_table_cell(tot_table, 'Bytes',
+                                  'Final Estimate')
     formula = '=(' + est_cell + ' + ' + diff_cell + ')'
-    wksheet.write_formula(size_cell, formula, excel.bold_light_format)
-    comment_cell = excel.get_table_cell(table, 'Comments', 'Total Size')
+    wksheet.write_formula(size_cell, formula, ctx.bold_light_format)
+    comment_cell = ctx.get_table_cell(table, 'Comments', 'Total Size')
     wksheet.write_string(comment_cell, 'Function size + data size',
-                         excel.light_bg_format)
+                         ctx.light_bg_format)
 
     # Number of bits needed to span full range of function + data
-    bits_cell = excel.get_table_cell(table, 'Results', '# of Bits')
+    bits_cell = ctx.get_table_cell(table, 'Results', '# of Bits')
     formula = '=ROUNDUP(LOG(' + size_cell + ',2),0)'
     wksheet.write_formula(bits_cell, formula)
     # Only 8 bits available in 16-bit instruction, so need offset <= 8 bits
     format_dict = {'type': 'cell', 'criteria': '>', 'value': 10,
-                   'format': excel.red_light_format}
+                   'format': ctx.red_light_format}
     wksheet.conditional_format(bits_cell + ':' + bits_cell, format_dict)
     format_dict = {'type': 'cell', 'criteria': '<=', 'value': 10,
-                   'format': excel.green_light_format}
+                   'format': ctx.green_light_format}
     wksheet.conditional_format(bits_cell + ':' + bits_cell, format_dict)
-    comment_cell = excel.get_table_cell(table, 'Comments', '# of Bits')
+    comment_cell = ctx.get_table_cell(table, 'Comments', '# of Bits')
     wksheet.write_string(comment_cell, 'To span all addresses',
-                         excel.light_bg_format)
+                         ctx.light_bg_format)
 
 
-def mark_compact_rows(wksheet, compiler, compact_loc, lwpc_fail):
+def mark_compact_rows(ctx, wksheet, compiler, compact_loc, lwpc_fail):
     """
     Formats cx instruction rows w/light background.
     If cx.lwpc cannot be used, re-format those cells to be red.
     """
     if (compiler == 'rvgcc'):
-        start = excel.get_table_loc(RVGCC_TABLE)[1]
-        end = excel.get_table_loc(RVGCC_TABLE)[3]
+        start = ctx.get_table_loc(RVGCC_TABLE)[1]
+        end = ctx.get_table_loc(RVGCC_TABLE)[3]
     for instr in compact_loc.keys():
         row_lst = compact_loc[instr]
         for row in row_lst:
             cell_range = CELL_NAME[(row, start)] + ':' + CELL_NAME[(row, end)]
             if (instr == 'cx.lwpc') and lwpc_fail:
-                format_dict = {'type': 'no_errors', 'format': excel.red_format}
+                format_dict = {'type': 'no_errors', 'format': ctx.red_format}
                 wksheet.conditional_format(cell_range, format_dict)
             else:
                 format_dict = {'type': 'no_errors',
-                               'format': excel.light_bg_format}
+                               'format': ctx.light_bg_format}
                 wksheet.conditional_format(cell_range, format_dict)
 
 
-def mark_failed_rows(wksheet, compiler, loc):
+def mark_failed_rows(ctx, wksheet, compiler, loc):
     """
     Formats failed cx instruction rows w/orange background.
     """
     if (compiler == 'rvgcc'):
-        start = excel.get_table_loc(RVGCC_TABLE)[1]
-        end = excel.get_table_loc(RVGCC_TABLE)[3]
+        start = ctx.get_table_loc(RVGCC_TABLE)[1]
+        end = ctx.get_table_loc(RVGCC_TABLE)[3]
     for instr in loc.keys():
         row_lst = loc[instr]
         for row in row_lst:
             cell_range = CELL_NAME[(row, start)] + ':' + CELL_NAME[(row, end)]
             format_dict = {'type': 'no_errors',
-                           'format': excel.orange_bg_format}
+                           'format': ctx.orange_bg_format}
             wksheet.conditional_format(cell_range, format_dict)
 
 
-def mark_pair_rows(wksheet, compiler, pair_loc):
+def mark_pair_rows(ctx, wksheet, compiler, pair_loc):
     """
     Formats instruction pairs of interest w/gold background.
     """
     if (compiler == 'rvgcc'):
-        coord = excel.get_table_loc(RVGCC_TABLE)
+        coord = ctx.get_table_loc(RVGCC_TABLE)
     start = coord[1]
     end = coord[3]
-    format_dict = {'type': 'no_errors', 'format': excel.gold_bg_format}
+    format_dict = {'type': 'no_errors', 'format': ctx.gold_bg_format}
     for pair in pair_loc.keys():
         row_lst = pair_loc[pair]
         for row in row_lst:
@@ -444,38 +443,38 @@ def mark_pair_rows(wksheet, compiler, pair_loc):
             wksheet.conditional_format(cells, format_dict)
 
 
-def add_tables_charts_marks(wksheet, compiler, instr, formats, compact,
+def add_tables_charts_marks(ctx, wksheet, compiler, instr, formats, compact,
                             not_repl_loc, lwpc, pairs):
     # Instruction Occurrence
-    add_instr_freq_table(wksheet, compiler, instr)
-    add_instr_freq_chart(wksheet, compiler)
+    add_instr_freq_table(ctx, wksheet, compiler, instr)
+    add_instr_freq_chart(ctx, wksheet, compiler)
     # Instruction Formats
-    add_instr_formats_table(wksheet, compiler, formats)
-    add_instr_formats_radar(wksheet, compiler)
+    add_instr_formats_table(ctx, wksheet, compiler, formats)
+    add_instr_formats_radar(ctx, wksheet, compiler)
     # Offset Bits for cx.lwpc
-    add_riscv_bits_table(wksheet, compiler)
+    add_riscv_bits_table(ctx, wksheet, compiler)
     # Mark new replaced instructions and pairs
-    mark_compact_rows(wksheet, compiler, compact, lwpc)
-    mark_failed_rows(wksheet, compiler, not_repl_loc)
-    mark_pair_rows(wksheet, compiler, pairs)
+    mark_compact_rows(ctx, wksheet, compiler, compact, lwpc)
+    mark_failed_rows(ctx, wksheet, compiler, not_repl_loc)
+    mark_pair_rows(ctx, wksheet, compiler, pairs)
 
 
 """ Functions to record data to the worksheet """
 
 
-def record_func_name(wksheet, name):
+def record_func_name(ctx, wksheet, name):
     """ Write out the function name to the worksheet. """
     table = ARM_TABLE
-    row = excel.get_table_loc(table)[0] + 1
-    col = excel.get_table_loc(table)[1]
+    row = ctx.get_table_loc(table)[0] + 1
+    col = ctx.get_table_loc(table)[1]
     wksheet.write_string(row, col, name)
     table = RVGCC_TABLE
-    row = excel.get_table_loc(table)[0] + 1
-    col = excel.get_table_loc(table)[1]
+    row = ctx.get_table_loc(table)[0] + 1
+    col = ctx.get_table_loc(table)[1]
     wksheet.write_string(row, col, name)
 
 
-def record_instruction(wksheet, compiler, curr_row, addr, instr, opcode,
+def record_instruction(ctx, wksheet, compiler, curr_row, addr, instr, opcode,
                        args, comments):
     """ Write out info for a single instruction. """
     if (compiler == 'rvgcc'):
@@ -483,16 +482,16 @@ def record_instruction(wksheet, compiler, curr_row, addr, instr, opcode,
     elif (compiler.find('arm') != -1):
         table = ARM_TABLE
 
-    col = excel.get_table_col(table, 'Address')
+    col = ctx.get_table_col(table, 'Address')
     wksheet.write_string(curr_row, col, addr)
 
-    col = excel.get_table_col(table, 'Instruction')
+    col = ctx.get_table_col(table, 'Instruction')
     wksheet.write_string(curr_row, col, instr)
 
-    col = excel.get_table_col(table, 'Opcode')
+    col = ctx.get_table_col(table, 'Opcode')
     wksheet.write_string(curr_row, col, opcode)
 
-    col = excel.get_table_col(table, 'Arguments')
+    col = ctx.get_table_col(table, 'Arguments')
     arguments = ''
     for i in range(len(args)):
         if i != 0:
@@ -501,19 +500,19 @@ def record_instruction(wksheet, compiler, curr_row, addr, instr, opcode,
             arguments = args[i]
     wksheet.write_string(curr_row, col, arguments)
 
-    col = excel.get_table_col(table, 'Comments')
+    col = ctx.get_table_col(table, 'Comments')
     wksheet.write_string(curr_row, col, comments)
 
     if (len(instr) > 4):
-        start = excel.get_table_loc(table)[1]
-        end = excel.get_table_loc(table)[3]
+        start = ctx.get_table_loc(table)[1]
+        end = ctx.get_table_loc(table)[3]
         cell_range = CELL_NAME[(curr_row, start)] + ':' \
             + CELL_NAME[(curr_row, end)]
-        format_dict = {'type': 'no_errors', 'format': excel.red_format}
+        format_dict = {'type': 'no_errors', 'format': ctx.red_format}
         wksheet.conditional_format(cell_range, format_dict)
 
 
-def record_riscv_totals(wksheet, compiler, original, reductions):
+def record_riscv_totals(ctx, wksheet, compiler, original, reductions):
     """ Write out the RISC-V function totals to the Totals table. """
     if (compiler == 'rvgcc'):
         table = RVGCC_TOTALS_TABLE
@@ -521,33 +520,33 @@ def record_riscv_totals(wksheet, compiler, original, reductions):
     for instr in reductions.keys():
         func_reduction += reductions[instr]
     # Write out the function size and potential reduction
-    cell = excel.get_table_cell(table, 'Bytes', 'Total')
-    wksheet.write_number(cell, original, excel.bold_light_format)
-    cell = excel.get_table_cell(table, 'Bytes', 'Reduction')
-    wksheet.write_number(cell, func_reduction, excel.bold_light_format)
+    cell = ctx.get_table_cell(table, 'Bytes', 'Total')
+    wksheet.write_number(cell, original, ctx.bold_light_format)
+    cell = ctx.get_table_cell(table, 'Bytes', 'Reduction')
+    wksheet.write_number(cell, func_reduction, ctx.bold_light_format)
 
     # Write out indiv. compact instruction names and reductions
     for instr_name in reductions.keys():
-        cell = excel.get_table_cell(table,
-                                    'Instruction', instr_name)
-        wksheet.write_string(cell, instr_name, excel.light_bg_format)
-        cell = excel.get_table_cell(table, 'Bytes', instr_name)
+        cell = ctx.get_table_cell(table,
+                                  'Instruction', instr_name)
+        wksheet.write_string(cell, instr_name, ctx.light_bg_format)
+        cell = ctx.get_table_cell(table, 'Bytes', instr_name)
         wksheet.write_number(cell, reductions[instr_name],
-                             excel.light_bg_format)
+                             ctx.light_bg_format)
 
     # Calculate and write out potential final size of the function
     est = original - func_reduction
-    cell = excel.get_table_cell(table, 'Bytes', 'Final Estimate')
-    wksheet.write_number(cell, est, excel.bold_light_format)
+    cell = ctx.get_table_cell(table, 'Bytes', 'Final Estimate')
+    wksheet.write_number(cell, est, ctx.bold_light_format)
 
 
-def record_arm_totals(wksheet, bytes):
+def record_arm_totals(ctx, wksheet, bytes):
     """ Write out the function totals to the 'ARM Totals' table. """
-    cell = excel.get_table_cell(ARM_TOTALS_TABLE, 'Bytes', 'Total')
-    wksheet.write_number(cell, bytes, excel.bold_light_format)
+    cell = ctx.get_table_cell(ARM_TOTALS_TABLE, 'Bytes', 'Total')
+    wksheet.write_number(cell, bytes, ctx.bold_light_format)
 
 
-def record_comments(wksheet, compiler, curr_row, instr, args):
+def record_comments(ctx, wksheet, compiler, curr_row, instr, args):
     """
     Write out comments for a single compact instruction to the following cols:
             - 'Compact version', 'Implementation', 'Offset size', 'Rules'
@@ -555,9 +554,9 @@ def record_comments(wksheet, compiler, curr_row, instr, args):
     if (compiler == 'rvgcc'):
         table = RVGCC_TABLE
 
-    ver_col = excel.get_table_col(table, 'Compact version')
-    impl_col = excel.get_table_col(table, 'Implementation')
-    off_col = excel.get_table_col(table, 'Offset size')
+    ver_col = ctx.get_table_col(table, 'Compact version')
+    impl_col = ctx.get_table_col(table, 'Implementation')
+    off_col = ctx.get_table_col(table, 'Offset size')
 
     ver_text = ''
     impl_text = ''
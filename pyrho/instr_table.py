@@ -0,0 +1,362 @@
+"""
+Columnar Instruction Table
+
+The InstrTable class stores the parsed instructions of a disassembly file as
+typed arrays (one per column), rather than as a tuple of strings for each
+instruction. Opcodes and registers are stored by their ids in symbols.py, and
+other text which is repeated (arguments and comments) is stored once per
+table and referred to by id.
+
+"""
+
+import array
+import sys
+import threading
+from .constants import RV32_INSTR_FORMATS
+from . import decoder
+from . import symbols
+
+# No register, or no target address
+NONE = -1
+
+# Typecodes of the array columns
+#   Key: column name
+#   Val: array typecode
+COLUMNS = {
+    'addr':     'Q',    # memory address of the instruction
+    'code':     'Q',    # machine code of the instruction
+    'size':     'B',    # size of the instruction (in bytes)
+    'opcode':   'H',    # opcode id (see symbols.py)
+    'func':     'L',    # function index (see config.read_config())
+    'args':     'L',    # arguments id (see InstrTable.strings)
+    'comments': 'L',    # comments id (see InstrTable.strings)
+    # Decomposed arguments, filled in when first used (see column()), from
+    #   the machine code for RISC-V (see decoder.py)
+    'rd':       'h',    # register ids (see symbols.py)
+    'rs1':      'h',
+    'rs2':      'h',
+    'imm':      'q',    # immediate/offset (0 if none)
+    'target':   'q',    # address in the comments, e.g. of a branch target
+}
+OPERAND_COLUMNS = ['rd', 'rs1', 'rs2', 'imm', 'target']
+
+
+def parse_imm(text):
+    """ Returns the value of an immediate argument (None if not a number). """
+    text = text.lstrip('#')
+    try:
+        if (text.find('0x') != -1):
+            return int(text, 16)
+        return int(text)
+    except ValueError:
+        return None
+
+
+def parse_target(args, comments):
+    """
+    Returns the address referred to by the comments of an instruction.
+
+    Examples:
+        - lw  a5,-1816(gp) # 127f4              target = 0x127f4
+        - bne a5,a4,10090 <main+0x1c>           target = 0x10090
+        - ldr r3, [pc, #20] ; (a4 <main+0x14>)  target = 0xa4
+    """
+    try:
+        if (comments[:1] == '#'):
+            return int(comments[1:].strip(), 16)
+        if (comments[:1] == '<'):
+            return int(args[-1], 16)
+        if (comments[:1] == '('):
+            return int(comments[1:].split()[0], 16)
+        # Arm calls, e.g. bl 0 <main>
+        if args and (args[-1].find(' <') != -1):
+            return int(args[-1].split()[0], 16)
+    except (ValueError, IndexError):
+        pass
+    return NONE
+
+
+def hex_values(lst):
+    """ Returns the values of a list of hex strings (0 if not valid). """
+    try:
+        values = [int(x, 16) for x in lst]
+    except ValueError:
+        values = []
+        for x in lst:
+            try:
+                values.append(int(x, 16))
+            except ValueError:
+                values.append(0)
+    # Must fit in the array columns
+    return [x if (0 <= x < 1 << 64) else 0 for x in values]
+
+
+class InstrTable:
+    def __init__(self, compiler):
+        self.compiler = compiler
+        self.riscv = (compiler[:2] == 'rv')
+        for (col, typecode) in COLUMNS.items():
+            setattr(self, col, array.array(typecode))
+        # Arguments and comments text stored by id, with the reverse lookup
+        self.strings = []
+        self.string_ids = {}
+        # Rows of each function
+        #   Key: function index
+        #   Val: (first row, last row + 1)
+        self.funcs = {}
+        # Original tuples of rows which the columns cannot reproduce
+        #   Key: row
+        #   Val: parsed instruction (see ParseRules.scan_*_instruction())
+        self.raw = {}
+        # Decomposed arguments (see decompose())
+        #   Key: (opcode id, arguments id, comments id)
+        #   Val: (rd, rs1, rs2, imm, target)
+        self.operands = {}
+        # Held while rows or operand columns are added, so that the table can
+        #   be shared by threads (e.g. building several workbooks at once)
+        self.lock = threading.RLock()
+        # Estimated memory (see nbytes()), with the sizes it was estimated at
+        self.memory = (None, 0)
+
+    def __len__(self):
+        return len(self.addr)
+
+    def nbytes(self):
+        """
+        Returns an estimate of the memory used by the table (in bytes), to
+        limit the tables kept in memory (see parser.keep_table()).
+        """
+        sizes = (len(self.addr), len(self.strings), len(self.raw),
+                 len(self.operands), len(self.rd))
+        if (self.memory[0] != sizes):
+            nbytes = 0
+            for col in COLUMNS.keys():
+                column = getattr(self, col)
+                nbytes += column.itemsize * len(column)
+            # Each string is also referred to by string_ids
+            for text in self.strings:
+                nbytes += sys.getsizeof(text) + 2 * 8
+            nbytes += sys.getsizeof(self.string_ids)
+            for row in self.raw.values():
+                nbytes += sys.getsizeof(row) + sum(sys.getsizeof(x) for x in row)
+            nbytes += sys.getsizeof(self.raw)
+            # Keys and values are tuples of small numbers
+            nbytes += len(self.operands) * 2 * sys.getsizeof((0,) * 5)
+            nbytes += sys.getsizeof(self.operands)
+            self.memory = (sizes, nbytes)
+        return self.memory[1]
+
+    def intern(self, text):
+        """ Returns the id of a string (arguments or comments). """
+        if text not in self.string_ids:
+            self.string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return self.string_ids[text]
+
+    def extend(self, fcnt, rets):
+        """
+        Adds the parsed instructions (see ParseRules.scan_*_instruction()) of
+        function index fcnt as new rows.
+        """
+        start = len(self.addr)
+        self.funcs[fcnt] = (self.funcs.get(fcnt, (start,))[0],
+                            start + len(rets))
+        if not rets:
+            return
+        if (self.compiler == 'rviar'):
+            rets = [ret + ('',) for ret in rets]
+        (addrs, instrs, sizes, opcodes, args, comments) = zip(*rets)
+        texts = [','.join(x) for x in args]
+        addr_values = hex_values(addrs)
+        code_values = hex_values(instrs)
+        for opcode in set(opcodes).difference(symbols.opcode_ids):
+            symbols.opcode_id(opcode)
+        for text in set(texts + list(comments)).difference(self.string_ids):
+            self.intern(text)
+
+        self.addr.extend(addr_values)
+        self.code.extend(code_values)
+        self.size.extend([len(x) // 2 for x in instrs])
+        self.opcode.extend([symbols.opcode_ids[x] for x in opcodes])
+        self.func.extend([fcnt] * len(rets))
+        self.args.extend([self.string_ids[x] for x in texts])
+        self.comments.extend([self.string_ids[x] for x in comments])
+
+        # Keep the originals of any rows which cannot be reproduced by row()
+        if (['%x' % x for x in addr_values] != list(addrs)) \
+                or any([len(x) % 2 for x in instrs]) \
+                or (['%0*x' % (len(x), y) for (x, y) in
+                     zip(instrs, code_values)] != list(instrs)) \
+                or ([x.count(',') for x in texts]
+                    != [max(len(x) - 1, 0) for x in args]):
+            for i in range(len(rets)):
+                ret = self.row(start + i)
+                if (ret != rets[i][:len(ret)]):
+                    self.raw[start + i] = rets[i][:len(ret)]
+
+    def append(self, other):
+        """
+        Adds the rows of another table (e.g. parsed by a worker process, see
+        load()) after the rows of this one.
+        """
+        start = len(self.addr)
+        strings = [self.intern(text) for text in other.strings]
+        for col in ['addr', 'code', 'size', 'opcode', 'func']:
+            getattr(self, col).extend(getattr(other, col))
+        self.args.extend([strings[i] for i in other.args])
+        self.comments.extend([strings[i] for i in other.comments])
+        for (fcnt, (first, stop)) in other.funcs.items():
+            self.funcs[fcnt] = (first + start, stop + start)
+        for (row, ret) in other.raw.items():
+            self.raw[row + start] = ret
+
+    def column(self, col):
+        """
+        Returns the array of a column, decomposing the arguments of any rows
+        not yet done for the operand columns.
+        """
+        if (col in OPERAND_COLUMNS) and (len(self.rd) < len(self.addr)):
+            with self.lock:
+                self.decompose_rows()
+        return getattr(self, col)
+
+    def decompose_rows(self):
+        """ Fills in the operand columns of the rows not yet done. """
+        if (len(self.rd) < len(self.addr)):
+            start = len(self.rd)
+            ops = []
+            for i in range(start, len(self.addr)):
+                key = (self.opcode[i], self.args[i], self.comments[i])
+                if key not in self.operands:
+                    self.operands[key] = self.decompose(*key)
+                ops.append(self.operands[key])
+            if self.riscv:
+                # Registers and immediates of RISC-V instructions are taken
+                #   from the machine code wherever it can be decoded
+                fields = decoder.decode_all(self.code[start:])
+                for (i, decoded) in enumerate(fields):
+                    if decoded is not None:
+                        ops[i] = self.decoded_operands(decoded) + ops[i][4:]
+            (rd, rs1, rs2, imm, target) = zip(*ops)
+            self.rd.extend(rd)
+            self.rs1.extend(rs1)
+            self.rs2.extend(rs2)
+            self.imm.extend(imm)
+            self.target.extend(target)
+
+    def decompose(self, opcode, args, comments):
+        """
+        Decomposes the arguments of an instruction (by opcode, arguments and
+        comments ids).
+
+        Returns a tuple of register ids (rd, rs1, rs2), the immediate/offset
+        and the target address (see parse_target()).
+        """
+        opcode = symbols.OPCODES[opcode]
+        args = self.strings[args].split(',') if self.strings[args] else []
+        comments = self.strings[comments]
+        target = parse_target(args, comments)
+        # Branch/call targets are the last argument
+        if (comments[:1] == '<') or (args and args[-1].find(' <') != -1):
+            args = args[:-1]
+        regs = []
+        base = NONE
+        imm = 0
+        for arg in args:
+            arg = arg.strip('[]{}!')
+            if (arg[-1:] == ')') and (arg.find('(') != -1):
+                # Memory offset, e.g. -1816(gp)
+                (offset, reg) = arg[:-1].split('(', 1)
+                base = symbols.register_id(reg)
+                value = parse_imm(offset)
+            elif (arg[:1] in '#-0123456789'):
+                value = parse_imm(arg)
+            else:
+                regs.append(symbols.register_id(arg))
+                continue
+            if (value is not None) and (-1 << 63 <= value < 1 << 63):
+                imm = value
+        regs += [NONE, NONE, NONE]
+        # Stores and branches have no destination register
+        fmt = RV32_INSTR_FORMATS.get(opcode) if self.riscv else None
+        if fmt and (fmt[0] in RV32_INSTR_FORMATS):
+            fmt = RV32_INSTR_FORMATS[fmt[0]]
+        if fmt and (fmt[0] in ('S', 'B')):
+            (rd, rs2) = (NONE, regs[0])
+            rs1 = base if (base != NONE) else regs[1]
+        elif (base != NONE):
+            (rd, rs1, rs2) = (regs[0], base, NONE)
+        else:
+            (rd, rs1, rs2) = regs[:3]
+        if not (-1 << 63 <= target < 1 << 63):
+            target = NONE
+        return (rd, rs1, rs2, imm, target)
+
+    def decoded_operands(self, decoded):
+        """
+        Returns a tuple of register ids (rd, rs1, rs2) and the immediate of a
+        decoded RISC-V instruction (see decoder.py).
+        """
+        (opcode, rd, rs1, rs2, imm) = decoded
+        regs = tuple(NONE if (r is None) else symbols.register_id(r)
+                     for r in (rd, rs1, rs2))
+        return regs + (imm,)
+
+    def row(self, i):
+        """
+        Returns the parsed instruction of row i as a tuple of text (with the
+        size in bytes as a float, as parsed from the disassembly).
+        """
+        if i in self.raw:
+            return self.raw[i]
+        size = self.size[i]
+        args = self.strings[self.args[i]]
+        ret = ('%x' % self.addr[i], '%0*x' % (2 * size, self.code[i]),
+               float(size), symbols.OPCODES[self.opcode[i]],
+               args.split(',') if args else [])
+        if (self.compiler == 'rviar'):
+            return ret
+        return ret + (self.strings[self.comments[i]],)
+
+    def rows(self, fcnt):
+        """ Generator over the parsed instructions of function index fcnt. """
+        (start, stop) = self.funcs.get(fcnt, (0, 0))
+        for i in range(start, stop):
+            yield self.row(i)
+
+    def func_size(self, fcnt):
+        """ Returns the size (in bytes) of the instructions of a function. """
+        (start, stop) = self.funcs.get(fcnt, (0, 0))
+        if (start == stop):
+            return 0
+        return float(sum(self.size[start:stop]))
+
+    def dump(self):
+        """ Returns the table as a dictionary (for marshal, see load()). """
+        # Opcode and register names, since their ids may differ between runs
+        data = {'compiler': self.compiler, 'opcodes': symbols.OPCODES,
+                'registers': symbols.REGISTERS, 'strings': self.strings,
+                'funcs': self.funcs, 'raw': self.raw}
+        for col in COLUMNS.keys():
+            data[col] = getattr(self, col).tobytes()
+        return data
+
+
+def load(data):
+    """ Returns the InstrTable of a dictionary created by InstrTable.dump(). """
+    table = InstrTable(data['compiler'])
+    for col in COLUMNS.keys():
+        getattr(table, col).frombytes(data[col])
+    table.strings = data['strings']
+    table.string_ids = {text: i for (i, text) in enumerate(table.strings)}
+    table.funcs = data['funcs']
+    table.raw = data['raw']
+    # Map the saved opcode and register ids to the ones of this run
+    opcodes = [symbols.opcode_id(name) for name in data['opcodes']]
+    table.opcode = array.array('H', [opcodes[i] for i in table.opcode])
+    registers = [symbols.register_id(name) for name in data['registers']]
+    for col in ['rd', 'rs1', 'rs2']:
+        column = getattr(table, col)
+        setattr(table, col, array.array('h', [registers[i] if (i != NONE)
+                                              else NONE for i in column]))
+    return table
@@ -19,10 +19,12 @@ Software Execution:
     * Select desired options in constants.py
     * Create the default configuration files for all benchmarks (see below)
         * Edit these files to select desired functions to analyze for code size
-    * Execute on the command line:
+    * Execute on the command line (bin/pyrho, or python -m pyrho.main from
+        the parent directory of pyrho/):
 
 usage: main.py [-h] [-c] [-a] [--armbuild ARMBUILD] [--rvbuild RVBUILD]
-               [-o OUTFILE]
+               [-o OUTFILE] [-j JOBS] [--shard SHARD] [--run-id RUN_ID] [-w]
+               [--serve PORT]
                benchmark
 
 PyRho, A Code Density Analyzer
@@ -35,12 +37,32 @@ optional arguments:
   -c, --configure       create the default configuration files for function
                         selection per benchmark
   -a, --all             analyze all supported benchmarks
-  --armbuild ARMBUILD   (optional, default: armcc) input the desired Arm build
-                        for individual or baseline analysis
+  --armbuild ARMBUILD   (optional, default: armcc) input the desired Arm
+                        build(s), separated by commas, for individual or
+                        baseline analysis
   --rvbuild RVBUILD     (optional, default: rvgcc) input the desired RISC-V
-                        build for individual or baseline analysis
+                        build(s), separated by commas, for individual or
+                        baseline analysis
   -o OUTFILE, --outfile OUTFILE
                         (optional) filename for the output excel file
+  -j JOBS, --jobs JOBS  (optional, default: 1) number of worker processes to
+                        create the configuration files and scan the
+                        disassembly files with (with --configure or --all),
+                        or to parse each disassembly file with
+  --shard SHARD         (optional, with --all) i/N to analyze only shard i (of
+                        1 to N) of the benchmark builds, balanced by file
+                        size
+  --run-id RUN_ID       (optional, with --shard) identifies the run which the
+                        shards belong to (e.g. a CI pipeline id), so that
+                        only the results of shards of the same run are
+                        combined
+  -w, --watch           (optional) once analyzed, keep analyzing the
+                        benchmark(s) again whenever their disassembly or
+                        function selection files change
+  --serve PORT          (optional) keep running as a server on
+                        http://127.0.0.1:PORT, answering JSON analyze requests
+                        for the benchmarks in the benchmark path (see
+                        serve.py)
 
 """
 # Built-in libraries to handle command line inputs/outputs/execution results
@@ -50,100 +72,164 @@ import traceback
 import re
 
 # Supplementary python scripts
-import analyze
-import config
-from constants import *
-
-""" Command Line Inputs """
-
-# Definition of expected command line inputs
-parser = argparse.ArgumentParser(description='PyRho, A Code Density Analyzer')
-parser.add_argument('benchmark', help='path to benchmark(s)')
-parser.add_argument('-c', '--configure', action='store_true', default=False,
-                    help='create the default configuration files for function selection per benchmark')
-parser.add_argument('-a', '--all', action='store_true', default=False,
-                    help='analyze all supported benchmarks')
-parser.add_argument('--armbuild', default='armcc', required=False, \
-    help='(optional, default: armcc) input the desired Arm build for individual or baseline analysis')
-parser.add_argument('--rvbuild', default='rvgcc', required=False, \
-    help='(optional, default: rvgcc) input the desired RISC-V build for individual or baseline analysis')
-parser.add_argument('-o', '--outfile', required=False, default=None,
-                    help='(optional) filename for the output excel file')
-
-# Capture command line inputs
-args = parser.parse_args()
-benchmarkpath = vars(args)['benchmark']
-configureflag = vars(args)['configure']
-allflag = vars(args)['all']
-armbuild = vars(args)['armbuild']
-rvbuild = vars(args)['rvbuild']
-output_file = vars(args)['outfile']
-
-""" Main Code """
-failure = False
-try:
-    if configureflag:
-        # Create default configuration files for all benchmarks
-        # User MUST edit these to enable function(s) for code size analysis
-        config.create_configurations(benchmarkpath)
-        print('\nNew function selection files created for all benchmarks. Please review and select function(s) to parse.')
-        exit(0)
-    else:
-        # Create the results directory if it does not already exist
-        outdir = os.path.join(os.getcwd(), 'results')
-        if not os.path.isdir(outdir):
-            os.makedirs(outdir)
-        # Create the config directory within the results dir also
-        configdir = os.path.join(os.getcwd(), outdir, 'config')
-        if not os.path.isdir(configdir):
-            os.makedirs(configdir)
-
-        if allflag:
-            # If analyzing all benchmarks, get a list (all subdirs of benchmarkpath)
-            filedirs = os.listdir(benchmarkpath)
-            benchmarks = [f for f in filedirs if os.path.isdir(os.path.join(benchmarkpath, f))]
-            benchmarks.sort()
-            # Check if any benchmarks are missing configuration files
-            configmissing = []
-            for benchmark in benchmarks:
+from . import analyze
+from . import config
+from . import serve
+from . import watch
+from .constants import *
+
+def main(argv=None):
+    """
+    Runs PyRho with the command line arguments (sys.argv if argv is None).
+
+    Returns True if complete, or False if there was an error.
+    """
+    """ Command Line Inputs """
+
+    # Definition of expected command line inputs
+    parser = argparse.ArgumentParser(description='PyRho, A Code Density Analyzer')
+    parser.add_argument('benchmark', help='path to benchmark(s)')
+    parser.add_argument('-c', '--configure', action='store_true', default=False,
+                        help='create the default configuration files for function selection per benchmark')
+    parser.add_argument('-a', '--all', action='store_true', default=False,
+                        help='analyze all supported benchmarks')
+    parser.add_argument('--armbuild', default='armcc', required=False, \
+        help='(optional, default: armcc) input the desired Arm build(s), separated by commas, for individual or baseline analysis')
+    parser.add_argument('--rvbuild', default='rvgcc', required=False, \
+        help='(optional, default: rvgcc) input the desired RISC-V build(s), separated by commas, for individual or baseline analysis')
+    parser.add_argument('-o', '--outfile', required=False, default=None,
+                        help='(optional) filename for the output excel file')
+    parser.add_argument('-j', '--jobs', type=int, required=False, default=1,
+                        help='(optional, default: 1) number of worker processes to create the configuration files and scan the disassembly files with (with --configure or --all), or to parse each disassembly file with')
+    parser.add_argument('--shard', required=False, default=None,
+                        help='(optional, with --all) i/N to analyze only shard i (of 1 to N) of the benchmark builds, balanced by file size')
+    parser.add_argument('--run-id', required=False, default='',
+                        help='(optional, with --shard) identifies the run which the shards belong to (e.g. a CI pipeline id), so that only the results of shards of the same run are combined')
+    parser.add_argument('-w', '--watch', action='store_true', default=False,
+                        help='(optional) once analyzed, keep analyzing the benchmark(s) again whenever their disassembly or function selection files change')
+    parser.add_argument('--serve', type=int, required=False, default=None, metavar='PORT',
+                        help='(optional) keep running as a server on http://127.0.0.1:PORT, answering JSON analyze requests for the benchmarks in the benchmark path (see serve.py)')
+
+    # Capture command line inputs
+    args = parser.parse_args(argv)
+    benchmarkpath = vars(args)['benchmark']
+    configureflag = vars(args)['configure']
+    allflag = vars(args)['all']
+    armbuilds = [b for b in vars(args)['armbuild'].split(',') if b != '']
+    rvbuilds = [b for b in vars(args)['rvbuild'].split(',') if b != '']
+    if (len(armbuilds) == 0) or (len(rvbuilds) == 0):
+        parser.error('arguments --armbuild/--rvbuild: expected at least one build')
+    output_file = vars(args)['outfile']
+    jobs = vars(args)['jobs']
+    shard = vars(args)['shard']
+    port = vars(args)['serve']
+    watchflag = vars(args)['watch']
+    if watchflag and (shard is not None):
+        parser.error('argument --watch: not allowed with argument --shard')
+    if shard is not None:
+        match = re.fullmatch(r'(\d+)/(\d+)', shard)
+        if (match is None) or not (1 <= int(match.group(1)) <= int(match.group(2))):
+            parser.error('argument --shard: expected i/N with 1 <= i <= N')
+        shard = (int(match.group(1)), int(match.group(2)), vars(args)['run_id'])
+
+    """ Main Code """
+    failure = False
+    try:
+        if configureflag:
+            # Create default configuration files for all benchmarks
+            # User MUST edit these to enable function(s) for code size analysis
+            config.create_configurations(benchmarkpath, jobs)
+            print('\nNew function selection files created for all benchmarks. Please review and select function(s) to parse.')
+            return True
+        elif port is not None:
+            # Answer analyze requests until interrupted
+            serve.serve(benchmarkpath, port, jobs)
+            return True
+        else:
+            # Create the results directory if it does not already exist
+            outdir = os.path.join(os.getcwd(), 'results')
+            if not os.path.isdir(outdir):
+                os.makedirs(outdir)
+            # Create the config directory within the results dir also
+            configdir = os.path.join(os.getcwd(), outdir, 'config')
+            if not os.path.isdir(configdir):
+                os.makedirs(configdir)
+
+            if allflag:
+                # If analyzing all benchmarks, get a list (all subdirs of benchmarkpath)
+                filedirs = os.listdir(benchmarkpath)
+                benchmarks = [f for f in filedirs if os.path.isdir(os.path.join(benchmarkpath, f))]
+                benchmarks.sort()
+                # Check if any benchmarks are missing configuration files
+                configmissing = []
+                for benchmark in benchmarks:
+                    masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
+                    if not os.path.exists(masteropt):
+                        configmissing.append(benchmark)
+                # If so, create the missing ones and prompt the user to edit them
+                if len(configmissing) > 0:
+                    config.create_configurations(benchmarkpath, jobs, configmissing)
+                    print('\nNew function selection file(s) created for [' + ','.join(configmissing) + ']. Please review and select function(s) to parse.')
+                    return True
+                # Create or update the config files of every build (only of
+                #   this shard, which no other shard writes) at once
+                tasks = analyze.list_tasks(benchmarkpath, benchmarks)
+                if shard is not None:
+                    tasks = analyze.shard_tasks(tasks, armbuilds, rvbuilds, shard)
+                analyze.update_configs(tasks, jobs)
+                # Otherwise, analyze each individually (only those of this shard)
+                #   (keeping the results to reuse in the summary workbook)
+                keys = [task[:2] for task in tasks]
+                # Reading the files of the next benchmarks ahead with one job
+                #   (see analyze.Prefetcher)
+                ahead = [task for task in tasks if task[1] in rvbuilds + armbuilds] \
+                    if (jobs == 1) else []
+                scans = {}
+                with analyze.Prefetcher(ahead) as prefetcher:
+                    for benchmark in benchmarks:
+                        if (shard is not None) and ((benchmark, rvbuilds[0]) not in keys):
+                            continue
+                        prefetcher.use(benchmark)
+                        pth = os.path.join(benchmarkpath, benchmark)
+                        scans.update(analyze.multiple_benchmark(armbuilds, rvbuilds, pth, None, jobs))
+                # Also, analyze all and create the summary workbook(s)
+                scans = analyze.all_benchmarks(armbuilds, rvbuilds, benchmarkpath, output_file, jobs, scans, shard)
+            else:
+                # For a single benchmark...
+                # Extract benchmark name
+                if benchmarkpath[-1] != '/':
+                    benchmarkpath += '/'
+                lin_split = re.split('/', benchmarkpath[::-1], maxsplit=2)
+                benchmark = lin_split[-2][::-1]
+                # Check if the configuration file exists
                 masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
+                # If not, create it and prompt the user to edit
                 if not os.path.exists(masteropt):
-                    configmissing.append(benchmark)
-            # If so, create the missing ones and prompt the user to edit them
-            if len(configmissing) > 0:
-                for benchmark in configmissing:
-                    config.create_configuration(os.path.join(benchmarkpath, benchmark))
-                print('\nNew function selection file(s) created for [' + ','.join(configmissing) + ']. Please review and select function(s) to parse.')
-                exit(0)
-            # Otherwise, analyze all and create the summary workbook
-            analyze.all_benchmarks(armbuild, rvbuild, benchmarkpath, output_file)
-            # Also, analyze each individually
-            for benchmark in benchmarks:
-                pth = os.path.join(benchmarkpath, benchmark)
-                analyze.single_benchmark(armbuild, rvbuild, pth, None)
-        else:
-            # For a single benchmark...
-            # Extract benchmark name
-            if benchmarkpath[-1] != '/':
-                benchmarkpath += '/'
-            lin_split = re.split('/', benchmarkpath[::-1], maxsplit=2)
-            benchmark = lin_split[-2][::-1]
-            # Check if the configuration file exists
-            masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
-            # If not, create it and prompt the user to edit
-            if not os.path.exists(masteropt):
-                config.create_configuration(benchmarkpath)
-                print('\nNew function selection file created for ' + benchmark + '. Please review and select function(s) to parse.')
-                exit(0)
-            # Otherwise, analyze the benchmark
-            analyze.single_benchmark(armbuild, rvbuild, benchmarkpath, output_file)
-
-except Exception:
-    failure = True
-    print('\n\n')
-    traceback.print_exc()
-    print('\n\n')
-
-finally:
-    if (failure):
-        print('Incomplete! See error or try again.')
+                    config.create_configuration(benchmarkpath)
+                    print('\nNew function selection file created for ' + benchmark + '. Please review and select function(s) to parse.')
+                    return True
+                # Otherwise, analyze the benchmark (for each combination of builds)
+                scans = analyze.multiple_benchmark(armbuilds, rvbuilds, benchmarkpath, output_file, jobs)
+
+            # Show (and keep for ordering the scans) the duration of each file
+            analyze.print_timings()
+            analyze.save_timings()
+
+            # Keep analyzing the benchmark(s) as their files change
+            if watchflag:
+                watch.watch(armbuilds, rvbuilds, benchmarkpath, output_file, jobs, allflag, scans)
+
+    except Exception:
+        failure = True
+        print('\n\n')
+        traceback.print_exc()
+        print('\n\n')
+
+    finally:
+        if (failure):
+            print('Incomplete! See error or try again.')
+    return not failure
+
+
+if __name__ == '__main__':
+    main()
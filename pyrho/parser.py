@@ -9,37 +9,660 @@ Author: Jennifer Hellar
 """
 
 
+import collections
+import concurrent.futures
+import hashlib
+import io
+import json
+import locale
+import marshal
+import mmap
+import multiprocessing
+import os
 import re
-from constants import *
-import excel
+import threading
+from .constants import *
+from . import instr_table
+
+# An RVGCC instruction line, split into: address (without the ':'), machine
+#   code, opcode, arguments, and comments (beginning with '<' or '#')
+RVGCC_INSTR = re.compile(r'\s*([^\s,]*)[^\s,]\s+([^\s,]+)\s+([^\s,]+)\s*'
+                         r'([^\s<]*)(?:\s+((?:<|#(?!\S))[^\s,]*(?: [^\s,]+)*))?'
+                         r'\s*$')
+
+# Data, section headers, and other text within a function that is not code
+SKIPPABLE = re.compile(r'\.(?:word|short|text|iar|\.\.)|Region|file format'
+                       r'|Disassembly')
+
+# Unindented line (possible function header) in the raw bytes of a file
+UNINDENTED = re.compile(rb'\n([^ \t\r\n][^\n]*\n?)')
+
+# Version of the function index format (see ParseRules.get_index())
+INDEX_VERSION = 1
+
+# Function indexes loaded or created during this run
+#   Key: index filename
+#   Val: index (see ParseRules.create_index())
+indexes = {}
+
+# Version of the instruction parsing (see ParseRules.get_table())
+#   Must be incremented whenever the output of scan_*_instruction() changes,
+#   so that previously cached instructions are not used
+PARSER_VERSION = 2
+
+# Instruction tables loaded or created during this run, least recently used
+#   first (see keep_table())
+#   Key: cache filename (without cache_en, (compiler, disassembly filename,
+#       size, modification time))
+#   Val: InstrTable (see ParseRules.get_table())
+caches = collections.OrderedDict()
+caches_lock = threading.Lock()
+
+# Minimum size (in bytes) of the function bodies to parse in each chunk with
+#   more than one job (see ParseRules.parse_chunks())
+CHUNK_SIZE = 1 << 20
+
+
+def process_pool(jobs):
+    """
+    Returns a pool of worker processes. Workers are forked where possible,
+    since starting them any other way re-runs main.py.
+
+    Must not be called while other threads of this process run (e.g. the
+    Arm read of analyze.single_benchmark(), or analyze.Prefetcher), since a
+    lock held by another thread as the workers are forked (e.g. caches_lock
+    or symbols.lock) is never released in the workers.
+    """
+    if ('fork' in multiprocessing.get_all_start_methods()):
+        context = multiprocessing.get_context('fork')
+    else:
+        context = None
+    return concurrent.futures.ProcessPoolExecutor(max_workers=jobs,
+                                                  mp_context=context)
+
+
+def keep_table(key, table):
+    """
+    Keeps an instruction table in memory (see caches), unless another table
+    was kept for the same key first (e.g. by another thread), as the most
+    recently used. The least recently used tables are evicted once the tables
+    use more than CACHE_MEMORY MB (as estimated when they are next used, since
+    they grow as functions are parsed).
+
+    Returns the table kept.
+    """
+    with caches_lock:
+        table = caches.setdefault(key, table)
+        caches.move_to_end(key)
+        nbytes = 0
+        for other in reversed(list(caches.keys())):
+            nbytes += caches[other].nbytes()
+            if (nbytes > CACHE_MEMORY * (1 << 20)) and (other != key):
+                del caches[other]
+    return table
+
+
+def parse_chunk(compiler, assemblyfile, chunk):
+    """
+    Parses a chunk of functions of a disassembly file (in a worker process,
+    see ParseRules.parse_chunks()).
+
+    The chunk is a list of (function index, body offset, body length).
+
+    Returns the InstrTable of the chunk as a dictionary (see
+    InstrTable.dump()).
+    """
+    parse_rules = ParseRules(compiler)
+    table = instr_table.InstrTable(compiler)
+    # Decode the same way as a file opened in text mode
+    encoding = locale.getpreferredencoding(False)
+    with open(assemblyfile, 'rb') as f:
+        for (fcnt, offset, length) in chunk:
+            f.seek(offset)
+            body = f.read(length).decode(encoding)
+            rets = []
+            for line in io.StringIO(body, newline=None):
+                if (parse_rules.classify_line(line) == INSTRUCTION):
+                    rets.append(parse_rules.scan_instruction(line))
+            table.extend(fcnt, rets)
+    return table.dump()
 
 
 class ParseRules:
-    def __init__(self, compiler):
+    def __init__(self, compiler, jobs=1):
         self.compiler = compiler
-
-    def is_func_start(self, line):
-        """ Returns TRUE if input line is the initialization of a function. """
+        # Number of worker processes to parse a file with
+        self.jobs = jobs
+        # Pattern marking the initialization of a function
         if (self.compiler == 'rviar'):
-            res = re.search(r'^\s\s\?*`*[a-zA-Z_]\w+`*:', line)
+            self.func_start = re.compile(r'\s\s\?*`*[a-zA-Z_]\w+`*:')
         else:
-            res = re.search(r'^\w+\s<.+>:', line)
-        return (res is not None)
+            self.func_start = re.compile(r'\w+\s<.+>:')
+        # Parser for the instruction lines
+        if (self.compiler == 'rvgcc'):
+            self.scan_instruction = self.scan_rvgcc_instruction
+        elif (self.compiler == 'rviar'):
+            self.scan_instruction = self.scan_rviar_instruction
+        else:
+            self.scan_instruction = self.scan_arm_instruction
+
+    def classify_line(self, line):
+        """
+        Determines what kind of line of disassembly text this is.
+
+        Returns one of:
+            - FUNC_HEADER: initialization of a function
+            - SKIP: line should not be parsed (data or empty)
+            - INSTRUCTION: anything else
+        """
+        # Instructions are indented, function names are not (except for IAR)
+        first = line[:1]
+        if ((first != ' ' and first != '\t') or (self.compiler == 'rviar')) \
+                and (self.func_start.match(line) is not None):
+            return FUNC_HEADER
+        if (SKIPPABLE.search(line) is not None) or line.isspace() \
+                or (line == ''):
+            return SKIP
+        return INSTRUCTION
+
+    def read_lines(self, assemblyfile, func_opts):
+        """
+        Generator over the lines of a disassembly file which may need parsing.
+
+        Only the function headers and the bodies of the functions selected in
+        func_opts (see config.read_config()) are guaranteed to be returned:
+            - With index_en, the function headers come from the file's index
+                (see get_index()) and the reader seeks directly to each
+                selected function, stopping after the last one.
+            - With mmap_en, the file is memory-mapped and searched as bytes
+                for function headers. Everything outside of the selected
+                functions is skipped without being decoded.
+            - Otherwise, the file is read as text and every line is returned.
+        """
+        # IAR function headers are indented, so they must be read as text
+        if (self.compiler == 'rviar') or (os.path.getsize(assemblyfile) == 0) \
+                or (not index_en and not mmap_en):
+            with open(assemblyfile, 'r') as f:
+                for line in f:
+                    yield line
+            return
+
+        # Decode the same way as a file opened in text mode
+        encoding = locale.getpreferredencoding(False)
+        if index_en:
+            functions = self.get_index(assemblyfile)['functions']
+            # Functions after the last selected (and the header ending it) can
+            #   be skipped entirely
+            selected = [i for i in func_opts.keys() if func_opts[i][1]]
+            if selected:
+                last = min(max(selected) + 2, len(functions))
+            else:
+                last = len(functions)
+            with open(assemblyfile, 'rb') as f:
+                for fcnt in range(last):
+                    (name, header, offset, length, count) = functions[fcnt]
+                    for line in io.StringIO(header):
+                        yield line
+                    # Beginning a function to analyze, so read its body
+                    if (fcnt in func_opts) and func_opts[fcnt][1]:
+                        f.seek(offset)
+                        body = f.read(length).decode(encoding)
+                        for line in io.StringIO(body, newline=None):
+                            yield line
+            return
 
-    def is_skippable(self, line):
+        with open(assemblyfile, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                fcnt = 0    # function index
+                for (header, start, end) in self.find_functions(mm, encoding):
+                    for line in header:
+                        yield line
+                    # Beginning a function to analyze, so decode its body
+                    if (fcnt in func_opts) and func_opts[fcnt][1]:
+                        body = mm[start:end].decode(encoding)
+                        for line in io.StringIO(body, newline=None):
+                            yield line
+                    fcnt += 1
+
+    def read_instructions(self, assemblyfile, func_opts):
+        """
+        Generator over the parsed lines of a disassembly file (see
+        read_table()).
+
+        Yields a tuple for each line of:
+            - Line type (see classify_line())
+            - Line of text (None for instructions)
+            - Parsed instruction (see scan_*_instruction()), None for headers
+
+        Only the function headers and the instructions of the functions
+        selected in func_opts are returned.
+        """
+        (headers, table) = self.read_table(assemblyfile, func_opts)
+        for (line_type, line, idx) in self.read_rows(headers, table,
+                                                     func_opts):
+            if (line_type == FUNC_HEADER):
+                yield (FUNC_HEADER, line, None)
+            else:
+                yield (INSTRUCTION, None, table.row(idx))
+
+    def read_table(self, assemblyfile, func_opts):
+        """
+        Parses the functions selected in func_opts (see config.read_config())
+        of a disassembly file.
+
+        Returns a tuple of:
+            - List of the function headers (by function index)
+            - InstrTable of the instructions (see instr_table.py)
+        """
+        table = self.get_table(assemblyfile)
+        headers = []
+        # Only one thread at a time adds to the table
+        with table.lock:
+            for (line, fcnt) in self.parse_table(assemblyfile, func_opts,
+                                                 table):
+                headers.append(line)
+        return (headers, table)
+
+    def read_rows(self, headers, table, func_opts):
+        """
+        Generator over the lines of a parsed disassembly file (see
+        read_table()), by their rows in the table.
+
+        Yields a tuple for each line of:
+            - Line type (see classify_line())
+            - Line of text (None for instructions)
+            - Row of the instruction in the table, None for headers
+
+        Only the function headers and the instructions of the functions
+        selected in func_opts are returned.
         """
-        Returns TRUE if input line should not be parsed (data or empty).
+        for (fcnt, line) in enumerate(headers):
+            yield (FUNC_HEADER, line, None)
+            if (fcnt in func_opts) and func_opts[fcnt][1]:
+                for idx in range(*table.funcs.get(fcnt, (0, 0))):
+                    yield (INSTRUCTION, None, idx)
+
+    def get_table(self, assemblyfile):
+        """
+        Returns the InstrTable of a disassembly file. With cache_en, the table
+        is saved to results/.cache (by the file hash and PARSER_VERSION), so
+        that the functions in it are not read or parsed again. Otherwise, the
+        table is only kept for this run (e.g. for each combination of builds).
+        Either way, the tables used last are kept in memory (see keep_table()).
+        """
+        if not cache_en:
+            stat = os.stat(assemblyfile)
+            key = (self.compiler, os.path.abspath(assemblyfile), stat.st_size,
+                   stat.st_mtime_ns)
+            table = caches.get(key)
+            if (table is None):
+                table = instr_table.InstrTable(self.compiler)
+            return keep_table(key, table)
+        cachefile = self.get_cache_file(assemblyfile)
+        table = caches.get(cachefile)
+        if (table is None) and os.path.exists(cachefile):
+            with open(cachefile, 'rb') as f:
+                try:
+                    table = instr_table.load(marshal.loads(f.read()))
+                except (EOFError, ValueError, TypeError, KeyError):
+                    # Unreadable (e.g. written by another Python version)
+                    table = None
+        if (table is None):
+            table = instr_table.InstrTable(self.compiler)
+        # The first table of a file is kept if threads load it at once
+        return keep_table(cachefile, table)
+
+    def parse_table(self, assemblyfile, func_opts, table):
         """
-        res = (line.find('.word') != -1) \
-            or (line.find('.short') != -1) \
-            or (line.strip() == '') \
-            or (line.find('.text') != -1) \
-            or (line.find('.iar') != -1) \
-            or (line.find('Region') != -1) \
-            or (line.find('...') != -1) \
-            or (line.find('file format') != -1) \
-            or (line.find('Disassembly') != -1)
-        return res
+        Generator over the function headers of a disassembly file, which adds
+        the instructions of each selected function not yet in the table.
+
+        Yields a tuple for each function of:
+            - Function header (line of text)
+            - Function index
+        The function's instructions are in the table once the next function
+        header is returned (or the generator is done).
+        """
+        # Functions already in the table only need their headers read
+        to_read = {}
+        for i in func_opts.keys():
+            (nm, parse, subfunc) = func_opts[i]
+            to_read[i] = [nm, parse and (i not in table.funcs), subfunc]
+
+        # With more than one job, parse the functions in chunks first
+        new = (self.jobs > 1) and self.parse_chunks(assemblyfile, to_read,
+                                                    table)
+        if new:
+            for i in to_read.keys():
+                to_read[i][1] = False
+
+        parsing = False
+        fcnt = -1   # function index
+        rets = []
+        for line in self.read_lines(assemblyfile, to_read):
+            line_type = self.classify_line(line)
+            if (line_type == FUNC_HEADER):
+                # Done parsing the current function
+                if parsing:
+                    table.extend(fcnt, rets)
+                    rets = []
+                fcnt += 1
+                parsing = to_read.get(fcnt, [None, False])[1]
+                new = new or parsing
+                yield (line, fcnt)
+                continue
+            if parsing and (line_type == INSTRUCTION):
+                rets.append(self.scan_instruction(line))
+        if parsing:
+            table.extend(fcnt, rets)
+
+        # Save any newly parsed functions to the cache
+        if cache_en and new:
+            cachefile = self.get_cache_file(assemblyfile)
+            os.makedirs(os.path.dirname(cachefile), exist_ok=True)
+            # (by process, since the server's workers may save it at once)
+            tmpfile = cachefile + '.' + str(os.getpid()) + '.tmp'
+            with open(tmpfile, 'wb') as f:
+                f.write(marshal.dumps(table.dump()))
+            os.replace(tmpfile, cachefile)
+
+    def parse_chunks(self, assemblyfile, func_opts, table):
+        """
+        Parses the functions selected in func_opts on self.jobs worker
+        processes, in chunks of consecutive functions (of at least
+        CHUNK_SIZE bytes). The chunks are added to the table in file order,
+        so the rows are the same as when parsed one function at a time.
+
+        Returns True if the functions were parsed, or False if the file is
+        too small to split (or cannot be searched as bytes, see read_lines()).
+        """
+        bodies = self.get_bodies(assemblyfile)
+        if (bodies is None):
+            return False
+        selected = [i for i in sorted(func_opts.keys())
+                    if func_opts[i][1] and (i < len(bodies))]
+        total = sum([bodies[i][1] for i in selected])
+        # Several chunks per job, so that the jobs finish close together
+        nchunks = min(self.jobs * 4, total // CHUNK_SIZE)
+        if (nchunks < 2):
+            return False
+        chunks = [[]]
+        size = 0
+        for i in selected:
+            if (size >= total * len(chunks) / nchunks):
+                chunks.append([])
+            chunks[-1].append((i,) + tuple(bodies[i]))
+            size += bodies[i][1]
+
+        with process_pool(self.jobs) as pool:
+            results = pool.map(parse_chunk, [self.compiler] * len(chunks),
+                               [assemblyfile] * len(chunks), chunks)
+            for data in results:
+                table.append(instr_table.load(data))
+        return True
+
+    def get_bodies(self, assemblyfile):
+        """
+        Returns a list of the (offset, length) in bytes of each function body
+        of a disassembly file (see read_lines()), or None if the file must be
+        read as text.
+        """
+        if (self.compiler == 'rviar') or (os.path.getsize(assemblyfile) == 0) \
+                or (not index_en and not mmap_en):
+            return None
+        if index_en:
+            functions = self.get_index(assemblyfile)['functions']
+            return [(offset, length) for (name, header, offset, length, count)
+                    in functions]
+        encoding = locale.getpreferredencoding(False)
+        with open(assemblyfile, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return [(start, end - start) for (header, start, end)
+                        in self.find_functions(mm, encoding)]
+
+    def get_cache_file(self, assemblyfile):
+        """
+        Returns the filename of the parsed instruction cache of a disassembly
+        file, named by the hash of its contents.
+        """
+        return os.path.join(os.getcwd(), 'results', '.cache',
+                            self.get_hash(assemblyfile) + '.' + self.compiler
+                            + '.v' + str(PARSER_VERSION) + '.marshal')
+
+    def get_hash(self, assemblyfile):
+        """
+        Returns the SHA-1 hash of a disassembly file's contents, from its index
+        (see get_index()) if there is one, so that it is only recalculated if
+        the file has changed.
+        """
+        if index_en and (self.compiler != 'rviar') \
+                and (os.path.getsize(assemblyfile) > 0):
+            return self.get_index(assemblyfile)['hash']
+        return self.hash_file(assemblyfile)
+
+    def find_functions(self, mm, encoding):
+        """
+        Generator over the functions in the bytes of a disassembly file.
+
+        Yields a tuple for each function of:
+            - Lines of text of the function header
+            - Start position of the function body (after the header)
+            - End position of the function body (next header or end of file)
+        """
+        header = None
+        for (head, end) in self.find_unindented(mm):
+            lines = io.StringIO(mm[head:end].decode(encoding),
+                                newline=None).readlines()
+            if (self.classify_line(lines[0]) != FUNC_HEADER):
+                continue
+            # Done with the body of the previous function
+            if (header is not None):
+                yield (header, start, head)
+            header = lines
+            start = end
+        # The last function ends at the end of the file
+        if (header is not None):
+            yield (header, start, len(mm))
+
+    def find_unindented(self, mm):
+        """
+        Generator over the (start, end) positions of the unindented lines
+        (including function headers) in the bytes of a disassembly file.
+        """
+        # The first line is not preceded by a newline
+        if (mm[:1] not in (b' ', b'\t', b'\r', b'\n')):
+            yield (0, mm.find(b'\n') + 1 or len(mm))
+        for res in UNINDENTED.finditer(mm):
+            yield res.span(1)
+
+    def get_index_file(self, assemblyfile):
+        """ Returns the filename of the index of a disassembly file. """
+        indexdir = os.path.join(os.getcwd(), 'results', '.index')
+        path = os.path.abspath(assemblyfile)
+        # Name the index after the file (and its full path, to keep apart
+        #   benchmark directories with the same file names)
+        tag = hashlib.sha1(path.encode()).hexdigest()[:8]
+        return os.path.join(indexdir, os.path.basename(path) + '.' + tag
+                            + '.json')
+
+    def read_index(self, indexfile, stat):
+        """
+        Returns the function index saved to indexfile if it is the index of a
+        disassembly file of this size (see get_index()), otherwise None.
+        """
+        index = indexes.get(indexfile)
+        if (index is None) and os.path.exists(indexfile):
+            with open(indexfile, 'r') as f:
+                index = json.load(f)
+        if (index is not None) and (index['version'] == INDEX_VERSION) \
+                and (index['compiler'] == self.compiler) \
+                and (index['size'] == stat.st_size):
+            return index
+        return None
+
+    def get_index(self, assemblyfile):
+        """
+        Returns the function index of a disassembly file, creating it (see
+        create_index()) if it does not exist or is out of date.
+
+        The index is saved to results/.index and is checked against the size
+        and modification time of the file. If only the modification time has
+        changed, the file's hash is checked before recreating the index.
+        """
+        indexfile = self.get_index_file(assemblyfile)
+        path = os.path.abspath(assemblyfile)
+        stat = os.stat(path)
+        index = self.read_index(indexfile, stat)
+        if (index is not None):
+            if (index['mtime'] == stat.st_mtime_ns):
+                indexes[indexfile] = index
+                return index
+            # Touched, but possibly not changed
+            if (index['hash'] == self.hash_file(path)):
+                index['mtime'] = stat.st_mtime_ns
+                self.save_index(indexfile, index)
+                return index
+
+        index = self.create_index(path)
+        self.save_index(indexfile, index)
+        return index
+
+    def get_saved_index(self, assemblyfile):
+        """
+        Returns the saved index of a disassembly file (see get_index()), without
+        reading the file, or None if there is none up to date.
+        """
+        stat = os.stat(assemblyfile)
+        if not index_en or (self.compiler == 'rviar') or (stat.st_size == 0):
+            return None
+        index = self.read_index(self.get_index_file(assemblyfile), stat)
+        if (index is None) or (index['mtime'] != stat.st_mtime_ns):
+            return None
+        return index
+
+    def count_instructions(self, assemblyfile):
+        """
+        Returns the number of instructions in the functions of a disassembly
+        file, from its saved index (see get_saved_index()), or None if there
+        is none up to date.
+        """
+        index = self.get_saved_index(assemblyfile)
+        if (index is None):
+            return None
+        return sum([count for (name, header, offset, length, count)
+                    in index['functions']])
+
+    def prefetch(self, assemblyfile, func_opts=None):
+        """
+        Reads the parts of a disassembly file which are about to be read, so
+        that they are in the file cache of the operating system (e.g. of a
+        network file system) when the file is parsed (see analyze.Prefetcher):
+            - The whole file, if it must be read as text, searched (see
+                read_lines()) or hashed to create its index (see get_index()).
+            - Otherwise, the bodies of the functions selected in func_opts
+                (see config.read_config()), if any, which are not already in
+                the file's InstrTable (see get_table()).
+        """
+        index = self.get_saved_index(assemblyfile)
+        with open(assemblyfile, 'rb') as f:
+            if (index is None):
+                while f.read(1 << 20):
+                    pass
+                return
+            if func_opts is None:
+                return
+            # Loads the cached table too, to be kept for the scan
+            parsed = self.get_table(assemblyfile).funcs
+            functions = index['functions']
+            for fcnt in range(len(functions)):
+                if (fcnt in func_opts) and func_opts[fcnt][1] \
+                        and (fcnt not in parsed):
+                    (name, header, offset, length, count) = functions[fcnt]
+                    f.seek(offset)
+                    f.read(length)
+
+    def create_index(self, assemblyfile):
+        """
+        Scans a disassembly file to create its function index.
+
+        Returns a dictionary of the file size, modification time, and hash,
+        as well as 'functions', a list (in file order) for each function of:
+            - Function name
+            - Function header (text)
+            - Byte offset of the function body
+            - Length of the function body (in bytes)
+            - Number of instructions in the function body
+        """
+        encoding = locale.getpreferredencoding(False)
+        stat = os.stat(assemblyfile)
+        functions = []
+        with open(assemblyfile, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for (header, start, end) in self.find_functions(mm, encoding):
+                    count = 0
+                    body = mm[start:end].decode(encoding)
+                    for line in io.StringIO(body, newline=None):
+                        if (self.classify_line(line) == INSTRUCTION):
+                            count += 1
+                    functions.append([self.get_func_name(header[0]),
+                                      ''.join(header), start, end - start,
+                                      count])
+                file_hash = hashlib.sha1(mm).hexdigest()
+        index = {'version': INDEX_VERSION, 'compiler': self.compiler,
+                 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                 'hash': file_hash, 'functions': functions}
+        return index
+
+    def save_index(self, indexfile, index):
+        """ Writes out a function index (and keeps it for this run). """
+        os.makedirs(os.path.dirname(indexfile), exist_ok=True)
+        # (by process, since other processes may read or save it at once)
+        tmpfile = indexfile + '.' + str(os.getpid()) + '.tmp'
+        with open(tmpfile, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmpfile, indexfile)
+        indexes[indexfile] = index
+
+    def hash_file(self, assemblyfile):
+        """ Returns the SHA-1 hash of a file's contents. """
+        with open(assemblyfile, 'rb') as f:
+            if (os.fstat(f.fileno()).st_size == 0):
+                return hashlib.sha1().hexdigest()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha1(mm).hexdigest()
+
+    def get_func_name(self, line):
+        """
+        Returns the full function name from a line of text which contains a
+        function initialization (see get_func_data()).
+        """
+        lin_split = re.split(' ', line)
+        lin_split[:] = [str(x).strip() for x in lin_split if str(x) != '']
+        # Exclude extra characters <>:
+        return lin_split[1][1:-2]
+
+    def get_wksheet_name(self, full_name):
+        """
+        Returns the short name of a RISC-V function, suitable for naming an
+        Excel worksheet (<30 char), e.g.
+            sglib___rbtree_fix_right_deletion_discrepancy
+                --> fix_right_deletion_discrepancy
+
+        The name only depends on the full name, so the worksheets of the
+        functions selected in a config file are known before the disassembly
+        is scanned (see config.get_wksheet_names()).
+        """
+        if len(full_name) > 30:
+            name = full_name[-30:]
+        else:
+            name = full_name
+        # These are the same for any benchmark
+        if (save_restore_en):
+            if (full_name[0:12] == '__riscv_save'):
+                name = '__riscv_save'
+            elif (full_name[0:15] == '__riscv_restore'):
+                name = '__riscv_restore'
+        return name
 
     def get_func_data(self, line):
         """
@@ -50,37 +673,15 @@ class ParseRules:
         Returns a tuple of:
             - full name (sglib___rbtree_fix_right_deletion_discrepancy)
             - short name (fix_right_deletion_discrepancy) suitable for
-                naming an Excel worksheet
+                naming an Excel worksheet (None for Arm functions, which are
+                recorded in the worksheets of the RISC-V functions, see
+                excel.WorkbookContext.wksheet_names)
         """
-        lin_split = re.split(' ', line)
-        lin_split[:] = [str(x).strip() for x in lin_split if str(x) != '']
-
-        full_name = ''
+        full_name = self.get_func_name(line)
         name = None
         # Choose functions to parse and generate wksheet names (<30 char)
         if (self.compiler[:2] == 'rv'):
-            # Function name
-            full_name = lin_split[1]
-            # Exclude extra characters <>:
-            full_name = full_name[1:-2]
-            if len(full_name) > 30:
-                name = full_name[-30:]
-            else:
-                name = full_name
-            # These are the same for any benchmark
-            if (save_restore_en):
-                if (full_name[0:12] == '__riscv_save'):
-                    name = '__riscv_save'
-                elif (full_name[0:15] == '__riscv_restore'):
-                    name = '__riscv_restore'
-            excel.wksheet_names[full_name] = name
-        elif (self.compiler[:3] == 'arm'):
-            # Function name
-            full_name = lin_split[1]
-            # Exclude extra characters <>:
-            full_name = full_name[1:-2]
-            if full_name in excel.wksheet_names.keys():
-                name = excel.wksheet_names[full_name]
+            name = self.get_wksheet_name(full_name)
         return (full_name, name)
 
     def scan_rvgcc_instruction(self, line):
@@ -97,6 +698,28 @@ class ParseRules:
             - Registers and other arguments (args = [a5, -1816(gp)])
             - Disassembly comments (remainder = '# 127f4')
         """
+        res = RVGCC_INSTR.match(line)
+        if (res is None):
+            # Unusual spacing/punctuation, so split the line up word by word
+            return self.split_rvgcc_instruction(line)
+        (addr, instr, opcode, args, remainder) = res.groups()
+        # Machine code (hex) gives instruction size
+        bytes = len(instr)/2
+        # ret has no additional inputs
+        if (opcode == 'ret'):
+            return (addr, instr, bytes, opcode, [], '')
+        args = args.split(',')
+        if '' in args:
+            args = [x for x in args if x != '']
+        if (remainder is None):
+            remainder = ''
+        return (addr, instr, bytes, opcode, args, remainder)
+
+    def split_rvgcc_instruction(self, line):
+        """
+        Parses an RVGCC instruction line the slow way (see
+        scan_rvgcc_instruction()), for lines RVGCC_INSTR does not match.
+        """
         # Split line by spaces, tabs, and commas (and strip any whitespace)
         lin_split = re.split(r'[ \t,]', line)
         lin_split[:] = [str(x).strip() for x in lin_split if str(x) != '']
@@ -120,13 +743,11 @@ class ParseRules:
                 if (arg[0] == '<') or (arg == '#'):
                     # if comments found, args is everything up to that
                     args = arg_lst[:i]
-                    while i < num_args:  # remainder is everything after
-                        remainder = remainder + ' ' + arg_lst[i]
-                        i += 1
+                    remainder = ' '.join(arg_lst[i:]).strip()
                     break
                 else:
                     args.append(arg)    # if no comments, args is everything
-        return (addr, instr, bytes, opcode, args, remainder.strip())
+        return (addr, instr, bytes, opcode, args, remainder)
 
     def scan_arm_instruction(self, line):
         """
@@ -6,20 +6,22 @@ Author: Jennifer Hellar
 """
 
 
-import importlib
 import os
+import queue
 import re
+import threading
 
 # local scripts
-import excel
-import cx
-import save_restore_xlsx
-import function_xlsx
-from constants import *
-import config
+from . import cx
+from . import decoder
+from . import symbols
+from . import save_restore_xlsx
+from . import function_xlsx
+from .constants import *
+from . import config
 
 # import the class ParseRules from parser.py
-ParseRules = getattr(importlib.import_module('parser'), 'ParseRules')
+from .parser import ParseRules
 
 
 def update_tot(t_red, t_pair, t_instr, t_lbl, f_red, f_pair, f_instr, f_lbl):
@@ -46,605 +48,319 @@ def update_tot(t_red, t_pair, t_instr, t_lbl, f_red, f_pair, f_instr, f_lbl):
     return (t_red, t_pair, t_instr, t_lbl)
 
 
-def scan_riscv_file(compiler, assemblyfile, optfile):
+# Sub-types of 16-bit instructions which GCC does not differentiate
+#   Key: opcode (as disassembled)
+#   Val: list of sub-types
+RVC_SUBTYPES = {
+    'c.addi':   ['c.addi16sp', 'c.addi4spn'],
+    'c.sw':     ['c.swsp'],
+    'c.lw':     ['c.lwsp'],
+}
+
+
+def get_rvc_subtype(opcode, instr, args):
     """
-    Opens and scans the RISC-V disassembly file to extract data and update
-    Excel workbook.
+    Decodes the sub-type of a 16-bit instruction (see RVC_SUBTYPES) from its
+    machine code.
 
-    Arguments:
-        - compiler          RISC-V toolchain used to compile the benchmark
-        - assemblyfile      RISC-V disassembly file
-        - optfile           RISC-V config file; selects the functions to parse
+    Returns a tuple of the opcode and arguments to record for the sub-type.
+    """
+    try:
+        subtype = decoder.decode(int(instr, 16))
+    except ValueError:
+        subtype = None
+    if (subtype is None) or (subtype[0] not in RVC_SUBTYPES[opcode]):
+        return (opcode, args)
+    subtype = subtype[0]
+    if (subtype == 'c.addi16sp'):
+        # e.g. addi sp,sp,-32 --> -32
+        args = args[2:]
+    elif (subtype == 'c.addi4spn'):
+        # e.g. addi a0,sp,16 --> a0,16
+        args = [args[0]] + args[2:]
+    else:
+        # e.g. sw ra,12(sp) --> ra,12
+        idx = args[1].index('(')
+        args = [args[0], args[1][:idx]]
+    return (subtype, args)
+
+
+def get_rvc_opcode(opcode, code):
+    """
+    Decodes the sub-type of a 16-bit instruction (see RVC_SUBTYPES) from its
+    machine code, as get_rvc_subtype() but without the arguments.
 
-    Function-Level Data Structures:
-        - f_size: function size (in bytes)
-        - f_reductions:
-            * Key: replaced instruction name (e.g. 'cx.lwpc')
-            * Val: size reduction by that instruction
-        - f_instr:
-            * Key: instruction
-            * Val: # of Occurrences
-        - f_formats:
-            * Key: RV32 Instruction Format (R, U, etc.)
-            * Val:
-                * Key: RV32 Base Instruction
-                * Val: # of Occurrences
-        - f_bits: number of bits to encode LW offsets
-        - f_pairs
-            * Key: (instruction #1, instruction #2)
-            * Val: # of Occurrences
-        - replaced_loc
-            * Key: replaced instruction name
-            * Val: [list of row locations in that function]
-        - pair_loc
-            * Key: (instruction #1, instruction #2)
-            * Val: [list of row locations in that function]
-    Benchmark-Level Data Structures:
-        - results:
-            * Key: function name
-            * Val: (f_size, f_reductions, f_instr, f_formats, f_bits)
-        - t_reductions
-            * Benchmark accumulator for f_reductions
-        - t_pairs
-            * Benchmark accumulator for f_pairs
-        - t_instr
-            * Benchmark accumulator for f_instr
-        - t_formats
-            * Benchmark accumulator for f_formats
+    Returns the opcode to count for the sub-type.
+    """
+    subtype = decoder.decode(code)
+    if (subtype is None) or (subtype[0] not in RVC_SUBTYPES[opcode]):
+        return opcode
+    return subtype[0]
 
-    Returns: (results, t_reductions, t_pairs, t_instr, t_formats)
+
+class DataSink:
     """
-    # Some available counters to aggregate details about specific instructions
-    addioffsetcnt_en = False
-    lwcnt_en = False
-    sllicnt_en = False
-    subcnt_en = False
-    if addioffsetcnt_en:
-        addioffset = {0: 0, 1:0, 2:0, 3:0, 4:0, 5:0}
-    if lwcnt_en:
-        lwcnt = {0: 0, 1:0, 2:0, 3:0, 4:0, 5:0}
-    if sllicnt_en:
-        sllicnt = {0: 0, 1:0, 2:0, 3:0, 4:0}
-    if subcnt_en:
-        subcnt = {0: 0, 1:0, 2:0, 3:0, 4:0}
+    Receives the events of a RISC-V disassembly scan (see scan_riscv()).
 
-    # Read the config file to know which functions to analyze
-    func_opts = config.read_config(optfile)
+    This sink only keeps the counters of the scan (the results returned by
+    scan_riscv()), so all of its events do nothing. Other sinks (e.g.
+    ExcelSink) override the events they need to record.
 
-    # Check that at least one function has been selected for analysis
-    funcs_to_parse = [func_opts[i][0] for i in func_opts.keys() if func_opts[i][1]]
-    if len(funcs_to_parse) == 0:
-        raise Exception('Please select at least one function to parse in ' + optfile)
+    Per-instruction events (instruction(), replaced(), not_replaced(), pair()
+    and counted()) are only sent to sinks with instructions = True, since the
+    text of each instruction is not needed to count them.
+    """
+    instructions = False
 
-    # Initialize high-level data structures
-    results = {}
-    if (save_restore_en):
-        results['__riscv_save'] = (0, {}, {}, {}, 0)
-        results['__riscv_restore'] = (0, {}, {}, {}, 0)
-    t_reductions = {}
-    t_pairs = {}
-    t_instr = {}
-    t_formats = {}
-    for i in range(len(ENABLED)):
-        t_reductions[ENABLED[i]] = 0
-    for lbl in RV32_FORMATS:
-        t_formats[lbl] = {}
-        for instr in RV32_INSTR_FORMATS.keys():
-            instr_lbl = RV32_INSTR_FORMATS[instr][0]
-            if (instr_lbl == lbl):
-                t_formats[lbl][instr] = 0
+    def function(self, func_name, wksheet_name):
+        """ Beginning a new function to analyze (and not a subfunction). """
 
-    # Configure the parser
-    parse_rules = ParseRules(compiler)
+    def instruction(self, addr, instr, opcode, args, comments):
+        """ Instruction of the current function, as disassembled. """
 
-    parsing = False
-    last_saved = False
-    fcnt = 0    # function index
-    with open(assemblyfile, 'r') as f:
-        for line in f:
-            # Found the start of a new function
-            if parse_rules.is_func_start(line):
-                (fname, wname) = parse_rules.get_func_data(line)
-                nm, parse, subfunc = func_opts[fcnt]
-                fcnt += 1
-                if nm != fname:
-                    raise Exception('Error: function name does not match func_opts record')
-                # Done w/analysis of current function if the new function is not
-                #   a subfunction or not set to parse
-                if parsing and (not subfunc or not parse):
-                    # Record current function totals
-                    if (wksheet_name == '__riscv_save'):
-                        # Increment total for save_0, save_1, etc.
-                        if (f_size > 0):
-                            curr = results['__riscv_save'][0]
-                            results['__riscv_save'] = (curr + f_size, {}, {}, {}, 0)
-                    elif (wksheet_name == '__riscv_restore'):
-                        # Increment total for restore_0, restore_1, etc.
-                        if (f_size > 0):
-                            curr = results['__riscv_restore'][0]
-                            results['__riscv_restore'] = (curr + f_size, {}, {}, {}, 0)
-                    else:
-                        # If using cx.lwpc, need to check if offset width exceeded
-                        if lwpc_en[1]:
-                            (res, min_offset, f_bits) = cx.check_offsets(f_size,
-                                                                         f_reductions,
-                                                                         max_offset,
-                                                                         min_offset)
-                            # If number of bits too high, not able to us cx.lwpc
-                            if (res is False):
-                                f_reductions['cx.lwpc'] = 0
-                                # Revert back to original 32-bit LW
-                                if 'lw' in f_instr.keys():
-                                    f_instr['lw'] += f_instr['cx.lwpc']
-                                else:
-                                    f_instr['lw'] = f_instr['cx.lwpc']
-                                f_instr['cx.lwpc'] = 0
-                                lwpc_fail = True
-
-                        # Add function totals to the overall benchmark totals
-                        res = update_tot(t_reductions, t_pairs, t_instr,
-                                         t_formats, f_reductions, f_pairs,
-                                         f_instr, f_formats)
-                        (t_reductions, t_pairs, t_instr, t_formats) = res
-                        # Save the function results and record in Excel worksheet
-                        results[func_name] = (f_size, f_reductions, f_instr,
-                                                f_formats, f_bits)
-                        function_xlsx.record_riscv_totals(wksheet, compiler,
-                                                          f_size, f_reductions)
-                        function_xlsx.add_tables_charts_marks(wksheet, compiler,
-                                                              f_instr, f_formats,
-                                                              replaced_loc,
-                                                              not_repl_loc,
-                                                              lwpc_fail,
-                                                              pair_loc)
-                    last_saved = True
-                # Beginning a new function to analyze and not a subfunction
-                if parse and not subfunc:
-                    # Create and format new worksheet
-                    (func_name, wksheet_name) = parse_rules.get_func_data(line)
-                    if (wksheet_name == '__riscv_save'):
-                        wksheet = excel.wkbook.get_worksheet_by_name(wksheet_name)
-                        # Some functions grouped/have same definition in assembly
-                        num = int(re.split('_', func_name)[-1])
-                        if (num < 4):
-                            tbl = SAVE_RVGCC_A_TABLE
-                        elif (num < 8):
-                            tbl = SAVE_RVGCC_B_TABLE
-                        elif (num < 12):
-                            tbl = SAVE_RVGCC_C_TABLE
-                        else:
-                            tbl = SAVE_RVGCC_D_TABLE
-
-                        row = excel.get_table_loc(tbl)[0] + 3
-                        f_size = 0
-                    elif (wksheet_name == '__riscv_restore'):
-                        wksheet = excel.wkbook.get_worksheet_by_name(wksheet_name)
-                        num = int(re.split('_', func_name)[-1])
-                        if (num < 4):
-                            tbl = RESTORE_RVGCC_A_TABLE
-                        elif (num < 8):
-                            tbl = RESTORE_RVGCC_B_TABLE
-                        elif (num < 12):
-                            tbl = RESTORE_RVGCC_C_TABLE
-                        else:
-                            tbl = RESTORE_RVGCC_D_TABLE
-
-                        row = excel.get_table_loc(tbl)[0] + 3
-                        f_size = 0
-                    elif (wksheet_name is not None):
-                        wksheet = function_xlsx.create_sheet(func_name,
-                                                             wksheet_name)
-                        function_xlsx.record_func_name(wksheet, func_name)
-                        # Place instruction data starting below the headers
-                        row = excel.get_table_loc(RVGCC_TABLE)[0] + 3
-                        # Reset current function totals
-                        f_size = 0
-                        f_reductions = {}
-                        f_instr = {}
-                        f_formats = {}
-                        replaced_loc = {}
-                        not_repl_loc = {}
-                        f_pairs = {}
-                        pair_loc = {}
-                        prev_op = ''
-                        prev_args = []
-                        for instr in ENABLED:
-                            f_reductions[instr] = 0
-                            f_instr[instr] = 0
-                            replaced_loc[instr] = []
-                        for pair in PAIRS_ENABLED:
-                            pair_loc[pair] = []
-                        f_bits = 0
-                        for lbl in RV32_FORMATS:
-                            f_formats[lbl] = {}
-                            for instr in RV32_INSTR_FORMATS.keys():
-                                instr_lbl = RV32_INSTR_FORMATS[instr][0]
-                                if (instr_lbl == lbl):
-                                    f_formats[lbl][instr] = 0
-                        # Add entry for new function with default values
-                        results[func_name] = (f_size, f_reductions, f_instr,
-                                              f_formats, f_bits)
-                        # Reset offset trackers
-                        lwpc_fail = False
-                        max_offset = 0
-                        min_offset = float("inf")
-                    last_saved = False
-                    parsing = True
-                    continue
-                # Beginning to analyze a subfunction of the current function
-                elif parse and subfunc:
-                    parsing = True
-                    continue
-                # Beginning a function that is not selected to analyze
-                else:
-                    parsing = False
-                    continue
-            # Analyzing the current line (part of a selected function)
-            if parsing:
-                if parse_rules.is_skippable(line):
-                    continue
-                # Extract instruction data from line of text and record
-                if (compiler == 'rvgcc'):
-                    ret = parse_rules.scan_rvgcc_instruction(line)
-                    (addr, instr, bytes, opcode, args, comments) = ret
-                    # Explicitly mark RVC instructions for readability
-                    if (bytes == 2):
-                        opcode = 'c.' + opcode
-                    # GCC does not differentiate these sub-types
-                    if (opcode == 'c.addi'):
-                        if (args[1] == 'sp'):
-                            if args[0] == 'sp':
-                                opcode = 'c.addi16sp'
-                                args = args[2:]
-                            else:
-                                opcode = 'c.addi4spn'
-                                args.pop(1)
-                    if (opcode == 'c.sw') and ('sp' in args[1]):
-                        opcode = 'c.swsp'
-                        idx = args[1].index('(')
-                        args = [args[0], args[1][:idx]]
-                    if (opcode == 'c.lw') and ('sp' in args[1]):
-                        opcode = 'c.lwsp'
-                        idx = args[1].index('(')
-                        args = [args[0], args[1][:idx]]
-                elif (compiler == 'rviar'):
-                    ret = parse_rules.scan_iar_instruction(line)
-                    (addr, instr, bytes, opcode, args) = ret
-                    comments = ''
-                # __riscv_save and __riscv_restore functions are unique
-                if (wksheet_name == '__riscv_save') \
-                        or (wksheet_name == '__riscv_restore'):
-                    save_restore_xlsx.record_instruction(wksheet, compiler,
-                                                         tbl, row, addr, instr,
-                                                         opcode, args, comments)
-                else:
-                    function_xlsx.record_instruction(wksheet, compiler,
-                                                     row, addr, instr, opcode,
-                                                     args, comments)
-
-                # Increment function code size by this instruction size
-                f_size += bytes
-
-                # Parse for replaceable instructions
-                if (wksheet_name != '__riscv_save') \
-                        and (wksheet_name != '__riscv_restore'):
-                    replaceable = False
-                    # 32-bit instruction
-                    if (bytes > 2):
-                        # Increment appropriate instruction format label
-                        instr_type = RV32_INSTR_FORMATS[opcode]
-                        if (instr_type[0] not in RV32_FORMATS):
-                            # Pseudoinstruction, get label of base instruction
-                            for i in range(len(instr_type)):
-                                lbl = RV32_INSTR_FORMATS[instr_type[i]][0]
-                                f_formats[lbl][instr_type[i]] += 1
-                        else:
-                            f_formats[instr_type[0]][opcode] += 1
-                        # Check if replaceable
-                        res = cx.check_replaceable(opcode, args, comments,
-                                                   max_offset, min_offset,
-                                                   addr)
-                        replaceable = res[0]
-                        (r2, r1, offset) = res[1]
-                        max_offset, min_offset, type_code = res[2:5]
-
-                        # Record reduction in func_reductions and write comment
-                        if (replaceable):
-                            opcode = type_code
-                            # Replacement by 16-bit instruction
-                            if (opcode[:2] == 'c.') or (opcode[:2] == 'cx'):
-                                f_reductions[opcode] += 2
-                            function_xlsx.record_comments(wksheet, compiler,
-                                                          row, opcode,
-                                                          (r2, r1, offset))
-                            replaced_loc[opcode].append(row)
-                            f_instr[opcode] += 1
-                        else:
-                            if opcode in f_instr.keys():
-                                f_instr[opcode] += 1
-                            else:
-                                f_instr[opcode] = 1
-                    # 16-bit instruction
-                    else:
-                        # C.ADDI is unique since we are proposing to remove it
-                        if (opcode == 'c.addi') and (addi_subi_en):
-                            if (compiler == 'rviar'):
-                                args = [args[0], args[0], args[1]]
-                            res = cx.check_replaceable('c.addi', args,
-                                                       comments,
-                                                       max_offset,
-                                                       min_offset,
-                                                       addr)
-                            replaceable = res[0]
-                            (r2, r1, offset) = res[1]
-                            type_code = res[4]
-                            if (replaceable):
-                                opcode = type_code
-                                function_xlsx.record_comments(wksheet,
-                                                              compiler,
-                                                              row, opcode,
-                                                              res[1])
-                                replaced_loc[opcode].append(row)
-                            else:
-                                if (opcode not in not_repl_loc.keys()):
-                                    not_repl_loc[opcode] = [row]
-                                else:
-                                    not_repl_loc[opcode].append(row)
-                        if opcode in f_instr.keys():
-                            f_instr[opcode] += 1
-                        else:
-                            f_instr[opcode] = 1
-
-                    # Increment instruction pair occurence
-                    pair = (prev_op, opcode)
-                    if pair in f_pairs.keys():
-                        f_pairs[pair] += 1
-                    else:
-                        if (prev_op != ''):
-                            f_pairs[pair] = 1
-                    if (pair in PAIRS_ENABLED):
-                        pair_loc[pair].append(row - 1)
-
-                prev_op = opcode
-                prev_args = args
-
-                if ((opcode == 'c.addi') or (opcode == 'addi')) \
-                        and (compiler == 'rvgcc') and addioffsetcnt_en:
-                    num = int(args[-1])
-                    if (num <= -256):
-                        addioffset[0] += 1
-                    elif (num <= -32):
-                        addioffset[1] += 1
-                    elif (num < 0):
-                        addioffset[2] += 1
-                    elif (num < 32):
-                        addioffset[3] += 1
-                    elif (num < 256):
-                        addioffset[4] += 1
-                    else:
-                        addioffset[5] += 1
-
-                # if (opcode == 'addi') and addioffsetcnt_en:
-                #     reg1 = args[0]
-                #     reg2 = args[1]
-                #     immed = abs(int(args[2], 16))
-                #     if (reg1 != reg2) and (immed >= 32):
-                #         addioffset[2] += 1
-                #     elif (reg1 != reg2):
-                #         addioffset[0] += 1
-                #     elif (immed >= 32):
-                #         addioffset[1] += 1
-                #     else:
-                #         addioffset[4] += 1
-                #     print(func_name)
-                #     print(args)
-
-                if (opcode == 'lw') and lwcnt_en:
-                    reg1 = args[0]
-                    reg2 = args[1].split('(')[1][:-1]
-                    off = int(args[1].split('(')[0], 16)
-                    regs_okay = (reg1 in REG_LIST) and (reg2 in REG_LIST)
-                    off_okay = (abs(off) < 128) and (off >= 0)
-                    if (regs_okay is False) and (off_okay is False):
-                        lwcnt[4] += 1
-                    if (regs_okay is True) and (off_okay is False):
-                        if (abs(off) >= 128) and (off > 0):
-                            lwcnt[1] += 1
-                        if (abs(off) < 128) and (off < 0):
-                            lwcnt[2] += 1
-                        if (abs(off) >= 128) and (off < 0):
-                            lwcnt[3] += 1
-                    if (regs_okay is False) and (off_okay is True):
-                        if (reg1 not in REG_LIST) or (reg2 not in REG_LIST):
-                            lwcnt[0] += 1
-                elif (opcode == 'cx.lwpc') and lwcnt_en:
-                    lwcnt[5] += 1
-
-                if (opcode == 'slli') and sllicnt_en:
-                    rd = args[0]
-                    rs1 = args[1]
-                    if (rd != rs1):
-                        sllicnt[4] += 1
-                    if (rd in REG_LIST) and (rs1 not in REG_LIST):
-                        sllicnt[0] += 1
-                    if (rs1 in REG_LIST) and (rd not in REG_LIST):
-                        sllicnt[1] += 1
-                    if (rd in REG_LIST) and (rs1 in REG_LIST):
-                        sllicnt[2] += 1
-                    if (rd not in REG_LIST) and (rs1 not in REG_LIST):
-                        sllicnt[3] += 1
-
-                if (opcode == 'sub') and subcnt_en:
-                    subcnt[0] += 1
-                    rd = args[0]
-                    rs1 = args[1]
-                    rs2 = args[2]
-                    if (rd != rs1) and ((rd not in REG_LIST) or
-                                        (rs1 not in REG_LIST) or
-                                        (rs2 not in REG_LIST)):
-                        subcnt[1] += 1
-                    elif (rd != rs1):
-                        subcnt[2] += 1
-                    elif (rd not in REG_LIST) or (rs1 not in REG_LIST) or \
-                            (rs2 not in REG_LIST):
-                        subcnt[3] += 1
-                    else:
-                        subcnt[4] += 1
-
-                # Move to next row of worksheet for next instruction
-                row += 1
-                continue
+    def replaced(self, opcode, args, comments, addr, type_code):
+        """ The last instruction can be replaced by type_code. """
 
-    # Check that the last selected function's totals were saved to the wksheet
-    if not last_saved:
-        if (wksheet_name == '__riscv_save'):
-            # Increment total for save_0, save_1, etc.
-            if (f_size > 0):
-                curr = results['__riscv_save'][0]
-                results['__riscv_save'] = (curr + f_size, {}, {}, {}, 0)
-        elif (wksheet_name == '__riscv_restore'):
-            # Increment total for restore_0, restore_1, etc.
-            if (f_size > 0):
-                curr = results['__riscv_restore'][0]
-                results['__riscv_restore'] = (curr + f_size, {}, {}, {}, 0)
-        else:
-            # If using cx.lwpc, need to check if offset width exceeded
-            if lwpc_en[1]:
-                (res, min_offset, f_bits) = cx.check_offsets(f_size,
-                                                             f_reductions,
-                                                             max_offset,
-                                                             min_offset)
-                # If number of bits too high, not able to us cx.lwpc
-                if (res is False):
-                    f_reductions['cx.lwpc'] = 0
-                    # Revert back to original 32-bit LW
-                    if 'lw' in f_instr.keys():
-                        f_instr['lw'] += f_instr['cx.lwpc']
-                    else:
-                        f_instr['lw'] = f_instr['cx.lwpc']
-                    f_instr['cx.lwpc'] = 0
-                    lwpc_fail = True
-
-                # else:
-                #     data5 -= f_instr['cx.lwpc']
+    def not_replaced(self, opcode):
+        """ The last instruction (C.ADDI) cannot be replaced. """
 
-            # Add function totals to the overall benchmark totals
-            res = update_tot(t_reductions, t_pairs, t_instr,
-                             t_formats, f_reductions, f_pairs,
-                             f_instr, f_formats)
-            (t_reductions, t_pairs, t_instr, t_formats) = res
-            # Save the function results and record in Excel worksheet
-            results[func_name] = (f_size, f_reductions, f_instr, f_formats,
-                                  f_bits)
-            function_xlsx.record_riscv_totals(wksheet, compiler, f_size,
-                                              f_reductions)
-            function_xlsx.add_tables_charts_marks(wksheet, compiler,
-                                                  f_instr, f_formats,
-                                                  replaced_loc,
-                                                  not_repl_loc, lwpc_fail,
-                                                  pair_loc)
-    # Only allow the first BR_KEEP (%) of each type of branch to be compressed
-    for br_instr in BR_ENABLED:
-        if br_instr in t_instr.keys():
-            orig_br = br_instr[3:]
-            keep = round(t_instr[br_instr]*BR_KEEP)
-            # Update the totals (# of occurrences & reduction amt)
-            t_instr[orig_br] = t_instr[br_instr] - keep
-            t_instr[br_instr] = keep
-            t_reductions[br_instr] = 2*keep
+    def pair(self, pair):
+        """ The last two instructions are an enabled pair (PAIRS_ENABLED). """
 
-        # Go through the functions until reach limit of branches to keep
-        count = 0
-        zero = False
-        for func in results.keys():
-            (f_size, f_reductions, f_instr, f_formats, f_bits) = results[func]
-            # Number of compressed branches in this function
-            if br_instr in f_instr.keys():
-                left = f_instr[br_instr]
-            else:
-                left = 0
-            # Count through until reach max to keep
-            while (zero is False) and (left > 0):
-                count += 1
-                left -= 1
-                if (count == keep):
-                    zero = True
-            # Zero out the rest, undoing the compression
-            if (zero):
-                f_instr[orig_br] = left
-                f_instr[br_instr] -= left
-                f_reductions[br_instr] -= left*2
-                # f_size += left*2
-                results[func] = (f_size, f_reductions, f_instr, f_formats,
-                                 f_bits)
+    def counted(self, opcode, args):
+        """ The last instruction as counted (after any replacement). """
 
-    if (save_restore_en):
-        # Add __riscv_save and __riscv_restore totals to corresponding wksheet
-        nm = '__riscv_save'
-        wksheet = excel.wkbook.get_worksheet_by_name(nm)
-        save_restore_xlsx.record_totals(wksheet, compiler, nm, results[nm][0])
-        nm = '__riscv_restore'
-        wksheet = excel.wkbook.get_worksheet_by_name(nm)
-        save_restore_xlsx.record_totals(wksheet, compiler, nm, results[nm][0])
-        # Add push/pop reductions to totals if enabled
-        if ('push (save)' in ENABLED):
-            size = results['__riscv_save'][0]
-            results['__riscv_save'] = (size, {'push (save)': size}, {}, {}, 0)
-            # Add function totals to the overall benchmark totals
-            res = update_tot(t_reductions, t_pairs, t_instr, t_formats,
-                             results['__riscv_save'][1], {}, {}, {})
-            (t_reductions, t_pairs, t_instr, t_formats) = res
-        if ('pop (restore)' in ENABLED):
-            size = results['__riscv_restore'][0]
-            results['__riscv_restore'] = (size, {'pop (restore)': size}, {}, {}, 0)
-            res = update_tot(t_reductions, t_pairs, t_instr, t_formats,
-                             results['__riscv_restore'][1], {}, {}, {})
-            (t_reductions, t_pairs, t_instr, t_formats) = res
+    def function_totals(self, f_size, f_reductions, f_instr, f_formats,
+                        lwpc_fail):
+        """ The current function is done (not __riscv_save/restore). """
 
+    def totals(self, results):
+        """ All functions are done (before the push/pop reductions). """
 
-    if addioffsetcnt_en:
-        print("\naddi offset counters:\n")
-        print("{:<30s}{:<5d}".format(compiler + " data0", addioffset[0]))
-        print("{:<30s}{:<5d}".format(compiler + " data1", addioffset[1]))
-        print("{:<30s}{:<5d}".format(compiler + " data2", addioffset[2]))
-        print("{:<30s}{:<5d}".format(compiler + " data3", addioffset[3]))
-        print("{:<30s}{:<5d}".format(compiler + " data4", addioffset[4]))
-        print("{:<30s}{:<5d}".format(compiler + " data5", addioffset[5]))
-    if lwcnt_en:
-        print("\nlw counters:\n")
-        print("{:<30s}{:<5d}".format(compiler + " data0", lwcnt[0]))
-        print("{:<30s}{:<5d}".format(compiler + " data1", lwcnt[1]))
-        print("{:<30s}{:<5d}".format(compiler + " data2", lwcnt[2]))
-        print("{:<30s}{:<5d}".format(compiler + " data3", lwcnt[3]))
-        print("{:<30s}{:<5d}".format(compiler + " data4", lwcnt[4]))
-        print("{:<30s}{:<5d}".format(compiler + " data5", lwcnt[5]))
-    if sllicnt_en:
-        print("\nslli counters:\n")
-        print("{:<30s}{:<5d}".format(compiler + " data0", sllicnt[0]))
-        print("{:<30s}{:<5d}".format(compiler + " data1", sllicnt[1]))
-        print("{:<30s}{:<5d}".format(compiler + " data2", sllicnt[2]))
-        print("{:<30s}{:<5d}".format(compiler + " data3", sllicnt[3]))
-        print("{:<30s}{:<5d}".format(compiler + " data4", sllicnt[4]))
-    if subcnt_en:
-        print("\nsub counters:\n")
-        print("{:<30s}{:<5d}".format(compiler + " data0", subcnt[0]))
-        print("{:<30s}{:<5d}".format(compiler + " data1", subcnt[1]))
-        print("{:<30s}{:<5d}".format(compiler + " data2", subcnt[2]))
-        print("{:<30s}{:<5d}".format(compiler + " data3", subcnt[3]))
-        print("{:<30s}{:<5d}".format(compiler + " data4", subcnt[4]))
 
-    r = (results, t_reductions, t_pairs, t_instr, t_formats)
-    return r
+class ExcelSink(DataSink):
+    """
+    Records the instructions and totals of each function of a RISC-V
+    disassembly scan in an Excel workbook (see excel.WorkbookContext).
 
+    Data Structures (of the current function):
+        - replaced_loc
+            * Key: replaced instruction name
+            * Val: [list of row locations in that function]
+        - not_repl_loc
+            * Key: instruction name
+            * Val: [list of row locations in that function]
+        - pair_loc
+            * Key: (instruction #1, instruction #2)
+            * Val: [list of row locations in that function]
+    """
+    instructions = True
+
+    def __init__(self, ctx, compiler):
+        self.ctx = ctx
+        self.compiler = compiler
+        self.wksheet = None
+        self.wksheet_name = None
+        self.tbl = None
+        self.row = 0
+
+    def function(self, func_name, wksheet_name):
+        self.wksheet_name = wksheet_name
+        if (wksheet_name == '__riscv_save'):
+            self.wksheet = self.ctx.wkbook.get_worksheet_by_name(wksheet_name)
+            # Some functions grouped/have same definition in assembly
+            num = int(re.split('_', func_name)[-1])
+            if (num < 4):
+                self.tbl = SAVE_RVGCC_A_TABLE
+            elif (num < 8):
+                self.tbl = SAVE_RVGCC_B_TABLE
+            elif (num < 12):
+                self.tbl = SAVE_RVGCC_C_TABLE
+            else:
+                self.tbl = SAVE_RVGCC_D_TABLE
+            # Row before the first instruction (see instruction())
+            self.row = self.ctx.get_table_loc(self.tbl)[0] + 2
+        elif (wksheet_name == '__riscv_restore'):
+            self.wksheet = self.ctx.wkbook.get_worksheet_by_name(wksheet_name)
+            num = int(re.split('_', func_name)[-1])
+            if (num < 4):
+                self.tbl = RESTORE_RVGCC_A_TABLE
+            elif (num < 8):
+                self.tbl = RESTORE_RVGCC_B_TABLE
+            elif (num < 12):
+                self.tbl = RESTORE_RVGCC_C_TABLE
+            else:
+                self.tbl = RESTORE_RVGCC_D_TABLE
+            self.row = self.ctx.get_table_loc(self.tbl)[0] + 2
+        elif (wksheet_name is not None):
+            # Create and format new worksheet
+            self.wksheet = function_xlsx.create_sheet(self.ctx, func_name,
+                                                      wksheet_name)
+            function_xlsx.record_func_name(self.ctx, self.wksheet, func_name)
+            # Place instruction data starting below the headers
+            self.row = self.ctx.get_table_loc(RVGCC_TABLE)[0] + 2
+            self.replaced_loc = {}
+            self.not_repl_loc = {}
+            self.pair_loc = {}
+            for instr in ENABLED:
+                self.replaced_loc[instr] = []
+            for pair in PAIRS_ENABLED:
+                self.pair_loc[pair] = []
+
+    def instruction(self, addr, instr, opcode, args, comments):
+        # Move to next row of worksheet for this instruction
+        self.row += 1
+        # __riscv_save and __riscv_restore functions are unique
+        if (self.wksheet_name == '__riscv_save') \
+                or (self.wksheet_name == '__riscv_restore'):
+            save_restore_xlsx.record_instruction(self.ctx, self.wksheet,
+                                                 self.compiler, self.tbl,
+                                                 self.row, addr, instr, opcode,
+                                                 args, comments)
+        else:
+            function_xlsx.record_instruction(self.ctx, self.wksheet,
+                                             self.compiler, self.row, addr,
+                                             instr, opcode, args, comments)
+
+    def replaced(self, opcode, args, comments, addr, type_code):
+        # Registers and offset for the comment
+        res = cx.check_replaceable(opcode, args, comments, 0,
+                                   float("inf"), addr)
+        function_xlsx.record_comments(self.ctx, self.wksheet, self.compiler,
+                                      self.row, type_code, res[1])
+        self.replaced_loc[type_code].append(self.row)
+
+    def not_replaced(self, opcode):
+        if (opcode not in self.not_repl_loc.keys()):
+            self.not_repl_loc[opcode] = [self.row]
+        else:
+            self.not_repl_loc[opcode].append(self.row)
+
+    def pair(self, pair):
+        self.pair_loc[pair].append(self.row - 1)
+
+    def function_totals(self, f_size, f_reductions, f_instr, f_formats,
+                        lwpc_fail):
+        function_xlsx.record_riscv_totals(self.ctx, self.wksheet,
+                                          self.compiler, f_size, f_reductions)
+        function_xlsx.add_tables_charts_marks(self.ctx, self.wksheet,
+                                              self.compiler, f_instr, f_formats,
+                                              self.replaced_loc,
+                                              self.not_repl_loc, lwpc_fail,
+                                              self.pair_loc)
+
+    def totals(self, results):
+        if (save_restore_en):
+            # Add __riscv_save and __riscv_restore totals to their wksheets
+            nm = '__riscv_save'
+            wksheet = self.ctx.wkbook.get_worksheet_by_name(nm)
+            save_restore_xlsx.record_totals(self.ctx, wksheet, self.compiler,
+                                            nm, results[nm][0])
+            nm = '__riscv_restore'
+            wksheet = self.ctx.wkbook.get_worksheet_by_name(nm)
+            save_restore_xlsx.record_totals(self.ctx, wksheet, self.compiler,
+                                            nm, results[nm][0])
+
+
+class QueuedSink(DataSink):
+    """
+    Passes the events of a scan to another sink (e.g. ExcelSink) on a
+    background thread, so that the worksheets of each function are written
+    while the next functions are scanned.
+
+    The events of each function are queued together once the next function
+    begins, with at most depth functions queued, so the scan waits for the
+    writer rather than holding the events of every function.
+    """
 
-def scan_riscv_file_data(compiler, assemblyfile, optfile):
+    def __init__(self, sink, depth=PIPELINE_DEPTH):
+        self.sink = sink
+        self.instructions = sink.instructions
+        self.events = []
+        self.queue = queue.Queue(depth)
+        self.error = None
+        self.thread = threading.Thread(target=self.write, daemon=True)
+        self.thread.start()
+
+    def write(self):
+        """ Passes the queued events to the sink (on the background thread). """
+        while True:
+            events = self.queue.get()
+            if events is None:
+                return
+            # After an error, keep emptying the queue so the scan never waits
+            if self.error is not None:
+                continue
+            try:
+                for (name, args) in events:
+                    getattr(self.sink, name)(*args)
+            except Exception as e:
+                self.error = e
+
+    def flush(self):
+        """ Queues the events of the current function. """
+        if self.events:
+            self.queue.put(self.events)
+            self.events = []
+
+    def function(self, func_name, wksheet_name):
+        self.flush()
+        self.events.append(('function', (func_name, wksheet_name)))
+
+    def instruction(self, addr, instr, opcode, args, comments):
+        self.events.append(('instruction',
+                            (addr, instr, opcode, args, comments)))
+
+    def replaced(self, opcode, args, comments, addr, type_code):
+        self.events.append(('replaced',
+                            (opcode, args, comments, addr, type_code)))
+
+    def not_replaced(self, opcode):
+        self.events.append(('not_replaced', (opcode,)))
+
+    def pair(self, pair):
+        self.events.append(('pair', (pair,)))
+
+    def counted(self, opcode, args):
+        self.events.append(('counted', (opcode, args)))
+
+    def function_totals(self, f_size, f_reductions, f_instr, f_formats,
+                        lwpc_fail):
+        # Copies, since the branches kept (see BR_KEEP) are updated later
+        f_formats = {lbl: dict(f_formats[lbl]) for lbl in f_formats.keys()}
+        self.events.append(('function_totals',
+                            (f_size, dict(f_reductions), dict(f_instr),
+                             f_formats, lwpc_fail)))
+
+    def totals(self, results):
+        self.events.append(('totals', (dict(results),)))
+        self.flush()
+        # Wait for the writer to finish
+        self.close()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """
+        Stops the writer once it has passed on the events already queued
+        (e.g. if the scan raised an error before totals()).
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+
+def scan_riscv(compiler, assemblyfile, optfile, sink, jobs=1):
     """
-    Opens and scans the RISC-V disassembly file to extract data.
+    Opens and scans the RISC-V disassembly file to extract data, sending the
+    events of the scan to a sink (see DataSink).
 
     Arguments:
         - compiler          RISC-V toolchain used to compile the benchmark
         - assemblyfile      RISC-V disassembly file
         - optfile           RISC-V config file; selects the functions to parse
+        - sink              DataSink (counters only), ExcelSink, etc.
+        - jobs              Number of worker processes to parse the file with
 
     Function-Level Data Structures:
         - f_size: function size (in bytes)
@@ -663,15 +379,10 @@ def scan_riscv_file_data(compiler, assemblyfile, optfile):
         - f_pairs
             * Key: (instruction #1, instruction #2)
             * Val: # of Occurrences
-        - replaced_loc
-            * Key: replaced instruction name
-            * Val: [list of row locations in that function]
-        - pair_loc
-            * Key: (instruction #1, instruction #2)
-            * Val: [list of row locations in that function]
     Benchmark-Level Data Structures:
-        - t_size:
-            * Total code size of all parsed functions
+        - results:
+            * Key: function name
+            * Val: (f_size, f_reductions, f_instr, f_formats, f_bits)
         - t_reductions
             * Benchmark accumulator for f_reductions
         - t_pairs
@@ -699,262 +410,208 @@ def scan_riscv_file_data(compiler, assemblyfile, optfile):
     t_reductions = {}
     t_pairs = {}
     t_instr = {}
-    t_formats = {}
     for i in range(len(ENABLED)):
         t_reductions[ENABLED[i]] = 0
-    for lbl in RV32_FORMATS:
-        t_formats[lbl] = {}
-        for instr in RV32_INSTR_FORMATS.keys():
-            instr_lbl = RV32_INSTR_FORMATS[instr][0]
-            if (instr_lbl == lbl):
-                t_formats[lbl][instr] = 0
+    t_formats = symbols.new_formats()
 
     # Configure the parser
-    parse_rules = ParseRules(compiler)
-
+    parse_rules = ParseRules(compiler, jobs)
+
+    def save_function():
+        """ Records the totals of the current function. """
+        nonlocal t_reductions, t_pairs, t_instr, t_formats
+        if (wksheet_name == '__riscv_save') \
+                or (wksheet_name == '__riscv_restore'):
+            # Increment total for save_0, save_1, restore_0, etc.
+            if (f_size > 0):
+                curr = results[wksheet_name][0]
+                results[wksheet_name] = (curr + f_size, {}, {}, {}, 0)
+            return
+        lwpc_fail = False
+        f_bits = 0
+        # If using cx.lwpc, need to check if offset width exceeded
+        if lwpc:
+            (res, new_min, f_bits) = cx.check_offsets(f_size, f_reductions,
+                                                      max_offset, min_offset)
+            # If number of bits too high, not able to us cx.lwpc
+            if (res is False):
+                f_reductions['cx.lwpc'] = 0
+                # Revert back to original 32-bit LW
+                if 'lw' in f_instr.keys():
+                    f_instr['lw'] += f_instr['cx.lwpc']
+                else:
+                    f_instr['lw'] = f_instr['cx.lwpc']
+                f_instr['cx.lwpc'] = 0
+                lwpc_fail = True
+
+        # Add function totals to the overall benchmark totals
+        res = update_tot(t_reductions, t_pairs, t_instr, t_formats,
+                         f_reductions, f_pairs, f_instr, f_formats)
+        (t_reductions, t_pairs, t_instr, t_formats) = res
+        # Save the function results and record them in the sink
+        results[func_name] = (f_size, f_reductions, f_instr, f_formats,
+                              f_bits)
+        sink.function_totals(f_size, f_reductions, f_instr, f_formats,
+                             lwpc_fail)
+
+    # Unless the sink records each instruction, count the instructions from
+    #   the columns of the table without building their text
+    full = sink.instructions
+    rviar = (compiler == 'rviar')
+    # By ENABLED (which the server's workers set, see serve.py) rather than by
+    #   the flags of constants.py
+    lwpc = symbols.is_enabled('cx.lwpc')
+    addi_subi = symbols.addi_subi_enabled()
+    wksheet_name = None
     parsing = False
-    last_saved = False
+    last_saved = True
     fcnt = 0    # function index
-    with open(assemblyfile, 'r') as f:
-        for line in f:
-            # Found the start of a new function
-            if parse_rules.is_func_start(line):
-                (fname, wname) = parse_rules.get_func_data(line)
-                nm, parse, subfunc = func_opts[fcnt]
-                fcnt += 1
-                if nm != fname:
-                    raise Exception('Error: function name does not match func_opts record')
-                # Done w/analysis of current function if the new function is not
-                #   a subfunction or not set to parse
-                if parsing and (not subfunc or not parse):
-                    if (wksheet_name == '__riscv_save'):
-                        # Increment total for save_0, save_1, etc.
-                        if (f_size > 0):
-                            curr = results['__riscv_save'][0]
-                            results['__riscv_save'] = (curr + f_size, {}, {}, {}, 0)
-                    elif (wksheet_name == '__riscv_restore'):
-                        # Increment total for restore_0, restore_1, etc.
-                        if (f_size > 0):
-                            curr = results['__riscv_restore'][0]
-                            results['__riscv_restore'] = (curr + f_size, {}, {}, {}, 0)
-                    else:
-                        # If using cx.lwpc, need to check if offset width exceeded
-                        if lwpc_en[1]:
-                            (res, min_offset, f_bits) = cx.check_offsets(f_size,
-                                                                         f_reductions,
-                                                                         max_offset,
-                                                                         min_offset)
-                            # If number of bits too high, not able to us cx.lwpc
-                            if (res is False):
-                                f_reductions['cx.lwpc'] = 0
-                                # Revert back to original 32-bit LW
-                                if 'lw' in f_instr.keys():
-                                    f_instr['lw'] += f_instr['cx.lwpc']
-                                else:
-                                    f_instr['lw'] = f_instr['cx.lwpc']
-                                f_instr['cx.lwpc'] = 0
-                                lwpc_fail = True
-
-                        # Add function totals to the overall benchmark totals
-                        res = update_tot(t_reductions, t_pairs, t_instr,
-                                         t_formats, f_reductions, f_pairs,
-                                         f_instr, f_formats)
-                        (t_reductions, t_pairs, t_instr, t_formats) = res
-                        # Save the function results and record in Excel worksheet
-                        results[func_name] = (f_size, f_reductions, f_instr, f_formats,
-                                              f_bits)
-                    last_saved = True
-                # Beginning a new function to analyze and not a subfunction
-                if parse and not subfunc:
-                    # Create and format new worksheet
-                    (func_name, wksheet_name) = parse_rules.get_func_data(line)
-                    if (wksheet_name == '__riscv_save') or (wksheet_name == '__riscv_restore'):
-                        f_size = 0
-                        continue
-                    elif (wksheet_name is not None):
-                        # Reset current function totals
-                        f_size = 0
-                        f_reductions = {}
-                        f_instr = {}
-                        f_formats = {}
-                        replaced_loc = {}
-                        not_repl_loc = {}
-                        f_pairs = {}
-                        pair_loc = {}
-                        prev_op = ''
-                        prev_args = []
-                        for instr in ENABLED:
-                            f_reductions[instr] = 0
-                            f_instr[instr] = 0
-                            replaced_loc[instr] = []
-                        for pair in PAIRS_ENABLED:
-                            pair_loc[pair] = []
-                        f_bits = 0
-                        for lbl in RV32_FORMATS:
-                            f_formats[lbl] = {}
-                            for instr in RV32_INSTR_FORMATS.keys():
-                                instr_lbl = RV32_INSTR_FORMATS[instr][0]
-                                if (instr_lbl == lbl):
-                                    f_formats[lbl][instr] = 0
-                        # Add entry for new function with default values
-                        results[func_name] = (f_size, f_reductions, f_instr,
-                                              f_formats, f_bits)
-                        # Reset offset trackers
-                        lwpc_fail = False
-                        max_offset = 0
-                        min_offset = float("inf")
-                    last_saved = False
-                    parsing = True
-                    continue
-                # Beginning to analyze a subfunction of the current function
-                elif parse and subfunc:
-                    parsing = True
-                    continue
-                # Beginning a function that is not selected to analyze
+    # Parse the selected functions, and check which instructions can be
+    #   replaced with user instructions for all of them at once
+    (headers, table) = parse_rules.read_table(assemblyfile, func_opts)
+    type_codes = cx.check_replaceable_table(table, compiler)
+    opcodes = table.column('opcode')
+    sizes = table.column('size')
+    codes = table.column('code')
+    lines = parse_rules.read_rows(headers, table, func_opts)
+    for (line_type, line, idx) in lines:
+        # Found the start of a new function
+        if (line_type == FUNC_HEADER):
+            (fname, wname) = parse_rules.get_func_data(line)
+            nm, parse, subfunc = func_opts[fcnt]
+            fcnt += 1
+            if nm != fname:
+                raise Exception('Error: function name does not match func_opts record')
+            # Done w/analysis of current function if the new function is not
+            #   a subfunction or not set to parse
+            if parsing and (not subfunc or not parse):
+                save_function()
+                last_saved = True
+            # Beginning a new function to analyze and not a subfunction
+            if parse and not subfunc:
+                (func_name, wksheet_name) = parse_rules.get_func_data(line)
+                sink.function(func_name, wksheet_name)
+                if (wksheet_name == '__riscv_save') \
+                        or (wksheet_name == '__riscv_restore'):
+                    f_size = 0
+                elif (wksheet_name is not None):
+                    # Reset current function totals
+                    f_size = 0
+                    f_reductions = {}
+                    f_instr = {}
+                    f_pairs = {}
+                    prev_op = ''
+                    for instr in ENABLED:
+                        f_reductions[instr] = 0
+                        f_instr[instr] = 0
+                    f_formats = symbols.new_formats()
+                    # Add entry for new function with default values
+                    results[func_name] = (f_size, f_reductions, f_instr,
+                                          f_formats, 0)
+                    # Reset offset trackers
+                    max_offset = 0
+                    min_offset = float("inf")
+                last_saved = False
+                parsing = True
+                continue
+            # Beginning to analyze a subfunction of the current function
+            elif parse and subfunc:
+                parsing = True
+                continue
+            # Beginning a function that is not selected to analyze
+            else:
+                parsing = False
+                continue
+        # Analyzing the current line (part of a selected function)
+        if parsing:
+            # Instruction data extracted from the line of text to record
+            if full:
+                if rviar:
+                    (addr, instr, bytes, opcode, args) = table.row(idx)
+                    comments = ''
                 else:
-                    parsing = False
-                    continue
-            # Analyzing the current line (part of a selected function)
-            if parsing:
-                if parse_rules.is_skippable(line):
-                    continue
-                # Extract instruction data from line of text and record
-                if (compiler == 'rvgcc'):
-                    ret = parse_rules.scan_rvgcc_instruction(line)
-                    (addr, instr, bytes, opcode, args, comments) = ret
+                    (addr, instr, bytes, opcode, args, comments) = table.row(idx)
                     # Explicitly mark RVC instructions for readability
                     if (bytes == 2):
                         opcode = 'c.' + opcode
-                    # GCC does not differentiate these sub-types
-                    if (opcode == 'c.addi'):
-                        if (args[1] == 'sp'):
-                            if args[0] == 'sp':
-                                opcode = 'c.addi16sp'
-                                args = args[2:]
-                            else:
-                                opcode = 'c.addi4spn'
-                                args.pop(1)
-                    if (opcode == 'c.sw') and ('sp' in args[1]):
-                        opcode = 'c.swsp'
-                        idx = args[1].index('(')
-                        args = [args[0], args[1][:idx]]
-                    if (opcode == 'c.lw') and ('sp' in args[1]):
-                        opcode = 'c.lwsp'
-                        idx = args[1].index('(')
-                        args = [args[0], args[1][:idx]]
-                elif (compiler == 'IAR'):
-                    ret = parse_rules.scan_iar_instruction(line)
-                    (addr, instr, bytes, opcode, args) = ret
-                    comments = None
-                # Increment function code size by this instruction size
-                f_size += bytes
-
-                # Parse for replaceable instructions
-                if (wksheet_name != '__riscv_save') \
-                        and (wksheet_name != '__riscv_restore'):
-                    replaceable = False
-                    # 32-bit instruction
-                    if (bytes > 2):
-                        # Increment appropriate instruction format label
-                        instr_type = RV32_INSTR_FORMATS[opcode]
-                        if (instr_type[0] not in RV32_FORMATS):
-                            # Pseudoinstruction, get label of base instruction
-                            for i in range(len(instr_type)):
-                                lbl = RV32_INSTR_FORMATS[instr_type[i]][0]
-                                f_formats[lbl][instr_type[i]] += 1
-                        else:
-                            f_formats[instr_type[0]][opcode] += 1
-                        # Check if replaceable
-                        res = cx.check_replaceable(opcode, args, comments,
-                                                   max_offset, min_offset,
-                                                   addr)
-                        replaceable = res[0]
-                        (r2, r1, offset) = res[1]
-                        max_offset, min_offset, type_code = res[2:5]
-
-                        # Record reduction in func_reductions and write comment
-                        if (replaceable):
-                            opcode = type_code
-                            # Replacement by 16-bit instruction
-                            if (opcode[:2] == 'c.') or (opcode[:2] == 'cx'):
-                                f_reductions[opcode] += 2
-                            f_instr[opcode] += 1
-                        else:
-                            if opcode in f_instr.keys():
-                                f_instr[opcode] += 1
-                            else:
-                                f_instr[opcode] = 1
-                    # 16-bit instruction
-                    else:
-                        # C.ADDI is unique since we are proposing to remove it
-                        if (opcode == 'c.addi') and (addi_subi_en):
-                            if (compiler == 'IAR'):
-                                args = [args[0], args[0], args[1]]
-                            res = cx.check_replaceable('c.addi', args,
-                                                       comments,
-                                                       max_offset,
-                                                       min_offset,
-                                                       addr)
-                            replaceable = res[0]
-                            (r2, r1, offset) = res[1]
-                            type_code = res[4]
-                            if (replaceable):
-                                opcode = type_code
-                        if opcode in f_instr.keys():
-                            f_instr[opcode] += 1
-                        else:
-                            f_instr[opcode] = 1
-
-                    # Increment instruction pair occurence
-                    pair = (prev_op, opcode)
-                    if pair in f_pairs.keys():
-                        f_pairs[pair] += 1
-                    else:
-                        if (prev_op != ''):
-                            f_pairs[pair] = 1
-
-                prev_op = opcode
-                prev_args = args
+                        # GCC does not differentiate these sub-types
+                        if (opcode in RVC_SUBTYPES):
+                            (opcode, args) = get_rvc_subtype(opcode, instr,
+                                                             args)
+                sink.instruction(addr, instr, opcode, args, comments)
+            else:
+                # A float, as in the row path (see InstrTable.row()), so
+                #   that the sizes add up the same
+                bytes = float(sizes[idx])
+                opcode = symbols.OPCODES[opcodes[idx]]
+                if (bytes == 2) and not rviar:
+                    opcode = 'c.' + opcode
+                    if (opcode in RVC_SUBTYPES):
+                        opcode = get_rvc_opcode(opcode, codes[idx])
+
+            # Increment function code size by this instruction size
+            f_size += bytes
+
+            # Parse for replaceable instructions
+            if (wksheet_name == '__riscv_save') \
+                    or (wksheet_name == '__riscv_restore'):
                 continue
-
-    # Check that the last selected function's totals were saved to the wksheet
+            # 32-bit instruction
+            if (bytes > 2):
+                # Increment appropriate instruction format label
+                #   (of the base instruction(s) for pseudoinstructions)
+                for (lbl, instr) in symbols.format_counts(opcode):
+                    f_formats[lbl][instr] += 1
+                # Check if replaceable (as reached without NumPy)
+                if (type_codes is None):
+                    (type_code, offset) = cx.check_replaceable_row(
+                        table, compiler, idx)
+                else:
+                    type_code = type_codes[idx]
+                if (type_code != ''):
+                    if (type_code == 'cx.lwpc'):
+                        if (type_codes is not None):
+                            offset = abs(table.column('imm')[idx])
+                        (max_offset, min_offset) = cx.update_offsets(
+                            offset, max_offset, min_offset)
+                    if full:
+                        sink.replaced(opcode, args, comments, addr, type_code)
+                    opcode = type_code
+                    # Replacement by 16-bit instruction
+                    if (opcode[:2] == 'c.') or (opcode[:2] == 'cx'):
+                        f_reductions[opcode] += 2
+            # 16-bit instruction
+            elif (opcode == 'c.addi') and (addi_subi):
+                # C.ADDI is unique since we are proposing to remove it
+                if full and rviar:
+                    args = [args[0], args[0], args[1]]
+                if (type_codes is None):
+                    type_code = cx.check_replaceable_row(table, compiler,
+                                                         idx)[0]
+                else:
+                    type_code = type_codes[idx]
+                if (type_code != ''):
+                    if full:
+                        sink.replaced(opcode, args, comments, addr, type_code)
+                    opcode = type_code
+                elif full:
+                    sink.not_replaced(opcode)
+            f_instr[opcode] = f_instr.get(opcode, 0) + 1
+
+            # Increment instruction pair occurence
+            if (prev_op != ''):
+                pair = (prev_op, opcode)
+                f_pairs[pair] = f_pairs.get(pair, 0) + 1
+                if full and (pair in PAIRS_ENABLED):
+                    sink.pair(pair)
+            prev_op = opcode
+            if full:
+                sink.counted(opcode, args)
+            continue
+
+    # Check that the last selected function's totals were saved
     if not last_saved:
-        if (wksheet_name == '__riscv_save'):
-            # increment total for save_0, save_1, etc.
-            if (f_size > 0):
-                curr = results['__riscv_save'][0]
-                results['__riscv_save'] = (curr + f_size, {}, {}, {}, 0)
-        elif (wksheet_name == '__riscv_restore'):
-            # increment total for restore_0, restore_1, etc.
-            if (f_size > 0):
-                curr = results['__riscv_restore'][0]
-                results['__riscv_restore'] = (curr + f_size, {}, {}, {}, 0)
-        else:
-            # If using cx.lwpc, need to check if offset width exceeded
-            if lwpc_en[1]:
-                (res, min_offset, f_bits) = cx.check_offsets(f_size,
-                                                             f_reductions,
-                                                             max_offset,
-                                                             min_offset)
-                # if number of bits too high, not able to us cx.lwpc
-                if (res is False):
-                    f_reductions['cx.lwpc'] = 0
-                    # revert back to original 32-bit LW
-                    if 'lw' in f_instr.keys():
-                        f_instr['lw'] += f_instr['cx.lwpc']
-                    else:
-                        f_instr['lw'] = f_instr['cx.lwpc']
-                    f_instr['cx.lwpc'] = 0
-                    lwpc_fail = True
-
-            # Add function totals to the overall benchmark totals
-            res = update_tot(t_reductions, t_pairs, t_instr,
-                             t_formats, f_reductions, f_pairs,
-                             f_instr, f_formats)
-            (t_reductions, t_pairs, t_instr, t_formats) = res
-            # Save the function results and record in Excel worksheet
-            results[func_name] = (f_size, f_reductions, f_instr, f_formats,
-                                  f_bits)
+        save_function()
     # Only allow the first BR_KEEP (%) of each type of branch to be compressed
     for br_instr in BR_ENABLED:
         if br_instr in t_instr.keys():
@@ -971,7 +628,10 @@ def scan_riscv_file_data(compiler, assemblyfile, optfile):
         for func in results.keys():
             (f_size, f_reductions, f_instr, f_formats, f_bits) = results[func]
             # Number of compressed branches in this function
-            left = f_instr[br_instr]
+            if br_instr in f_instr.keys():
+                left = f_instr[br_instr]
+            else:
+                left = 0
             # Count through until reach max to keep
             while (zero is False) and (left > 0):
                 count += 1
@@ -987,25 +647,67 @@ def scan_riscv_file_data(compiler, assemblyfile, optfile):
                 results[func] = (f_size, f_reductions, f_instr, f_formats,
                                  f_bits)
 
+    sink.totals(results)
     if (save_restore_en):
         # Add push/pop reductions to totals if enabled
-        if ('push (save)' in ENABLED):
+        if symbols.is_enabled('push (save)'):
             size = results['__riscv_save'][0]
             results['__riscv_save'] = (size, {'push (save)': size}, {}, {}, 0)
             # Add function totals to the overall benchmark totals
             res = update_tot(t_reductions, t_pairs, t_instr, t_formats,
                              results['__riscv_save'][1], {}, {}, {})
             (t_reductions, t_pairs, t_instr, t_formats) = res
-        if ('pop (restore)' in ENABLED):
+        if symbols.is_enabled('pop (restore)'):
             size = results['__riscv_restore'][0]
             results['__riscv_restore'] = (size, {'pop (restore)': size}, {}, {}, 0)
             res = update_tot(t_reductions, t_pairs, t_instr, t_formats,
                              results['__riscv_restore'][1], {}, {}, {})
             (t_reductions, t_pairs, t_instr, t_formats) = res
 
+    r = (results, t_reductions, t_pairs, t_instr, t_formats)
+    return r
+
+
+def scan_riscv_file(ctx, compiler, assemblyfile, optfile, jobs=1):
+    """
+    Opens and scans the RISC-V disassembly file to extract data and update
+    the Excel workbook of ctx (see scan_riscv() and ExcelSink), on a
+    background thread with pipeline_en (see QueuedSink).
+
+    Returns: (results, t_reductions, t_pairs, t_instr, t_formats)
+    """
+    sink = ExcelSink(ctx, compiler)
+    if not pipeline_en:
+        return scan_riscv(compiler, assemblyfile, optfile, sink, jobs)
+    sink = QueuedSink(sink)
+    try:
+        return scan_riscv(compiler, assemblyfile, optfile, sink, jobs)
+    finally:
+        # Never leave the writer waiting on the queue
+        sink.close()
+
+
+def get_data_results(res):
+    """
+    Converts the results of scan_riscv_file() to the results returned by
+    scan_riscv_file_data(), so that a file scanned for its workbook does not
+    need to be scanned again for data only.
+
+    Returns: (t_size, t_reductions, t_pairs, t_instr, t_formats)
+    """
+    (results, t_reductions, t_pairs, t_instr, t_formats) = res
     t_size = 0
     for func in results.keys():
         t_size += results[func][0]
+    return (t_size, t_reductions, t_pairs, t_instr, t_formats)
 
-    r = (t_size, t_reductions, t_pairs, t_instr, t_formats)
-    return r
+
+def scan_riscv_file_data(compiler, assemblyfile, optfile, jobs=1):
+    """
+    Opens and scans the RISC-V disassembly file to extract data only (see
+    scan_riscv() and DataSink).
+
+    Returns: (t_size, t_reductions, t_pairs, t_instr, t_formats)
+    """
+    res = scan_riscv(compiler, assemblyfile, optfile, DataSink(), jobs)
+    return get_data_results(res)
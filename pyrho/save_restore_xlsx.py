@@ -10,11 +10,10 @@ Author: Jennifer Hellar
 
 import xlsxwriter
 
-import excel
-from constants import *
+from .constants import *
 
 
-def create_sheet(name):
+def create_sheet(ctx, name):
     """
     Adds a new worksheet to an open Excel workbook and formats it.
 
@@ -24,10 +23,10 @@ def create_sheet(name):
             - Adds formulas for some automatic data analysis
         - Returns the worksheet
     """
-    wksheet = excel.wkbook.add_worksheet(name)
+    wksheet = ctx.wkbook.add_worksheet(name)
     # Add link to return to Summary
     formula = '=HYPERLINK("#Summary!A1", "Return to Summary")'
-    wksheet.write_formula('A1', formula, excel.header_format)
+    wksheet.write_formula('A1', formula, ctx.header_format)
     # Format column sizes
     col_sizes = {
                  0: 30, 1: 20, 2: 20, 3: 20, 4: 50,
@@ -37,9 +36,9 @@ def create_sheet(name):
         wksheet.set_column(col, col, col_sizes[col])
 
     # 'RISC-V (RVGCC) [Save or Restore] Totals'
-    add_riscv_totals_table(wksheet, 'rvgcc', name)
+    add_riscv_totals_table(ctx, wksheet, 'rvgcc', name)
     # 'save_12 (RVGCC)', etc.
-    add_riscv_tables(wksheet, 'rvgcc', name)
+    add_riscv_tables(ctx, wksheet, 'rvgcc', name)
 
     return wksheet
 
@@ -47,7 +46,7 @@ def create_sheet(name):
 """ Functions to add specific tables/charts to the worksheet """
 
 
-def add_riscv_totals_table(wksheet, compiler, func):
+def add_riscv_totals_table(ctx, wksheet, compiler, func):
     """ Adds the 'RISC-V [compiler] [func] Totals' table to the worksheet. """
     if (compiler == 'rvgcc'):
         row = 2
@@ -60,22 +59,22 @@ def add_riscv_totals_table(wksheet, compiler, func):
     row_labels = ['Total']
     end_row = row + len(row_labels) + 1     # includes header row, etc.
     end_col = col + len(headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       table, headers, True)
-    excel.add_row_labels(wksheet, table, row_labels)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     table, headers, True)
+    ctx.add_row_labels(wksheet, table, row_labels)
 
 
-def add_riscv_tables(wksheet, compiler, func):
+def add_riscv_tables(ctx, wksheet, compiler, func):
     """ Adds individual save_x or restore_x function tables. """
     if (func == '__riscv_save'):
-        row = excel.get_table_loc(SAVE_RVGCC_TOTALS_TABLE)[2] + 8
+        row = ctx.get_table_loc(SAVE_RVGCC_TOTALS_TABLE)[2] + 8
         if (compiler == 'rvgcc'):
-            col = excel.get_table_loc(SAVE_RVGCC_TOTALS_TABLE)[1]
+            col = ctx.get_table_loc(SAVE_RVGCC_TOTALS_TABLE)[1]
             tables = rvgcc_save_tables
     elif (func == '__riscv_restore'):
-        row = excel.get_table_loc(RESTORE_RVGCC_TOTALS_TABLE)[2] + 8
+        row = ctx.get_table_loc(RESTORE_RVGCC_TOTALS_TABLE)[2] + 8
         if (compiler == 'rvgcc'):
-            col = excel.get_table_loc(RESTORE_RVGCC_TOTALS_TABLE)[1]
+            col = ctx.get_table_loc(RESTORE_RVGCC_TOTALS_TABLE)[1]
             tables = rvgcc_restore_tables
 
     headers = ['Address',
@@ -87,28 +86,28 @@ def add_riscv_tables(wksheet, compiler, func):
     for table in tables:
         end_row = row + 20
         end_col = col + len(headers) - 1
-        excel.create_table(wksheet, row, col, end_row, end_col,
-                           table, headers, False)
+        ctx.create_table(wksheet, row, col, end_row, end_col,
+                         table, headers, False)
         row = row + 28
 
 
 """ Functions to record data to the worksheet """
 
 
-def record_instruction(wksheet, compiler, table, curr_row, addr, instr, opcode,
+def record_instruction(ctx, wksheet, compiler, table, curr_row, addr, instr, opcode,
                        args, comments):
     """ Write out info for a single instruction. """
 
-    col = excel.get_table_col(table, 'Address')
+    col = ctx.get_table_col(table, 'Address')
     wksheet.write_string(curr_row, col, addr)
 
-    col = excel.get_table_col(table, 'Instruction')
+    col = ctx.get_table_col(table, 'Instruction')
     wksheet.write_string(curr_row, col, instr)
 
-    col = excel.get_table_col(table, 'Opcode')
+    col = ctx.get_table_col(table, 'Opcode')
     wksheet.write_string(curr_row, col, opcode)
 
-    col = excel.get_table_col(table, 'Arguments')
+    col = ctx.get_table_col(table, 'Arguments')
     arguments = ''
     for i in range(len(args)):
         if i != 0:
@@ -117,19 +116,19 @@ def record_instruction(wksheet, compiler, table, curr_row, addr, instr, opcode,
             arguments = args[i]
     wksheet.write_string(curr_row, col, arguments)
 
-    col = excel.get_table_col(table, 'Comments')
+    col = ctx.get_table_col(table, 'Comments')
     wksheet.write_string(curr_row, col, comments)
 
     if (len(instr) > 4):
-        start = excel.get_table_loc(table)[1]
-        end = excel.get_table_loc(table)[3]
+        start = ctx.get_table_loc(table)[1]
+        end = ctx.get_table_loc(table)[3]
         cell_range = CELL_NAME[(curr_row, start)] + ':' \
             + CELL_NAME[(curr_row, end)]
-        format_dict = {'type': 'no_errors', 'format': excel.red_format}
+        format_dict = {'type': 'no_errors', 'format': ctx.red_format}
         wksheet.conditional_format(cell_range, format_dict)
 
 
-def record_totals(wksheet, compiler, func, bytes):
+def record_totals(ctx, wksheet, compiler, func, bytes):
     """ Write out the function totals to the totals table. """
     if (func == '__riscv_save'):
         if (compiler == 'rvgcc'):
@@ -137,5 +136,5 @@ def record_totals(wksheet, compiler, func, bytes):
     elif (func == '__riscv_restore'):
         if (compiler == 'rvgcc'):
             table = RESTORE_RVGCC_TOTALS_TABLE
-    cell = excel.get_table_cell(table, 'Bytes', 'Total')
-    wksheet.write_number(cell, bytes, excel.bold_light_format)
+    cell = ctx.get_table_cell(table, 'Bytes', 'Total')
+    wksheet.write_number(cell, bytes, ctx.bold_light_format)
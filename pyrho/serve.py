@@ -0,0 +1,445 @@
+"""
+Analysis Server
+
+Functions to keep PyRho running as a server on localhost (see main.py
+--serve), which answers analyze requests from the instruction tables parsed
+by previous requests, rather than starting and parsing the disassembly again
+for each one.
+
+Requests are POSTed to http://127.0.0.1:[port]/analyze as a JSON object:
+    {"benchmark": "crc32",      subdirectory of the benchmark tree
+     "rvbuild": "rvgcc",        (optional, default: rvgcc)
+     "armbuild": "armcc",       (optional, default: armcc)
+     "settings": {...}}         (optional) RVCX settings, see check_settings()
+and answered with a JSON object of the code size data (see get_response()),
+or of the error: {"error": "..."}.
+
+The RVCX settings are constants which the scripts import by value (from
+constants import *), so the requests of each combination of settings are
+analyzed by a worker process of their own, started with those settings (see
+worker()). Each worker keeps the instruction tables it parsed in memory (up to
+CACHE_MEMORY MB, see parser.keep_table()), and at most SERVE_WORKERS idle
+workers are kept running, the least recently used first stopped (see
+WorkerPool).
+
+The instruction tables do not depend on the settings, but they are not
+shared between the workers: only the requests of settings which have a
+worker running are answered from memory (in milliseconds). The first request
+of any other settings waits for a new worker to start, import the scripts and
+parse the files again (or, with cache_en, load their tables from
+results/.cache). To compare many combinations of settings on the same
+benchmarks, raise SERVE_WORKERS so that their workers are kept running.
+
+"""
+
+import collections
+import http.server
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from . import constants
+from .constants import SERVE_WORKERS
+
+
+# RVCX settings which requests may change (see check_settings())
+SETTINGS = ['ENABLED', 'BR_KEEP', 'PAIRS_ENABLED', 'REG_LIST', 'IGNORE_REGS']
+
+
+def check_settings(settings):
+    """
+    Checks the RVCX settings of a request, given as the values of the
+    constants in SETTINGS, e.g.
+        {"ENABLED": ["cx.lwpc", "cx.slli"], "REG_LIST": ["s0", "s1", "a0"]}
+
+    Only the RVCX instructions (cx.*) can be enabled by ENABLED, the others
+    (push/pop, c.j/c.jal) are kept as selected in constants.py.
+
+    Returns the settings to start the worker of the request with: the values
+    of constants.py, replaced by those of the request, and BR_ENABLED (the
+    enabled branch instructions). These are ordered as in constants.py, so
+    that requests of the same settings are analyzed by the same worker.
+    """
+    if settings is None:
+        settings = {}
+    if not isinstance(settings, dict):
+        raise Exception('Expected an object of settings, e.g. {"ENABLED": ["cx.lwpc"]}')
+    unknown = [name for name in settings.keys() if name not in SETTINGS]
+    if (len(unknown) > 0):
+        raise Exception('Unknown setting(s) [' + ', '.join(unknown) + ']. Please choose from:\n\t[' + ', '.join(SETTINGS) + ']')
+
+    # RVCX instructions
+    instrs = [i[0] for i in constants.en_lst if (i[0][:3] == 'cx.')]
+    enabled = settings.get('ENABLED', constants.ENABLED)
+    if not isinstance(enabled, list) or not set(enabled).issubset(instrs):
+        raise Exception('ENABLED must be a list of instructions from:\n\t[' + ', '.join(instrs) + ']')
+    enabled = [i[0] for i in constants.en_lst if (i[0] in enabled)
+               or ((i[0] not in instrs) and (i[0] in constants.ENABLED))]
+    branches = [i[0] for i in constants.branches]
+
+    # Fused pair instructions
+    pairs = [list(i[0]) for i in constants.pair_en_lst]
+    pairs_enabled = settings.get('PAIRS_ENABLED', constants.PAIRS_ENABLED)
+    pairs_enabled = [list(pair) for pair in pairs_enabled] \
+        if isinstance(pairs_enabled, list) else None
+    if (pairs_enabled is None) or any(pair not in pairs for pair in pairs_enabled):
+        raise Exception('PAIRS_ENABLED must be a list of pairs from:\n\t[' + ', '.join(str(pair) for pair in pairs) + ']')
+    pairs_enabled = [pair for pair in pairs if (pair in pairs_enabled)]
+
+    # Allowed registers for compact instructions, of the RISC-V registers of
+    #   symbols.py (imported here, since the workers may only import it once
+    #   their settings are applied, and the server parses no files)
+    from . import symbols
+    reg_list = settings.get('REG_LIST', constants.REG_LIST)
+    if not isinstance(reg_list, list) or (len(reg_list) == 0) \
+            or not all(isinstance(reg, str) and (reg in symbols.REGISTERS)
+                       for reg in reg_list):
+        raise Exception('REG_LIST must be a list of registers from:\n\t[' + ', '.join(symbols.REGISTERS) + ']')
+    reg_list = [reg for (i, reg) in enumerate(reg_list)
+                if (reg not in reg_list[:i])]
+
+    br_keep = settings.get('BR_KEEP', constants.BR_KEEP)
+    if isinstance(br_keep, bool) or not isinstance(br_keep, (int, float)) \
+            or not (0 <= br_keep <= 1):
+        raise Exception('BR_KEEP must be a number from 0 to 1')
+    ignore_regs = settings.get('IGNORE_REGS', constants.IGNORE_REGS)
+    if not isinstance(ignore_regs, bool):
+        raise Exception('IGNORE_REGS must be true or false')
+
+    return {'ENABLED': enabled,
+            'BR_ENABLED': [i for i in enabled if (i in branches)],
+            'BR_KEEP': br_keep,
+            'PAIRS_ENABLED': pairs_enabled,
+            'REG_LIST': reg_list,
+            'IGNORE_REGS': ignore_regs}
+
+
+def get_response(result, seconds):
+    """
+    Returns the JSON object answering an analyze request, with the code size
+    data of the BenchmarkResult (see api.py) and the duration (in seconds) of
+    the analysis.
+    """
+    (t_size, t_reductions, t_pairs, t_instr, t_formats) = result.riscv
+    return {'benchmark': result.benchmark,
+            'rvbuild': result.rvbuild,
+            'armbuild': result.armbuild,
+            'rv_size': t_size,
+            'arm_size': result.arm_size,
+            'reductions': t_reductions,
+            'pairs': [[list(pair), t_pairs[pair]] for pair in t_pairs.keys()],
+            'instructions': t_instr,
+            'formats': t_formats,
+            'seconds': seconds}
+
+
+def analyze_request(benchmarkdir, request, jobs=1):
+    """
+    Analyzes the benchmark of a request (in a worker process, see worker()),
+    for data only, with the instruction tables kept in memory.
+
+    Returns the JSON object answering the request (see get_response()).
+    """
+    # Imported by the worker once its settings are applied
+    from . import analyze
+    from . import api
+
+    start = time.perf_counter()
+    benchmark = request.get('benchmark')
+    rvbuild = request.get('rvbuild', 'rvgcc')
+    armbuild = request.get('armbuild', 'armcc')
+    if not isinstance(benchmark, str) or (benchmark not in os.listdir(benchmarkdir)) \
+            or not os.path.isdir(os.path.join(benchmarkdir, benchmark)):
+        raise Exception('Unknown benchmark ' + str(benchmark) + ' in ' + benchmarkdir)
+
+    # The functions to analyze must have been selected
+    configdir = os.path.join(os.getcwd(), 'results', 'config')
+    masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
+    if not os.path.exists(masteropt):
+        raise Exception('Unable to find the function selection file of ' + benchmark + ':\n\t' + masteropt + '\nPlease configure the benchmark and select function(s) to parse.')
+
+    tasks = analyze.get_tasks(benchmarkdir, [benchmark], 1,
+                              [rvbuild, armbuild])
+    builds = [task[1] for task in tasks]
+    for build in [rvbuild, armbuild]:
+        if build not in builds:
+            raise Exception('Disassembly for \'' + str(build) + '\' unavailable. Please compile or choose another build of ' + benchmark)
+
+    # Scanned in this process (rather than by a pool of worker processes, see
+    #   analyze.scan_tasks()), so that the tables parsed are kept
+    scans = {}
+    for task in tasks:
+        scans[task[1]] = analyze.scan_file(*task[2], jobs=jobs)
+    result = api.BenchmarkResult(benchmark, rvbuild, armbuild, None,
+                                 scans[rvbuild], scans[armbuild])
+    return get_response(result, time.perf_counter() - start)
+
+
+def warm_up(benchmarkdir, jobs=1):
+    """
+    Parses the selected functions of every build of the benchmarks which have
+    been configured (in a worker process, see worker()), so that the
+    instruction tables of the benchmark tree are in memory.
+    """
+    # Imported by the worker once its settings are applied
+    from . import analyze
+
+    configdir = os.path.join(os.getcwd(), 'results', 'config')
+    benchmarks = []
+    for f in sorted(os.listdir(benchmarkdir)):
+        masteropt = os.path.join(configdir, f + '_master_selection.txt')
+        if os.path.isdir(os.path.join(benchmarkdir, f)) and os.path.exists(masteropt):
+            benchmarks.append(f)
+    for task in analyze.get_tasks(benchmarkdir, benchmarks, jobs):
+        try:
+            analyze.scan_file(*task[2], jobs=jobs)
+        except Exception as e:
+            print('Unable to parse ' + task[2][1] + ': ' + str(e))
+    return {'benchmarks': benchmarks}
+
+
+def worker():
+    """
+    Runs a worker process of the server (see Worker): reads its settings (see
+    check_settings()), then the requests to analyze, as one JSON object per
+    line of stdin, and writes a JSON object answering each on stdout.
+    """
+    # Answer on the original stdout, and print anything else (e.g. from the
+    #   worker processes parsing the files) to stderr
+    out = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    start = json.loads(sys.stdin.readline())
+    benchmarkdir = start['benchmarkdir']
+    jobs = start['jobs']
+    # Apply the settings before the other scripts import the constants
+    for (name, value) in start['settings'].items():
+        if (name == 'PAIRS_ENABLED'):
+            value = [tuple(pair) for pair in value]
+        setattr(constants, name, value)
+    # Results of other settings must not replace those of constants.py
+    constants.manifest_en = False
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            if request.get('warm', False):
+                response = warm_up(benchmarkdir, jobs)
+            else:
+                response = analyze_request(benchmarkdir, request, jobs)
+        except Exception as e:
+            response = {'error': str(e)}
+        out.write(json.dumps(response) + '\n')
+        out.flush()
+
+
+class Worker:
+    """
+    A worker process of the server, which analyzes the requests of one
+    combination of settings (see worker()), one at a time.
+    """
+
+    def __init__(self, benchmarkdir, settings, jobs=1):
+        self.settings = settings
+        self.lock = threading.Lock()
+        # Requests handed the worker and not yet answered (see WorkerPool)
+        self.users = 0
+        # Run as python -m pyrho.serve, with this copy of the package first
+        #   on the path of the worker
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([root] + [path for path in
+                                            [env.get('PYTHONPATH')] if path])
+        self.process = subprocess.Popen([sys.executable, '-m',
+                                         __package__ + '.serve'],
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE,
+                                        universal_newlines=True, env=env)
+        self.send({'benchmarkdir': benchmarkdir, 'jobs': jobs,
+                   'settings': settings})
+
+    def send(self, request):
+        """ Writes a request (or the settings) to the worker. """
+        self.process.stdin.write(json.dumps(request) + '\n')
+        self.process.stdin.flush()
+
+    def analyze(self, request):
+        """ Returns the worker's answer (a JSON object) to a request. """
+        with self.lock:
+            if (self.process.poll() is not None):
+                raise Exception('Worker stopped')
+            self.send(request)
+            line = self.process.stdout.readline()
+        if (line == ''):
+            raise Exception('Worker stopped')
+        return json.loads(line)
+
+    def stop(self):
+        """ Stops the worker, once it has answered its current request. """
+        with self.lock:
+            self.process.stdin.close()
+            self.process.wait()
+
+
+class WorkerPool:
+    """
+    The worker processes of the server, by settings.
+
+    Only idle workers are stopped: while every worker has requests in flight,
+    more than SERVE_WORKERS may be running, until they are answered.
+
+    Data Structures:
+        - workers
+            * Key: settings (see check_settings()), as a JSON string
+            * Val: Worker
+            * Least recently used first
+    """
+
+    def __init__(self, benchmarkdir, jobs=1):
+        self.benchmarkdir = benchmarkdir
+        self.jobs = jobs
+        self.workers = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def evict(self):
+        """
+        Removes the least recently used idle workers above SERVE_WORKERS (with
+        the lock held).
+
+        Returns the workers removed, to stop once the lock is released.
+        """
+        idle = [key for (key, worker) in self.workers.items()
+                if (worker.users == 0)]
+        stopped = []
+        while (len(self.workers) > SERVE_WORKERS) and (len(idle) > 0):
+            stopped.append(self.workers.pop(idle.pop(0)))
+        return stopped
+
+    def get(self, settings):
+        """
+        Returns the worker of the settings, starting it if needed, for a
+        request (see release()), and stops the least recently used idle
+        workers above SERVE_WORKERS.
+        """
+        key = json.dumps(settings)
+        with self.lock:
+            if key not in self.workers:
+                self.workers[key] = Worker(self.benchmarkdir, settings,
+                                           self.jobs)
+            self.workers.move_to_end(key)
+            worker = self.workers[key]
+            worker.users += 1
+            stopped = self.evict()
+        for other in stopped:
+            other.stop()
+        return worker
+
+    def release(self, worker):
+        """
+        Hands back a worker once its request is answered (see get()), and
+        stops the least recently used idle workers above SERVE_WORKERS.
+        """
+        with self.lock:
+            worker.users -= 1
+            stopped = self.evict()
+        for other in stopped:
+            other.stop()
+
+    def analyze(self, request):
+        """
+        Answers a request with the worker of its settings.
+
+        Returns a tuple of the HTTP status and the JSON object answering it.
+        """
+        if not isinstance(request, dict):
+            return (400, {'error': 'Expected a JSON object'})
+        try:
+            settings = check_settings(request.get('settings'))
+        except Exception as e:
+            return (400, {'error': str(e)})
+        worker = self.get(settings)
+        try:
+            response = worker.analyze(request)
+        except Exception as e:
+            # Started again by the next request
+            with self.lock:
+                if (self.workers.get(json.dumps(settings)) is worker):
+                    del self.workers[json.dumps(settings)]
+            return (500, {'error': str(e)})
+        finally:
+            self.release(worker)
+        if ('error' in response):
+            return (400, response)
+        return (200, response)
+
+    def stop(self):
+        """ Stops all of the workers. """
+        with self.lock:
+            workers = list(self.workers.values())
+            self.workers.clear()
+        for worker in workers:
+            worker.stop()
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    """ Answers the analyze requests (POST /analyze) of the server. """
+
+    def do_POST(self):
+        if (self.path != '/analyze'):
+            self.send_json(404, {'error': 'Unknown path ' + self.path + ', expected /analyze'})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self.send_json(400, {'error': 'Invalid JSON: ' + str(e)})
+            return
+        (status, response) = self.server.workers.analyze(request)
+        self.send_json(status, response)
+
+    def send_json(self, status, response):
+        """ Writes the HTTP response of a JSON object. """
+        body = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(benchmarkdir, port, jobs=1):
+    """
+    Runs the server until interrupted (Ctrl-C).
+
+    Arguments:
+        benchmarkdir    full dirpath of benchmark parent directory
+        port            port to listen on (on 127.0.0.1)
+        jobs            number of worker processes to parse each disassembly
+                        file with
+    """
+    benchmarkdir = os.path.abspath(benchmarkdir)
+    workers = WorkerPool(benchmarkdir, jobs)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port),
+                                             RequestHandler)
+    server.workers = workers
+
+    # Parse the benchmark tree with the settings of constants.py, while the
+    #   first requests are waiting
+    threading.Thread(target=workers.analyze, args=({'warm': True},),
+                     daemon=True).start()
+
+    print('Serving ' + benchmarkdir + ' on http://127.0.0.1:' + str(port) + '/analyze (Ctrl-C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        workers.stop()
+
+
+if __name__ == '__main__':
+    worker()
@@ -8,14 +8,14 @@ Author: Jennifer Hellar
 """
 
 import xlsxwriter
-from constants import *
-import excel
+from .constants import *
+from . import symbols
 
 
-def create_summary(allflag, rvfile=None, armfile=None):
+def create_summary(ctx, allflag, rvfile=None, armfile=None):
     """ Creates the basic Summary worksheet. """
-    global wksheet
-    wksheet = excel.wkbook.add_worksheet('Summary')
+    wksheet = ctx.wkbook.add_worksheet('Summary')
+    ctx.summary = wksheet
 
     # all benchmarks analysis
     if allflag:
@@ -60,8 +60,9 @@ def create_summary(allflag, rvfile=None, armfile=None):
 """ Functions to add specific tables/charts to the worksheet """
 
 
-def add_main_table(row, col, allflag, rvbuild=None, armbuild=None):
+def add_main_table(ctx, row, col, allflag, rvbuild=None, armbuild=None):
     """ Adds the main table ('Function Performance (RISC-V vs. ARM)'). """
+    wksheet = ctx.summary
     if allflag:
         cols = ['Benchmark'] + BUILDS
     else:
@@ -77,12 +78,13 @@ def add_main_table(row, col, allflag, rvbuild=None, armbuild=None):
                 # 'IAR (Final) - ARM']
     end_row = 200   # To be updated later after data filled in
     end_col = col + len(cols) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       SUMMARY_MAIN_TABLE, cols, False)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     SUMMARY_MAIN_TABLE, cols, False)
 
 
-def add_totals_table(row, col, allflag, rvbuild=None, armbuild=None):
+def add_totals_table(ctx, row, col, allflag, rvbuild=None, armbuild=None):
     """ Adds the totals table ('Benchmark Performance (RISC-V vs. ARM)'). """
+    wksheet = ctx.summary
     if allflag:
         headers = [''] + BUILDS
         row_labels = ['Totals (bytes)',
@@ -102,87 +104,87 @@ def add_totals_table(row, col, allflag, rvbuild=None, armbuild=None):
     end_row = row + len(row_labels) + 2
     end_col = col + len(headers) - 1
     # Create table and add row labels
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       SUMMARY_TOTALS_TABLE, headers, True)
-    excel.add_row_labels(wksheet, SUMMARY_TOTALS_TABLE, row_labels)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     SUMMARY_TOTALS_TABLE, headers, True)
+    ctx.add_row_labels(wksheet, SUMMARY_TOTALS_TABLE, row_labels)
 
     if allflag:
         for build in BUILDS:
             table = SUMMARY_TOTALS_TABLE
             # Add formulas for the Totals row
-            cell = excel.get_table_cell(table, build, 'Totals (bytes)')
-            excel.sum_col(wksheet, SUMMARY_MAIN_TABLE, build, cell)
+            cell = ctx.get_table_cell(table, build, 'Totals (bytes)')
+            ctx.sum_col(wksheet, SUMMARY_MAIN_TABLE, build, cell)
             # Add formulas for the % of armcc row
-            denom_cell = excel.get_table_cell(table, armbuild, 'Totals (bytes)')
-            num_cell = excel.get_table_cell(table, build, 'Totals (bytes)')
-            dest_cell = excel.get_table_cell(table, build, '% of '+armbuild)
-            excel.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
+            denom_cell = ctx.get_table_cell(table, armbuild, 'Totals (bytes)')
+            num_cell = ctx.get_table_cell(table, build, 'Totals (bytes)')
+            dest_cell = ctx.get_table_cell(table, build, '% of '+armbuild)
+            ctx.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
             # Add formulas for the % of rvgcc row
-            denom_cell = excel.get_table_cell(table, rvbuild, 'Totals (bytes)')
-            num_cell = excel.get_table_cell(table, build, 'Totals (bytes)')
-            dest_cell = excel.get_table_cell(table, build, '% of '+rvbuild)
-            excel.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
+            denom_cell = ctx.get_table_cell(table, rvbuild, 'Totals (bytes)')
+            num_cell = ctx.get_table_cell(table, build, 'Totals (bytes)')
+            dest_cell = ctx.get_table_cell(table, build, '% of '+rvbuild)
+            ctx.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
     else:
         # Add formulas for the Totals row
-        cell = excel.get_table_cell(SUMMARY_TOTALS_TABLE, armbuild, row_labels[0])
-        excel.sum_col(wksheet, SUMMARY_MAIN_TABLE, armbuild, cell)
-        cell = excel.get_table_cell(SUMMARY_TOTALS_TABLE, rvbuild, row_labels[0])
-        excel.sum_col(wksheet, SUMMARY_MAIN_TABLE, rvbuild, cell)
+        cell = ctx.get_table_cell(SUMMARY_TOTALS_TABLE, armbuild, row_labels[0])
+        ctx.sum_col(wksheet, SUMMARY_MAIN_TABLE, armbuild, cell)
+        cell = ctx.get_table_cell(SUMMARY_TOTALS_TABLE, rvbuild, row_labels[0])
+        ctx.sum_col(wksheet, SUMMARY_MAIN_TABLE, rvbuild, cell)
 
         colname = headers[3]
-        cell = excel.get_table_cell(SUMMARY_TOTALS_TABLE, colname, row_labels[0])
-        excel.sum_col(wksheet, SUMMARY_MAIN_TABLE, colname, cell)
+        cell = ctx.get_table_cell(SUMMARY_TOTALS_TABLE, colname, row_labels[0])
+        ctx.sum_col(wksheet, SUMMARY_MAIN_TABLE, colname, cell)
 
         colname = headers[4]
-        cell = excel.get_table_cell(SUMMARY_TOTALS_TABLE, colname, row_labels[0])
-        excel.sum_col(wksheet, SUMMARY_MAIN_TABLE, colname, cell)
+        cell = ctx.get_table_cell(SUMMARY_TOTALS_TABLE, colname, row_labels[0])
+        ctx.sum_col(wksheet, SUMMARY_MAIN_TABLE, colname, cell)
         # Conditional format RVGCC Delta total to be red/green if >/< 0
         wksheet.conditional_format(cell, {'type': 'cell', 'criteria': '>',
                                           'value': 0,
-                                          'format': excel.red_light_format})
+                                          'format': ctx.red_light_format})
         wksheet.conditional_format(cell, {'type': 'cell', 'criteria': '<',
                                           'value': 0,
-                                          'format': excel.green_light_format})
+                                          'format': ctx.green_light_format})
 
         # Conditional format RVGCC (Final) - ARM total to be red/green if >/< 0
         colname = headers[5]
-        cell = excel.get_table_cell(SUMMARY_TOTALS_TABLE, colname, row_labels[0])
-        excel.sum_col(wksheet, SUMMARY_MAIN_TABLE, colname, cell)
+        cell = ctx.get_table_cell(SUMMARY_TOTALS_TABLE, colname, row_labels[0])
+        ctx.sum_col(wksheet, SUMMARY_MAIN_TABLE, colname, cell)
         wksheet.conditional_format(cell, {'type': 'cell', 'criteria': '>',
                                           'value': 0,
-                                          'format': excel.red_light_format})
+                                          'format': ctx.red_light_format})
         wksheet.conditional_format(cell, {'type': 'cell', 'criteria': '<',
                                           'value': 0,
-                                          'format': excel.green_light_format})
+                                          'format': ctx.green_light_format})
 
         # Add formulas for the % of ARM row
-        denom_cell = excel.get_table_cell(SUMMARY_TOTALS_TABLE, armbuild,
-                                          row_labels[0])
+        denom_cell = ctx.get_table_cell(SUMMARY_TOTALS_TABLE, armbuild,
+                                        row_labels[0])
         table = SUMMARY_TOTALS_TABLE
-        num_cell = excel.get_table_cell(table, headers[1], row_labels[0])
-        dest_cell = excel.get_table_cell(table, headers[1], row_labels[1])
-        excel.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
+        num_cell = ctx.get_table_cell(table, headers[1], row_labels[0])
+        dest_cell = ctx.get_table_cell(table, headers[1], row_labels[1])
+        ctx.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
 
-        num_cell = excel.get_table_cell(table, headers[2], row_labels[0])
-        dest_cell = excel.get_table_cell(table, headers[2], row_labels[1])
-        excel.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
+        num_cell = ctx.get_table_cell(table, headers[2], row_labels[0])
+        dest_cell = ctx.get_table_cell(table, headers[2], row_labels[1])
+        ctx.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
 
-        num_cell = excel.get_table_cell(table, headers[3], row_labels[0])
-        dest_cell = excel.get_table_cell(table, headers[3], row_labels[1])
-        excel.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
+        num_cell = ctx.get_table_cell(table, headers[3], row_labels[0])
+        dest_cell = ctx.get_table_cell(table, headers[3], row_labels[1])
+        ctx.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
 
-        num_cell = excel.get_table_cell(table, headers[5], row_labels[0])
-        dest_cell = excel.get_table_cell(table, headers[5], row_labels[1])
+        num_cell = ctx.get_table_cell(table, headers[5], row_labels[0])
+        dest_cell = ctx.get_table_cell(table, headers[5], row_labels[1])
         # Threshold is 0 because this is relative number
-        excel.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 0, False)
+        ctx.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 0, False)
 
-        denom_cell = excel.get_table_cell(table, headers[2], row_labels[0])
-        num_cell = excel.get_table_cell(table, headers[4], row_labels[0])
-        dest_cell = excel.get_table_cell(table, headers[4], row_labels[2])
-        excel.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
+        denom_cell = ctx.get_table_cell(table, headers[2], row_labels[0])
+        num_cell = ctx.get_table_cell(table, headers[4], row_labels[0])
+        dest_cell = ctx.get_table_cell(table, headers[4], row_labels[2])
+        ctx.record_percentage(wksheet, num_cell, denom_cell, dest_cell, 1, False)
 
 
-def add_replaced_instr_table(reductions, rvbuild, armbuild):
+def add_replaced_instr_table(ctx, reductions, rvbuild, armbuild):
     """
     Adds a table listing the compact instruction reductions.
 
@@ -190,17 +192,18 @@ def add_replaced_instr_table(reductions, rvbuild, armbuild):
         3 columns over from Totals/Main table (whichever is wider)
 
     """
+    wksheet = ctx.summary
     # Set the table location and column headers
-    coord = excel.get_table_loc(SUMMARY_TOTALS_TABLE)
+    coord = ctx.get_table_loc(SUMMARY_TOTALS_TABLE)
     table_row = coord[0]
-    table_col = max(coord[3], excel.get_table_loc(SUMMARY_MAIN_TABLE)[3]) + 3
+    table_col = max(coord[3], ctx.get_table_loc(SUMMARY_MAIN_TABLE)[3]) + 3
     headers = ['Instruction',
                rvbuild + ' reduction',
                rvbuild + ' percentage']
     end_row = 200
     end_col = table_col + len(headers) - 1
-    excel.create_table(wksheet, table_row, table_col, end_row, end_col,
-                       SUMMARY_INSTR_TABLE, headers, False)
+    ctx.create_table(wksheet, table_row, table_col, end_row, end_col,
+                     SUMMARY_INSTR_TABLE, headers, False)
 
     names = []
     vals = []
@@ -211,49 +214,50 @@ def add_replaced_instr_table(reductions, rvbuild, armbuild):
     # Start of data
     row = table_row + 3
     # Divide by total to get percentage reduction
-    denom = excel.get_table_cell(SUMMARY_TOTALS_TABLE, rvbuild, 'Totals (bytes)')
+    denom = ctx.get_table_cell(SUMMARY_TOTALS_TABLE, rvbuild, 'Totals (bytes)')
     table = SUMMARY_INSTR_TABLE
     for i in range(len(names)):
         # Vertical labels are instruction names
-        col = excel.get_table_col(table, 'Instruction')
-        wksheet.write_string(row, col, names[i], excel.header_format)
+        col = ctx.get_table_col(table, 'Instruction')
+        wksheet.write_string(row, col, names[i], ctx.header_format)
 
         # Update the table map to include the reduction and percentage cells
-        excel.update_table_map(table, headers[1], names[i], row)
-        excel.update_table_map(table, headers[2], names[i], row)
+        ctx.update_table_map(table, headers[1], names[i], row)
+        ctx.update_table_map(table, headers[2], names[i], row)
 
         # Record the reduction values
-        col = excel.get_table_col(table, headers[1])
-        wksheet.write_number(row, col, vals[i], excel.light_bg_format)
+        col = ctx.get_table_col(table, headers[1])
+        wksheet.write_number(row, col, vals[i], ctx.light_bg_format)
 
         # Record the percentages (green if > 0)
-        num = excel.get_table_cell(table, headers[1], names[i])
-        dest = excel.get_table_cell(table, headers[2], names[i])
-        excel.record_percentage(wksheet, num, denom, dest, 0, True)
+        num = ctx.get_table_cell(table, headers[1], names[i])
+        dest = ctx.get_table_cell(table, headers[2], names[i])
+        ctx.record_percentage(wksheet, num, denom, dest, 0, True)
 
         row += 1
 
     # Save the location/size of the table
-    excel.update_table_loc(SUMMARY_INSTR_TABLE, table_row, table_col,
-                           row - 1, end_col)
+    ctx.update_table_loc(SUMMARY_INSTR_TABLE, table_row, table_col,
+                         row - 1, end_col)
 
 
-def add_replaced_instr_chart(build):
+def add_replaced_instr_chart(ctx, build):
     """ Add chart to visualize compact instruction reductions. """
+    wksheet = ctx.summary
     # Location of data table
-    coord = excel.get_table_loc(SUMMARY_INSTR_TABLE)
+    coord = ctx.get_table_loc(SUMMARY_INSTR_TABLE)
     # Location of chart (to the right of data table)
     row = coord[0]
     col = coord[3] + 2
     chart_loc = CELL_NAME[(row, col)]
-    chart = excel.wkbook.add_chart({'type': 'column'})
+    chart = ctx.wkbook.add_chart({'type': 'column'})
     # Location of instruction names
-    name_col = excel.get_table_col(SUMMARY_INSTR_TABLE, 'Instruction')
+    name_col = ctx.get_table_col(SUMMARY_INSTR_TABLE, 'Instruction')
     start_nm_cell = CELL_NAME[(coord[0] + 3, name_col)]
     end_nm_cell = CELL_NAME[(coord[2], name_col)]
     # Location of reduction percentage values
     val_col_name = build + ' percentage'
-    val_col = excel.get_table_col(SUMMARY_INSTR_TABLE, val_col_name)
+    val_col = ctx.get_table_col(SUMMARY_INSTR_TABLE, val_col_name)
     start_val_cell = CELL_NAME[(coord[0] + 3, val_col)]
     end_val_cell = CELL_NAME[(coord[2], val_col)]
     chart.add_series({
@@ -267,12 +271,13 @@ def add_replaced_instr_chart(build):
     wksheet.insert_chart(chart_loc, chart, {'x_offset': 0, 'y_offset': 0})
 
 
-def add_replacement_rules_table():
+def add_replacement_rules_table(ctx):
     """
     description
     """
+    wksheet = ctx.summary
     # Set the table location and column headers
-    coord = excel.get_table_loc(SUMMARY_INSTR_TABLE)
+    coord = ctx.get_table_loc(SUMMARY_INSTR_TABLE)
     table_row = coord[0]
     table_col = coord[3] + 6
     table = SUMMARY_RULES_TABLE
@@ -280,8 +285,8 @@ def add_replacement_rules_table():
                'Rules']
     end_row = table_row + len(ENABLED) + 2
     end_col = table_col + len(headers) - 1
-    excel.create_table(wksheet, table_row, table_col, end_row, end_col,
-                       table, headers, False)
+    ctx.create_table(wksheet, table_row, table_col, end_row, end_col,
+                     table, headers, False)
     row = table_row + 3
     for instr in ENABLED:
         # Rules applied
@@ -323,24 +328,24 @@ def add_replacement_rules_table():
                     or (instr == 'cx.swzero'):
                 rule_text = rule_text + '; rs2 = zero; rs1 in ' + str(REG_LIST)
         # Vertical labels are instruction names
-        col = excel.get_table_col(table, 'Replaced Instruction')
-        wksheet.write_string(row, col, instr, excel.header_format)
+        col = ctx.get_table_col(table, 'Replaced Instruction')
+        wksheet.write_string(row, col, instr, ctx.header_format)
         # Update the table map to include the rules cell
-        excel.update_table_map(table, 'Rules', instr, row)
+        ctx.update_table_map(table, 'Rules', instr, row)
         # Record the rules
-        col = excel.get_table_col(table, 'Rules')
-        wksheet.write_string(row, col, rule_text, excel.light_bg_format)
+        col = ctx.get_table_col(table, 'Rules')
+        wksheet.write_string(row, col, rule_text, ctx.light_bg_format)
         row += 1
 
     # Save the location/size of the table
-    excel.update_table_loc(SUMMARY_RULES_TABLE, table_row, table_col,
-                           row - 1, end_col)
+    ctx.update_table_loc(SUMMARY_RULES_TABLE, table_row, table_col,
+                         row - 1, end_col)
 
 
-def add_instr_formats_tables(formats, build):
+def add_instr_formats_tables(ctx, formats, build):
     """ Add the Instruction Format tables to the 'tmp' worksheet. """
     # Location: tmp worksheet
-    sheet = excel.wkbook.get_worksheet_by_name('tmp')
+    sheet = ctx.wkbook.get_worksheet_by_name('tmp')
     row = 0
     col = 3
     headers = ['Instruction', '# (' + build + ')']
@@ -356,9 +361,9 @@ def add_instr_formats_tables(formats, build):
     # create the tables
     for table in tables:
         end_col = col + len(headers) - 1
-        excel.create_table(sheet, row, col, end_row, end_col,
-                           table, headers, False)
-        excel.add_row_labels(sheet, table, row_labels)
+        ctx.create_table(sheet, row, col, end_row, end_col,
+                         table, headers, False)
+        ctx.add_row_labels(sheet, table, row_labels)
         col = col + len(headers)
     # Write the data to the corresponding table
     for lbl in formats.keys():
@@ -366,21 +371,22 @@ def add_instr_formats_tables(formats, build):
         c_formats = formats[lbl]
         for instr in c_formats:
             val = c_formats[instr]
-            cell = excel.get_table_cell(table_nm, '# (' + build + ')', instr)
-            sheet.write_number(cell, val, excel.light_bg_format)
+            cell = ctx.get_table_cell(table_nm, '# (' + build + ')', instr)
+            sheet.write_number(cell, val, ctx.light_bg_format)
 
 
-def add_instr_formats_radar(compiler):
+def add_instr_formats_radar(ctx, compiler):
     """ Add radar to visualize most frequent instruction formats. """
+    wksheet = ctx.summary
     # Location of chart: below instruction frequency table
-    coord = excel.get_table_loc(SUMMARY_INSTR_TABLE)
+    coord = ctx.get_table_loc(SUMMARY_INSTR_TABLE)
     ch_row = max(coord[2] + 8, coord[0] + 19)
     if (compiler == 'rvgcc'):
         ch_col = coord[1]
     chart_loc_cell = CELL_NAME[(ch_row, ch_col)]
 
     # Make the pie chart underneath to mark the instruction format
-    chart = excel.wkbook.add_chart({'type': 'pie'})
+    chart = ctx.wkbook.add_chart({'type': 'pie'})
     chart.add_series({
         'categories':   ['tmp', 0, 0, len(RV32_FORMATS) - 1, 0],
         'values':       ['tmp', 0, 1, len(RV32_FORMATS) - 1, 1],
@@ -396,15 +402,15 @@ def add_instr_formats_radar(compiler):
     wksheet.insert_chart(chart_loc_cell, chart)
 
     # Make the radar chart
-    chart = excel.wkbook.add_chart({'type': 'radar'})
+    chart = ctx.wkbook.add_chart({'type': 'radar'})
     # Data is located on the 'tmp' worksheet
-    tmp_sheet = excel.wkbook.get_worksheet_by_name('tmp')
+    tmp_sheet = ctx.wkbook.get_worksheet_by_name('tmp')
     for i in range(len(RV32_FORMATS)):
         lbl = RV32_FORMATS[i]
-        (row, col, end_row, end_col) = excel.get_table_loc(lbl + ' (Total)')
+        (row, col, end_row, end_col) = ctx.get_table_loc(lbl + ' (Total)')
         name = [tmp_sheet.get_name(), row, col]
         categories = [tmp_sheet.get_name(), row + 3, col, end_row, col]
-        val_col = excel.get_table_col(lbl + ' (Total)', '# (' + compiler + ')')
+        val_col = ctx.get_table_col(lbl + ' (Total)', '# (' + compiler + ')')
         values = [tmp_sheet.get_name(), row + 3, val_col, end_row, val_col]
         chart.add_series({
                 'name':         name,
@@ -423,8 +429,9 @@ def add_instr_formats_radar(compiler):
     wksheet.insert_chart(chart_loc_cell, chart, {'x_offset': 0, 'y_offset': 0})
 
 
-def add_total_instr_table(total, keep, compiler):
+def add_total_instr_table(ctx, total, keep, compiler):
     """ Add a table to list the most common instructions. """
+    wksheet = ctx.summary
     vals = []
     names = []
     for instr in total.keys():
@@ -448,7 +455,7 @@ def add_total_instr_table(total, keep, compiler):
     names.append('other')
 
     # Location for the table and headers
-    coord = excel.get_table_loc(SUMMARY_INSTR_TABLE)
+    coord = ctx.get_table_loc(SUMMARY_INSTR_TABLE)
     row = max(coord[2] + 44, coord[0] + 57)
     if (compiler == 'rvgcc'):
         col = coord[1]
@@ -458,8 +465,8 @@ def add_total_instr_table(total, keep, compiler):
                'percentage']
     end_row = row + len(names) + 3  # extra row for totals
     end_col = col + len(headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       table, headers, True)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     table, headers, True)
 
     # Location of data start
     row += 3
@@ -470,19 +477,19 @@ def add_total_instr_table(total, keep, compiler):
         instr = names[i]
         # Mark 'cx' instructions with gold text
         if (instr in ENABLED):
-            name_format = excel.gold_header_format
-            val_format = excel.light_bg_format
+            name_format = ctx.gold_header_format
+            val_format = ctx.light_bg_format
         # Mark 32-bit instructions with red text
         elif (instr.find('c.') == -1) and (instr != 'other'):
-            name_format = excel.red_header_format
-            val_format = excel.red_light_format
+            name_format = ctx.red_header_format
+            val_format = ctx.red_light_format
         # Mark 16-bit instructions that need to be replaced
-        elif (instr == 'c.addi') and (addi_subi_en):
-            name_format = excel.orange_header_format
-            val_format = excel.orange_light_format
+        elif (instr == 'c.addi') and symbols.addi_subi_enabled():
+            name_format = ctx.orange_header_format
+            val_format = ctx.orange_light_format
         else:
-            name_format = excel.header_format
-            val_format = excel.light_bg_format
+            name_format = ctx.header_format
+            val_format = ctx.light_bg_format
         # Write the pair name
         name_cell = CELL_NAME[(row + i, col)]
         wksheet.write_string(name_cell, instr, name_format)
@@ -490,26 +497,27 @@ def add_total_instr_table(total, keep, compiler):
         val_cell = CELL_NAME[(row + i, col + 1)]
         wksheet.write_number(val_cell, vals[i], val_format)
         # Update the table mapping to include these cells
-        excel.update_table_map(table, 'instruction', instr, row + i)
-        excel.update_table_map(table, '# of occurrences', instr, row + i)
-        excel.update_table_map(table, 'percentage', instr, row + i)
+        ctx.update_table_map(table, 'instruction', instr, row + i)
+        ctx.update_table_map(table, '# of occurrences', instr, row + i)
+        ctx.update_table_map(table, 'percentage', instr, row + i)
 
     end_val = val_cell
     # Add a total formula at the bottom of the table
     formula = '=SUM(' + start_val + ':' + end_val + ')'
     total_cell = CELL_NAME[(row + len(vals), col + 1)]
-    wksheet.write_formula(total_cell, formula, excel.bold_light_format)
+    wksheet.write_formula(total_cell, formula, ctx.bold_light_format)
     row = row + len(vals)
-    wksheet.write_string(row, col, 'Total:', excel.bold_light_format)
+    wksheet.write_string(row, col, 'Total:', ctx.bold_light_format)
     # Add the percentage formula to the appropriate column
     end_perc = CELL_NAME[(row - 2, col + 2)]
     formula = '=(' + start_val + ':' + end_val + ')/' + total_cell
     wksheet.write_array_formula(start_perc + ':' + end_perc, formula,
-                                excel.percent_format)
+                                ctx.percent_format)
 
 
-def add_pairs_table(pairs, keep, compiler, armbuild):
+def add_pairs_table(ctx, pairs, keep, compiler, armbuild):
     """ Add a table to list the most common instruction pairs. """
+    wksheet = ctx.summary
     vals = []
     names = []
     for pair in pairs.keys():
@@ -531,25 +539,25 @@ def add_pairs_table(pairs, keep, compiler, armbuild):
     names.append('other')
 
     # Location for the table and headers
-    row = excel.get_table_loc(SUMMARY_RVGCC_INSTR_TOT_TABLE)[2] + 8
+    row = ctx.get_table_loc(SUMMARY_RVGCC_INSTR_TOT_TABLE)[2] + 8
     if (compiler == 'rvgcc'):
-        col = excel.get_table_loc(SUMMARY_INSTR_TABLE)[1]
+        col = ctx.get_table_loc(SUMMARY_INSTR_TABLE)[1]
         table = SUMMARY_RVGCC_PAIRS_TABLE
     headers = ['Instruction Pair',
                '# of Occurrences',
                'Reduction (Rel. to ARM)']
     end_row = row + len(names) + 3  # extra row for totals
     end_col = col + len(headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       table, headers, True)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     table, headers, True)
 
     # Location of data start
     row += 3
     start_name = CELL_NAME[(row, col)]
     start_val = CELL_NAME[(row, col + 1)]
     start_perc = CELL_NAME[(row, col + 2)]
-    denom = excel.get_table_cell(SUMMARY_TOTALS_TABLE, armbuild,
-                                 'Totals (bytes)')
+    denom = ctx.get_table_cell(SUMMARY_TOTALS_TABLE, armbuild,
+                               'Totals (bytes)')
     for i in range(len(vals)):
         # Write the pair name
         name_cell = CELL_NAME[(row + i, col)]
@@ -559,10 +567,10 @@ def add_pairs_table(pairs, keep, compiler, armbuild):
             nm = '{:<15}{:<15}{:<15}'.format(prev, '->', curr)
         else:
             nm = names[i]
-        wksheet.write_string(name_cell, nm, excel.header_format)
+        wksheet.write_string(name_cell, nm, ctx.header_format)
         # Write the number of occurences
         val_cell = CELL_NAME[(row + i, col + 1)]
-        wksheet.write_number(val_cell, vals[i], excel.light_bg_format)
+        wksheet.write_number(val_cell, vals[i], ctx.light_bg_format)
         if names[i] != 'other':
             # Write the potential percentage reduction
             perc_cell = CELL_NAME[(row + i, col + 2)]
@@ -573,24 +581,25 @@ def add_pairs_table(pairs, keep, compiler, armbuild):
             else:
                 b = '2'  # 2 bytes saved if combined to 1 32-bit instruction
             formula = '= -' + b + '*(' + val_cell + '/' + denom + ')'
-            wksheet.write_formula(perc_cell, formula, excel.percent_format)
+            wksheet.write_formula(perc_cell, formula, ctx.percent_format)
         # Update the table mapping to include these cells
-        excel.update_table_map(table, 'Instruction Pair', nm, row + i)
-        excel.update_table_map(table, '# of Occurrences', nm, row + i)
-        excel.update_table_map(table, 'Reduction (Rel. to ARM)',
-                               nm, row + i)
+        ctx.update_table_map(table, 'Instruction Pair', nm, row + i)
+        ctx.update_table_map(table, '# of Occurrences', nm, row + i)
+        ctx.update_table_map(table, 'Reduction (Rel. to ARM)',
+                             nm, row + i)
 
     end_val = val_cell
     # Add a total formula at the bottom of the table
     formula = '=SUM(' + start_val + ':' + end_val + ')'
     total_cell = CELL_NAME[(row + len(vals), col + 1)]
-    wksheet.write_formula(total_cell, formula, excel.bold_light_format)
+    wksheet.write_formula(total_cell, formula, ctx.bold_light_format)
     row = row + len(vals)
-    wksheet.write_string(row, col, 'Total:', excel.bold_light_format)
+    wksheet.write_string(row, col, 'Total:', ctx.bold_light_format)
 
 
-def add_overshoot_table(results, arm_results, keep, compiler):
+def add_overshoot_table(ctx, results, arm_results, keep, compiler):
     """ Add a table to list the functions which overshoot ARM by the most. """
+    wksheet = ctx.summary
     # Create lists of overshoots and corresponding function names
     vals = []
     names = []
@@ -624,7 +633,7 @@ def add_overshoot_table(results, arm_results, keep, compiler):
 
     # Location for the table and headers
     if (compiler == 'rvgcc'):
-        coord = excel.get_table_loc(SUMMARY_RVGCC_PAIRS_TABLE)
+        coord = ctx.get_table_loc(SUMMARY_RVGCC_PAIRS_TABLE)
         table = SUMMARY_RVGCC_OVERSHOOT_TABLE
     row = coord[2] + 8
     col = coord[1]
@@ -633,8 +642,8 @@ def add_overshoot_table(results, arm_results, keep, compiler):
                '% of Total']
     end_row = row + len(names) + 3  # extra row for total
     end_col = col + len(headers) - 1
-    excel.create_table(wksheet, row, col, end_row, end_col,
-                       table, headers, True)
+    ctx.create_table(wksheet, row, col, end_row, end_col,
+                     table, headers, True)
 
     # Location of data start
     row += 3
@@ -648,53 +657,54 @@ def add_overshoot_table(results, arm_results, keep, compiler):
         # Write the function name (with a link to its worksheet)
         if nm != 'other':
             formula = '=HYPERLINK("#' + nm[11:] + '!A1", "' + nm + '")'
-            wksheet.write_formula(name_cell, formula, excel.header_format)
+            wksheet.write_formula(name_cell, formula, ctx.header_format)
         else:
-            wksheet.write_string(name_cell, nm, excel.header_format)
+            wksheet.write_string(name_cell, nm, ctx.header_format)
         # Write the function overshoot value
         val_cell = CELL_NAME[(row + i, col + 1)]
-        wksheet.write_number(val_cell, vals[i], excel.light_bg_format)
+        wksheet.write_number(val_cell, vals[i], ctx.light_bg_format)
         # Update the table mapping to include these cells
-        excel.update_table_map(table, 'Function (Click to View)', nm, row + i)
-        excel.update_table_map(table, 'Overshoot (bytes)', nm, row + i)
-        excel.update_table_map(table, '% of Total', nm, row + i)
+        ctx.update_table_map(table, 'Function (Click to View)', nm, row + i)
+        ctx.update_table_map(table, 'Overshoot (bytes)', nm, row + i)
+        ctx.update_table_map(table, '% of Total', nm, row + i)
 
     end_name_cell = name_cell
     end_val_cell = val_cell
-    end_perc_cell = excel.get_table_cell(table, '% of Total',
-                                         'other')
+    end_perc_cell = ctx.get_table_cell(table, '% of Total',
+                                       'other')
     # Add a total overshoot formula at the bottom of the table
     formula = '=SUM(' + start_val_cell + ':' + end_val_cell + ')'
     total_cell = CELL_NAME[(row + len(vals), col + 1)]
-    wksheet.write_formula(total_cell, formula, excel.bold_light_format)
+    wksheet.write_formula(total_cell, formula, ctx.bold_light_format)
     wksheet.write_string(row + len(vals), col, 'Total:',
-                         excel.bold_light_format)
+                         ctx.bold_light_format)
     # Add the percentage formula to the appropriate column
     formula = '=(' + start_val_cell + ':' + end_val_cell + ')/' + total_cell
     wksheet.write_array_formula(start_perc_cell + ':' + end_perc_cell, formula,
-                                excel.percent_format)
+                                ctx.percent_format)
 
 
-def add_overshoot_chart(compiler):
+def add_overshoot_chart(ctx, compiler):
     """ Adds a chart of the function overshoots (table must exist first). """
+    wksheet = ctx.summary
     # Location of the data table
     if (compiler == 'rvgcc'):
         table = SUMMARY_RVGCC_OVERSHOOT_TABLE
-    coord = excel.get_table_loc(table)
+    coord = ctx.get_table_loc(table)
     # Location of function names
-    col = excel.get_table_col(table, 'Function (Click to View)')
+    col = ctx.get_table_col(table, 'Function (Click to View)')
     start_name_cell = CELL_NAME[(coord[0] + 3, col)]
-    end_name_cell = excel.get_table_cell(table, 'Function (Click to View)',
-                                         'other')
+    end_name_cell = ctx.get_table_cell(table, 'Function (Click to View)',
+                                       'other')
     # Location of overshoot values
-    col = excel.get_table_col(table, 'Overshoot (bytes)')
+    col = ctx.get_table_col(table, 'Overshoot (bytes)')
     start_val_cell = CELL_NAME[(coord[0] + 3, col)]
-    end_val_cell = excel.get_table_cell(table, 'Overshoot (bytes)', 'other')
+    end_val_cell = ctx.get_table_cell(table, 'Overshoot (bytes)', 'other')
     # Location of the chart
     row = coord[2] + 8
     col = coord[1]
     chart_loc = CELL_NAME[(row, col)]
-    chart1 = excel.wkbook.add_chart({'type': 'pie'})
+    chart1 = ctx.wkbook.add_chart({'type': 'pie'})
     chart1.add_series({
         'name':         'Function Contribution to Overshoot Data',
         'categories':   '=Summary!' + start_name_cell + ':' + end_name_cell,
@@ -711,17 +721,18 @@ def add_overshoot_chart(compiler):
 """ Functions to record data to the worksheet """
 
 
-def record_all_main(results, benchmarks):
+def record_all_main(ctx, results, benchmarks):
+    wksheet = ctx.summary
     table = SUMMARY_MAIN_TABLE
-    coord = excel.get_table_loc(SUMMARY_MAIN_TABLE)
+    coord = ctx.get_table_loc(SUMMARY_MAIN_TABLE)
     (table_row, table_col, table_end_row, table_end_col) = coord
     row = table_row + 3     # Start of data rows
     # Number the functions
     wksheet.write_column(row, 0, [i for i in range(len(benchmarks))])
-    curr_format = excel.light_bg_format
+    curr_format = ctx.light_bg_format
     for b in benchmarks:
         # Benchmark name
-        col = excel.get_table_col(table, 'Benchmark')
+        col = ctx.get_table_col(table, 'Benchmark')
         wksheet.write_string(row, col, b, curr_format)
 
         # Benchmark sizes
@@ -730,21 +741,21 @@ def record_all_main(results, benchmarks):
                 size = results[build][b]
             elif build.find('rv') != -1:
                 size = results[build][b][0]
-            col = excel.get_table_col(table, build)
+            col = ctx.get_table_col(table, build)
             wksheet.write_number(row, col, size, curr_format)
 
         row += 1
         # Alternate background colors
-        if curr_format == excel.light_bg_format:
-            curr_format = excel.dark_bg_format
+        if curr_format == ctx.light_bg_format:
+            curr_format = ctx.dark_bg_format
         else:
-            curr_format = excel.light_bg_format
+            curr_format = ctx.light_bg_format
 
     # Save the location of the table
-    excel.update_table_loc(table, table_row, table_col, row - 1, table_end_col)
+    ctx.update_table_loc(table, table_row, table_col, row - 1, table_end_col)
 
 
-def record_riscv_data(func, total_reductions, rvbuild):
+def record_riscv_data(ctx, func, total_reductions, rvbuild):
     """
     Records the RISC-V results for all benchmark functions to the main table.
 
@@ -754,13 +765,14 @@ def record_riscv_data(func, total_reductions, rvbuild):
         - 'RVGCC Delta'
 
     """
+    wksheet = ctx.summary
     table = SUMMARY_MAIN_TABLE
-    coord = excel.get_table_loc(SUMMARY_MAIN_TABLE)
+    coord = ctx.get_table_loc(SUMMARY_MAIN_TABLE)
     (table_row, table_col, table_end_row, table_end_col) = coord
     row = table_row + 3     # Start of data rows
     # Number the functions
     wksheet.write_column(row, 0, [i for i in range(len(func.keys()))])
-    curr_format = excel.light_bg_format
+    curr_format = ctx.light_bg_format
     # Record the values for each function
     for nm in func.keys():
         if (nm != '__riscv_save') and (nm != '__riscv_restore'):
@@ -772,54 +784,54 @@ def record_riscv_data(func, total_reductions, rvbuild):
             # Function name (with link to appropriate worksheet)
             sheet = nm
             formula = '=HYPERLINK("#' + sheet + '!A1", "' + nm + '")'
-            col = excel.get_table_col(table, 'Function (Click to View)')
+            col = ctx.get_table_col(table, 'Function (Click to View)')
             wksheet.write_formula(row, col, formula, curr_format)
             # 'RVGCC'
-            col = excel.get_table_col(table, rvbuild)
+            col = ctx.get_table_col(table, rvbuild)
             wksheet.write_number(row, col, total, curr_format)
             # 'RVGCC (Final)'
             reduced = total - func_reduction
-            col = excel.get_table_col(table, rvbuild + ' (final)')
+            col = ctx.get_table_col(table, rvbuild + ' (final)')
             wksheet.write_number(row, col, reduced, curr_format)
             row += 1
             # Alternate background colors
-            if curr_format == excel.light_bg_format:
-                curr_format = excel.dark_bg_format
+            if curr_format == ctx.light_bg_format:
+                curr_format = ctx.dark_bg_format
             else:
-                curr_format = excel.light_bg_format
+                curr_format = ctx.light_bg_format
     if (save_restore_en):
         # '__riscv_save' and '__riscv_restore' go last
         (total, r, i, t, b) = func['__riscv_save']
         sheet = '__riscv_save'
         formula = '=HYPERLINK("#' + sheet + '!A1", "' + '__riscv_save' + '")'
-        col = excel.get_table_col(table, 'Function (Click to View)')
+        col = ctx.get_table_col(table, 'Function (Click to View)')
         wksheet.write_formula(row, col, formula, curr_format)
         # 'RVGCC'
-        col = excel.get_table_col(table, rvbuild)
+        col = ctx.get_table_col(table, rvbuild)
         wksheet.write_number(row, col, total, curr_format)
         # 'RVGCC (Final)'
-        col = excel.get_table_col(table, rvbuild + ' (final)')
+        col = ctx.get_table_col(table, rvbuild + ' (final)')
         if ('push (save)' in ENABLED):
             wksheet.write_number(row, col, 0, curr_format)
         else:
             wksheet.write_number(row, col, total, curr_format)
         row += 1
         # Alternate backgrounds
-        if curr_format == excel.light_bg_format:
-            curr_format = excel.dark_bg_format
+        if curr_format == ctx.light_bg_format:
+            curr_format = ctx.dark_bg_format
         else:
-            curr_format = excel.light_bg_format
+            curr_format = ctx.light_bg_format
         # '__riscv_restore'
         (total, r, i, t, b) = func['__riscv_restore']
         sheet = '__riscv_restore'
         formula = '=HYPERLINK("#' + sheet + '!A1", "' + '__riscv_restore' + '")'
-        col = excel.get_table_col(table, 'Function (Click to View)')
+        col = ctx.get_table_col(table, 'Function (Click to View)')
         wksheet.write_formula(row, col, formula, curr_format)
         # 'RVGCC'
-        col = excel.get_table_col(table, rvbuild)
+        col = ctx.get_table_col(table, rvbuild)
         wksheet.write_number(row, col, total, curr_format)
         # 'RVGCC (Final)'
-        col = excel.get_table_col(table, rvbuild + ' (final)')
+        col = ctx.get_table_col(table, rvbuild + ' (final)')
         if ('pop (restore)' in ENABLED):
             wksheet.write_number(row, col, 0, curr_format)
         else:
@@ -827,34 +839,35 @@ def record_riscv_data(func, total_reductions, rvbuild):
         row += 1
 
     # Save the location of the table
-    excel.update_table_loc(table, table_row, table_col, row - 1, table_end_col)
+    ctx.update_table_loc(table, table_row, table_col, row - 1, table_end_col)
     # Calculate 'RVGCC Delta'
-    excel.subtract_col(wksheet, table, rvbuild + ' (final)', rvbuild,
-                       rvbuild + ' delta')
+    ctx.subtract_col(wksheet, table, rvbuild + ' (final)', rvbuild,
+                     rvbuild + ' delta')
 
 
-def record_arm_data(rv_results, arm_results, rvbuild, armbuild):
+def record_arm_data(ctx, rv_results, arm_results, rvbuild, armbuild):
     """
     Records the ARM results for all benchmark functions to the main table.
 
     Fills in and formats the following columns:
         - 'ARM'         - 'RISC-V (Final) - ARM'
     """
-    coord = excel.get_table_loc(SUMMARY_MAIN_TABLE)
+    wksheet = ctx.summary
+    coord = ctx.get_table_loc(SUMMARY_MAIN_TABLE)
     (table_row, table_col, table_end_row, table_end_col) = coord
     row = table_row + 3
-    curr_format = excel.light_bg_format
+    curr_format = ctx.light_bg_format
     for func_name in rv_results.keys():
         if (func_name != '__riscv_save') and (func_name != '__riscv_restore'):
             bytes = arm_results[func_name]
-            col = excel.get_table_col(SUMMARY_MAIN_TABLE, armbuild)
+            col = ctx.get_table_col(SUMMARY_MAIN_TABLE, armbuild)
             wksheet.write_number(row, col, bytes, curr_format)
             row += 1
             # Alternate backgrounds for each row
-            if curr_format == excel.light_bg_format:
-                curr_format = excel.dark_bg_format
+            if curr_format == ctx.light_bg_format:
+                curr_format = ctx.dark_bg_format
             else:
-                curr_format = excel.light_bg_format
+                curr_format = ctx.light_bg_format
     # Calculate 'RVGCC (Final) - ARM'
-    excel.subtract_col(wksheet, SUMMARY_MAIN_TABLE, rvbuild + ' (final)',
-                       armbuild, rvbuild + ' (final) - ' + armbuild)
+    ctx.subtract_col(wksheet, SUMMARY_MAIN_TABLE, rvbuild + ' (final)',
+                     armbuild, rvbuild + ' (final) - ' + armbuild)
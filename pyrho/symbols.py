@@ -0,0 +1,129 @@
+"""
+Opcode and Register Symbols
+
+Interns the opcode and register names found in the disassembly as small
+integer ids, so that ENABLED and REG_LIST can be checked as bitsets and the
+RV32 instruction formats looked up by id instead of searching lists.
+
+"""
+
+import threading
+
+from .constants import ENABLED
+from .constants import REG_LIST
+from .constants import RV32_FORMATS
+from .constants import RV32_INSTR_FORMATS
+from .constants import RV32C_INSTR_FORMATS
+from .decoder import REG_NAMES
+
+# Interned names (by id) with the reverse lookup, starting with the ENABLED
+#   opcodes and the REG_LIST and RISC-V ABI registers
+#   Key: name
+#   Val: id
+OPCODES = []
+opcode_ids = {}
+REGISTERS = []
+register_ids = {}
+
+# ADDI/SUBI replacements (see addi_subi_enabled())
+ADDI_SUBI = ['cx.addi8', 'cx.addi5', 'cx.subi8', 'cx.subi5']
+
+# Held to intern new names, since the RISC-V and Arm files of a benchmark may
+#   be parsed on different threads (see analyze.single_benchmark())
+lock = threading.Lock()
+
+
+def opcode_id(name):
+    """ Returns the id of an opcode, interning it if new. """
+    if name not in opcode_ids:
+        with lock:
+            if name not in opcode_ids:
+                OPCODES.append(name)
+                opcode_ids[name] = len(OPCODES) - 1
+    return opcode_ids[name]
+
+
+def register_id(name):
+    """ Returns the id of a register, interning it if new. """
+    if name not in register_ids:
+        with lock:
+            if name not in register_ids:
+                REGISTERS.append(name)
+                register_ids[name] = len(REGISTERS) - 1
+    return register_ids[name]
+
+
+# Intern the known names up front, so they have the lowest ids
+for name in list(RV32_INSTR_FORMATS.keys()) + list(RV32C_INSTR_FORMATS.keys()):
+    opcode_id(name)
+for name in ENABLED:
+    opcode_id(name)
+for name in list(REG_LIST) + REG_NAMES:
+    register_id(name)
+
+# Bitsets of ENABLED opcodes and REG_LIST registers (bit n is id n)
+ENABLED_MASK = 0
+for name in ENABLED:
+    ENABLED_MASK |= 1 << opcode_id(name)
+REG_MASK = 0
+for name in REG_LIST:
+    REG_MASK |= 1 << register_id(name)
+
+# Instruction format labels to increment for each RV32 opcode (by id)
+#   Val: tuple of (format label, base instruction), more than one for some
+#       pseudoinstructions (e.g. call20 --> auipc, jalr)
+RV32_FORMAT_COUNTS = [None] * len(OPCODES)
+for (name, instr_type) in RV32_INSTR_FORMATS.items():
+    if (instr_type[0] not in RV32_FORMATS):
+        # Pseudoinstruction, count as its base instruction(s)
+        counts = tuple((RV32_INSTR_FORMATS[base][0], base)
+                       for base in instr_type)
+    else:
+        counts = ((instr_type[0], name),)
+    RV32_FORMAT_COUNTS[opcode_id(name)] = counts
+
+# Base instructions of each RV32 format (in RV32_INSTR_FORMATS order)
+#   Key: format label
+#   Val: list of base instructions
+RV32_FORMAT_INSTRS = {}
+for lbl in RV32_FORMATS:
+    RV32_FORMAT_INSTRS[lbl] = [instr for instr in RV32_INSTR_FORMATS.keys()
+                               if (RV32_INSTR_FORMATS[instr][0] == lbl)]
+
+
+def is_enabled(name):
+    """ Checks if a replacement instruction (e.g. 'cx.sb') is ENABLED. """
+    i = opcode_ids.get(name)
+    return (i is not None) and ((ENABLED_MASK >> i) & 1 == 1)
+
+
+def addi_subi_enabled():
+    """
+    Checks if any ADDI/SUBI replacement (e.g. 'cx.addi8') is ENABLED, in which
+    case the 16-bit C.ADDI instructions are to be replaced too.
+    """
+    return any([is_enabled(name) for name in ADDI_SUBI])
+
+
+def in_reg_list(name):
+    """ Checks if a register is in REG_LIST. """
+    i = register_ids.get(name)
+    return (i is not None) and ((REG_MASK >> i) & 1 == 1)
+
+
+def format_counts(opcode):
+    """
+    Returns the (format label, base instruction) pairs to increment for an
+    RV32 opcode (see RV32_FORMAT_COUNTS).
+    """
+    i = opcode_ids.get(opcode)
+    if (i is None) or (i >= len(RV32_FORMAT_COUNTS)) \
+            or (RV32_FORMAT_COUNTS[i] is None):
+        raise KeyError(opcode)
+    return RV32_FORMAT_COUNTS[i]
+
+
+def new_formats():
+    """ Returns a zeroed f_formats dictionary (see riscv.py). """
+    return {lbl: dict.fromkeys(RV32_FORMAT_INSTRS[lbl], 0)
+            for lbl in RV32_FORMATS}
@@ -0,0 +1,205 @@
+"""
+Watch Mode
+
+Functions to keep PyRho running once the benchmarks are analyzed (see main.py
+--watch), which analyze them again whenever their disassembly or function
+selection files change, e.g. as a toolchain is being worked on.
+
+Only the benchmark builds whose files changed are scanned again: the results
+of the others are kept from the previous analysis, and the instructions of
+the functions already parsed are kept in memory (see parser.keep_table()).
+The files are polled (every WATCH_INTERVAL seconds), so this works the same
+on any platform and file system.
+
+"""
+
+import os
+import time
+import traceback
+
+# local scripts
+from . import analyze
+from . import config
+from .constants import WATCH_INTERVAL
+
+
+def get_benchmarks(benchmarkdir):
+    """ Returns the benchmarks (subdirectories) of the benchmark tree. """
+    filedirs = os.listdir(benchmarkdir)
+    benchmarks = [f for f in filedirs if os.path.isdir(os.path.join(benchmarkdir, f))]
+    benchmarks.sort()
+    return benchmarks
+
+
+def get_state(benchmarkdir, benchmarks):
+    """
+    Reads the sizes and modification times of the files the analysis of the
+    benchmarks depends on: their disassembly files, and their master config
+    files (from which the config file of each build is created, see
+    config.update_subconfig()).
+
+    Returns a dictionary:
+        * Key: (benchmark, build), with build None for the master config file
+        * Val: (size, modification time)
+    """
+    configdir = os.path.join(os.getcwd(), 'results', 'config')
+    state = {}
+    for benchmark in benchmarks:
+        paths = {}
+        benchmarkpath = os.path.join(benchmarkdir, benchmark)
+        if os.path.isdir(benchmarkpath):
+            for fname in os.listdir(benchmarkpath):
+                if (fname.find('disassembly') != -1) and (fname.find('_') != -1):
+                    paths[fname[:fname.index('_')]] = os.path.join(benchmarkpath, fname)
+        paths[None] = os.path.join(configdir, benchmark + '_master_selection.txt')
+        for (build, path) in paths.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # e.g. removed since listed
+                continue
+            state[(benchmark, build)] = (stat.st_size, stat.st_mtime_ns)
+    return state
+
+
+def get_changes(old, new):
+    """
+    Returns a sorted list of the (benchmark, build) of the files added,
+    removed or modified between two states (see get_state()).
+    """
+    keys = set(old.keys()).union(new.keys())
+    changes = [key for key in keys if (old.get(key) != new.get(key))]
+    return sorted(changes, key=lambda key: (key[0], key[1] or ''))
+
+
+def wait_for_changes(benchmarkdir, benchmarks, state):
+    """
+    Polls the files of the benchmarks (see get_state()) until they change,
+    then until they have not changed for WATCH_INTERVAL seconds (e.g. while a
+    disassembly file is being written).
+
+    Arguments:
+        benchmarkdir    full dirpath of benchmark parent directory
+        benchmarks      benchmarks to watch (if None, all subdirectories of
+                        the benchmark parent directory, as they are added)
+        state           state of the files last analyzed
+
+    Returns a tuple of the new state and the changes (see get_changes()).
+    """
+    new = state
+    while (new == state):
+        time.sleep(WATCH_INTERVAL)
+        new = get_state(benchmarkdir, benchmarks or get_benchmarks(benchmarkdir))
+    settled = None
+    while (settled != new):
+        time.sleep(WATCH_INTERVAL)
+        (settled, new) = (new, get_state(benchmarkdir, benchmarks or get_benchmarks(benchmarkdir)))
+    return (new, get_changes(state, new))
+
+
+def analyze_all(armbuilds, rvbuilds, benchmarkdir, output_file, jobs, scans,
+                changes):
+    """
+    Analyzes the benchmarks with changed files again, creating their workbooks
+    (see analyze.multiple_benchmark()), then the summary workbook(s) with the
+    results of the other benchmarks kept (see analyze.all_benchmarks()).
+
+    Returns the data results of all the files (see analyze.all_benchmarks()),
+    or None if master config files had to be created for new benchmarks first
+    (as for main.py --all).
+    """
+    benchmarks = get_benchmarks(benchmarkdir)
+    configdir = os.path.join(os.getcwd(), 'results', 'config')
+    changed = set(benchmark for (benchmark, build) in changes)
+    # Keep the results of the files which have not changed
+    scans = {key: res for (key, res) in scans.items()
+             if (key[0] in benchmarks) and (key not in changes)
+             and ((key[0], None) not in changes)}
+    # Create the master config files of any new benchmarks
+    configmissing = []
+    for benchmark in benchmarks:
+        masteropt = os.path.join(configdir, benchmark + '_master_selection.txt')
+        if not os.path.exists(masteropt):
+            configmissing.append(benchmark)
+    if len(configmissing) > 0:
+        config.create_configurations(benchmarkdir, jobs, configmissing)
+        print('\nNew function selection file(s) created for [' + ','.join(configmissing) + ']. Please review and select function(s) to parse.')
+        return None
+    for benchmark in sorted(changed.intersection(benchmarks)):
+        pth = os.path.join(benchmarkdir, benchmark)
+        scans.update(analyze.multiple_benchmark(armbuilds, rvbuilds, pth, None,
+                                                jobs))
+    return analyze.all_benchmarks(armbuilds, rvbuilds, benchmarkdir,
+                                  output_file, jobs, scans)
+
+
+def watch(armbuilds, rvbuilds, benchmarkpath, output_file, jobs=1,
+          allflag=False, scans=None):
+    """
+    Analyzes the benchmarks again whenever their files change, until
+    interrupted (Ctrl-C).
+
+    Arguments:
+        armbuilds       Arm builds to analyze (armcc, armclang, ...)
+        rvbuilds        RISC-V builds to analyze (rvgcc, ...)
+        benchmarkpath   Path to benchmark directory (or with allflag, to the
+                            benchmark parent directory)
+        output_file     Output Excel workbook name
+        jobs            Number of worker processes (see main.py --jobs)
+        allflag         True to analyze all benchmarks (see main.py --all)
+        scans           Data results of the files already analyzed
+    """
+    if allflag:
+        benchmarkdir = benchmarkpath
+        benchmarks = None
+    else:
+        benchmarkpath = os.path.normpath(benchmarkpath)
+        benchmarkdir = os.path.dirname(benchmarkpath)
+        benchmarks = [os.path.basename(benchmarkpath)]
+    if scans is None:
+        scans = {}
+
+    state = get_state(benchmarkdir, benchmarks or get_benchmarks(benchmarkdir))
+    # Changes not yet analyzed (e.g. after an error)
+    pending = []
+    while True:
+        print('\nWatching ' + os.path.abspath(benchmarkpath) + ' for changes (Ctrl-C to stop)...')
+        try:
+            (state, changes) = wait_for_changes(benchmarkdir, benchmarks, state)
+        except KeyboardInterrupt:
+            print('')
+            return
+        print('\nChanged: ' + ', '.join(benchmark + ' ' + (build or 'selection')
+                                      for (benchmark, build) in changes))
+        pending = sorted(set(pending + changes),
+                         key=lambda key: (key[0], key[1] or ''))
+
+        analyze.timings.clear()
+        try:
+            if allflag:
+                res = analyze_all(armbuilds, rvbuilds, benchmarkdir,
+                                  output_file, jobs, scans, pending)
+                # The master config files created for new benchmarks are
+                #   not changes to analyze (until they are edited)
+                new = get_state(benchmarkdir, get_benchmarks(benchmarkdir))
+                for (key, value) in new.items():
+                    if (key[1] is None) and (key not in state):
+                        state[key] = value
+                if res is None:
+                    continue
+                scans = res
+            else:
+                analyze.multiple_benchmark(armbuilds, rvbuilds, benchmarkpath,
+                                           output_file, jobs)
+            pending = []
+            analyze.print_timings()
+            analyze.save_timings()
+        except KeyboardInterrupt:
+            print('')
+            return
+        except Exception:
+            # Keep watching, e.g. for the files to be fixed
+            print('\n\n')
+            traceback.print_exc()
+            print('\n\n')
+            print('Incomplete! See error or wait for the files to change.')
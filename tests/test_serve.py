@@ -0,0 +1,124 @@
+"""
+Tests of the analysis server (see pyrho/serve.py), run on a benchmark tree
+created in a temporary directory:
+
+    python -m pytest tests
+
+"""
+
+import http.server
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+from pyrho import serve
+
+# Number of 'lw a5,8(gp)' instructions in the RISC-V function, which is then
+#   too large for cx.lwpc offsets, even with every LW replaced (over 1 KB, see
+#   cx.check_offsets())
+LOADS = 600
+
+ARM_DISASSEMBLY = '''
+out.elf:     file format elf32-littlearm
+
+
+Disassembly of section .text:
+
+00000074 <main>:
+  74:\tb510      \tpush\t{r4, lr}
+  76:\t2000      \tmovs\tr0, #0
+  78:\tbd10      \tpop\t{r4, pc}
+'''
+
+
+def write_benchmark(benchmarkdir):
+    """ Writes the disassembly and the function selection of benchmark 'big'. """
+    benchmarkpath = os.path.join(benchmarkdir, 'big')
+    os.makedirs(benchmarkpath)
+    lines = ['', 'out.elf:     file format elf32-littleriscv', '', '',
+             'Disassembly of section .text:', '', '00010074 <main>:']
+    addr = 0x10074
+    for i in range(LOADS):
+        lines.append('   {:x}:\t0081a783          \tlw\ta5,8(gp)'.format(addr))
+        addr += 4
+    lines.append('   {:x}:\t8082                \tret'.format(addr))
+    with open(os.path.join(benchmarkpath, 'rvgcc_big_disassembly.txt'), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    with open(os.path.join(benchmarkpath, 'armcc_big_disassembly.txt'), 'w') as f:
+        f.write(ARM_DISASSEMBLY)
+
+    configdir = os.path.join('results', 'config')
+    os.makedirs(configdir)
+    with open(os.path.join(configdir, 'big_master_selection.txt'), 'w') as f:
+        f.write('{:<50s}{:<30s}{:<30s}\n'.format('function', 'parse (Y/N)',
+                                                 'sub-function (Y/N)'))
+        f.write('{:<50s}{:<30s}{:<30s}\n'.format('main', 'Y', 'N'))
+
+
+class ServeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The server and its workers keep their results in the current directory
+        cls.cwd = os.getcwd()
+        cls.tmpdir = tempfile.mkdtemp()
+        os.chdir(cls.tmpdir)
+        benchmarkdir = os.path.join(cls.tmpdir, 'benchmarks')
+        write_benchmark(benchmarkdir)
+
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0),
+                                                     serve.RequestHandler)
+        cls.server.workers = serve.WorkerPool(benchmarkdir)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.thread.join()
+        cls.server.server_close()
+        cls.server.workers.stop()
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.tmpdir)
+
+    def post(self, request):
+        """ Returns the HTTP status and the JSON answer of a request. """
+        url = 'http://127.0.0.1:' + str(self.server.server_address[1]) + '/analyze'
+        data = json.dumps(request).encode()
+        try:
+            with urllib.request.urlopen(url, data) as response:
+                return (response.status, json.loads(response.read()))
+        except urllib.error.HTTPError as e:
+            return (e.code, json.loads(e.read()))
+
+    def test_lwpc_disabled(self):
+        (status, response) = self.post({'benchmark': 'big', 'settings':
+                                        {'ENABLED': ['cx.slli', 'cx.sh']}})
+        self.assertEqual(status, 200, response)
+        self.assertEqual(set(response['reductions']), {'cx.slli', 'cx.sh'})
+        self.assertEqual(response['instructions']['lw'], LOADS)
+
+    def test_lwpc_offsets_too_wide(self):
+        (status, response) = self.post({'benchmark': 'big', 'settings':
+                                        {'ENABLED': ['cx.lwpc']}})
+        self.assertEqual(status, 200, response)
+        self.assertEqual(response['reductions'], {'cx.lwpc': 0})
+        self.assertEqual(response['instructions']['lw'], LOADS)
+
+    def test_unknown_register(self):
+        (status, response) = self.post({'benchmark': 'big', 'settings':
+                                        {'REG_LIST': ['s0', 'x99']}})
+        self.assertEqual(status, 400)
+        self.assertIn('REG_LIST', response['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()